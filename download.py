@@ -12,35 +12,157 @@ Note: Requires yt-dlp and ffmpeg. Colorized output uses colorama if available.
 
 from __future__ import annotations
 
+import builtins
 import os
 import json
-import re
+import mmap
 import sys
 import shutil
+import tempfile
 import textwrap
+import time
 import hashlib
+import threading
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache
 from pathlib import Path
+from typing import NamedTuple
 from datetime import datetime, timedelta
 
 try:
 	from yt_dlp import YoutubeDL
-	from yt_dlp.utils import sanitize_filename
+	from yt_dlp.utils import determine_ext, replace_extension, sanitize_filename
 except Exception as e:  # pragma: no cover
 	print("[ERROR] yt-dlp is not installed. Please install it first:")
 	print("  pip install -U yt-dlp")
 	sys.exit(1)
 
+# Optional: fast non-cryptographic hashing for local archive keys
+try:
+	import xxhash
+except Exception:  # pragma: no cover
+	xxhash = None
+
+# Optional: fast JSON encoding/decoding for the archive file
+try:
+	import orjson
+except Exception:  # pragma: no cover
+	orjson = None
+
+# Optional: zstd compression for the on-disk extract_info cache
+try:
+	import zstandard
+except Exception:  # pragma: no cover
+	zstandard = None
+
+# POSIX only: copy-on-write file clones (FICLONE ioctl) for archive copies
+try:
+	import fcntl
+except Exception:  # pragma: no cover
+	fcntl = None
+
+# URL workers share stdout; serialize writes so their lines don't interleave
+_print_lock = threading.Lock()
+# Per-thread list of pending output while inside buffered_output()
+_print_local = threading.local()
+
+
+def print(*args, **kwargs):  # noqa: A001 - module-local shadow of the builtin
+	"""Thread-safe print used by every function in this module.
+	
+	Inside buffered_output() plain stdout prints are held back; calls that pass another
+	file (e.g. sys.stderr) or flush=True go straight out, stdout ones after the held lines.
+	"""
+	buf = getattr(_print_local, "buffer", None)
+	file = kwargs.get("file")
+	to_stdout = file is None or file is sys.stdout
+	if buf is not None and to_stdout and not kwargs.get("flush"):
+		sep = kwargs.get("sep")
+		end = kwargs.get("end")
+		buf.append((" " if sep is None else sep).join(map(str, args)) + ("\n" if end is None else end))
+		return
+	with _print_lock:
+		if buf and to_stdout:
+			# Keep stdout in order: held lines first, then this flushed one
+			sys.stdout.write("".join(buf))
+			buf.clear()
+		builtins.print(*args, **kwargs)
+
+
+@contextmanager
+def buffered_output():
+	"""Collect this thread's prints and emit them with a single stdout write on exit."""
+	if getattr(_print_local, "buffer", None) is not None:
+		yield  # Already buffering - the outer block flushes
+		return
+	buf: list[str] = []
+	_print_local.buffer = buf
+	try:
+		yield
+	finally:
+		_print_local.buffer = None
+		if buf:
+			with _print_lock:
+				sys.stdout.write("".join(buf))
+				sys.stdout.flush()
+
+
+def _json_dumps(obj, pretty: bool = False) -> bytes:
+	"""Serialize to UTF-8 JSON bytes (orjson if available); compact unless pretty=True."""
+	if not pretty:
+		return _json_dumps_line(obj)
+	if orjson is not None:
+		return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+	return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def _json_dumps_line(obj) -> bytes:
+	"""Serialize to a single compact JSON line (no trailing newline) for append logs."""
+	if orjson is not None:
+		return orjson.dumps(obj)
+	return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _json_loads(raw: bytes):
+	"""Parse UTF-8 JSON bytes (orjson if available)."""
+	if orjson is not None:
+		return orjson.loads(raw)
+	return json.loads(raw.decode("utf-8"))
+
+
+# Archives above this size are parsed straight from a memory map (orjson only)
+_MMAP_THRESHOLD = 8 * 1024 * 1024
+
+
+def _load_json_file(path: Path):
+	"""Read and parse a JSON file from raw bytes, without a text-decoding pass."""
+	with open(path, "rb") as f:
+		size = os.fstat(f.fileno()).st_size
+		if orjson is not None and size > _MMAP_THRESHOLD:
+			with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+				return orjson.loads(view)
+		return _json_loads(f.read())
+
+
+@lru_cache(maxsize=8192)
+def _sanitize(name: str) -> str:
+	"""Memoized yt-dlp filename sanitizer (titles repeat across lookups)."""
+	return sanitize_filename(name, restricted=False)
+
 
 def resolve_target_dir(base_dir: Path, url: str, info: dict | None = None) -> Path:
 	"""Centralized logic to determine target directory for downloads."""
-	if is_youtube_music_liked(url):
+	kind = classify_url(url)
+	if kind.is_liked:
 		target_dir = base_dir / "Liked Music"
 	elif info and (info.get("_type") == "playlist" or info.get("entries")):
 		# Use playlist info to determine folder name
 		playlist_name = info.get("playlist_title") or info.get("playlist") \
 		                or info.get("uploader") or info.get("channel") or "Playlist"
-		target_dir = base_dir / sanitize_filename(str(playlist_name), restricted=False)
-	elif "playlist" in url.lower() or "list=" in url.lower():
+		target_dir = base_dir / _sanitize(str(playlist_name))
+	elif kind.is_playlist:
 		# Playlist URL but no info yet - will be resolved later by yt-dlp template
 		return base_dir  # Let yt-dlp template handle it
 	else:
@@ -57,121 +179,287 @@ def clean_title(title_or_info) -> str:
 		title = title_or_info.get("title", "unknown")
 	else:
 		title = str(title_or_info) if title_or_info else "unknown"
-	return sanitize_filename(title, restricted=False)
+	return _sanitize(title)
+
+
+# Container -> file extensions, in probing order (native/video order matters for lookups)
+_NATIVE_AUDIO_EXTS = (".m4a", ".opus", ".webm", ".mp3", ".aac")
+_VIDEO_EXTS = (".mp4", ".mkv", ".webm", ".avi")
+_CONTAINER_EXTS: dict[str, tuple[str, ...]] = {
+	"mp3": (".mp3",),
+	"native": _NATIVE_AUDIO_EXTS,
+	"mp4": _VIDEO_EXTS,
+	"mkv": _VIDEO_EXTS,
+}
+# Same mapping as frozensets for O(1) membership tests in scan loops
+_EXTS: dict[str, frozenset[str]] = {k: frozenset(v) for k, v in _CONTAINER_EXTS.items()}
 
 
 def expected_extensions(container: str) -> list[str]:
 	"""Get expected file extensions for a container format."""
-	if container == "mp3":
-		return [".mp3"]
-	elif container == "native":
-		return [".m4a", ".opus", ".webm", ".mp3", ".aac"]
-	elif container in ("mp4", "mkv"):
-		return [".mp4", ".mkv", ".webm", ".avi"]
-	else:
-		return [f".{container}"]
+	return list(_CONTAINER_EXTS.get(container, (f".{container}",)))
+
+
+def expected_extension_set(container: str) -> frozenset[str]:
+	"""Get expected file extensions for a container format as a cached frozenset."""
+	return _EXTS.get(container) or frozenset((f".{container}",))
+
+
+@lru_cache(maxsize=8)
+def _archive_dir_for(data_home: str) -> Path:
+	"""Create the wrapper's data directory once per base location."""
+	archive_dir = Path(data_home) / 'yt-dlp-wrapper'
+	archive_dir.mkdir(parents=True, exist_ok=True)
+	return archive_dir
 
 
 def get_appdata_archive_path() -> Path:
 	"""Get the path to the JSON archive file in platform-appropriate directory."""
 	if os.name == 'nt':  # Windows
-		appdata = Path(os.environ.get('APPDATA', Path.home() / 'AppData' / 'Roaming'))
-		archive_dir = appdata / 'yt-dlp-wrapper'
+		data_home = os.environ.get('APPDATA') or str(Path.home() / 'AppData' / 'Roaming')
 	else:  # Linux/macOS
 		# Use XDG Base Directory specification
-		xdg_data_home = os.environ.get('XDG_DATA_HOME', Path.home() / '.local' / 'share')
-		archive_dir = Path(xdg_data_home) / 'yt-dlp-wrapper'
+		data_home = os.environ.get('XDG_DATA_HOME') or str(Path.home() / '.local' / 'share')
 	
-	archive_dir.mkdir(parents=True, exist_ok=True)
-	return archive_dir / 'download_archive.json'
+	# Called for every cache/archive path lookup - the mkdir only has to happen once
+	return _archive_dir_for(data_home) / 'download_archive.json'
+
+
+def get_flat_cache_path() -> Path:
+	"""Get the path to the flat playlist cache, stored next to the archive."""
+	return get_appdata_archive_path().parent / 'flat_cache.json'
+
+
+def get_info_cache_dir() -> Path:
+	"""Get the directory holding cached extract_info results, stored next to the archive."""
+	return get_appdata_archive_path().parent / 'info_cache'
+
+
+@lru_cache(maxsize=256)
+def _archive_extractor_name(extractor: str | None) -> str:
+	"""Normalized, interned extractor prefix for archive keys (the set of extractors is small)."""
+	extractor_clean = (extractor or 'youtube').lower()
+	# Map common YouTube extractor variations to a standard name
+	if extractor_clean in ('youtube', 'youtubetab', 'youtube:tab'):
+		extractor_clean = 'youtube'
+	return sys.intern(extractor_clean)
 
 
 class ArchiveManager:
 	"""Cached archive manager to avoid per-item JSON reads/writes."""
 	
+	# Rewrite the canonical JSON once the append log grows past this
+	LOG_COMPACT_BYTES = 1024 * 1024
+	# Indent the archive file for hand inspection (--pretty); compact JSON is half the bytes
+	PRETTY = False
+	
 	def __init__(self):
 		self._path = get_appdata_archive_path()
 		try:
-			self.data = json.loads(self._path.read_text(encoding="utf-8"))
+			self.data = _load_json_file(self._path)
 		except Exception:
 			self.data = {}
 		self._dirty = False
+		# New entries are appended here as NDJSON and folded into the JSON on save()
+		self._log_path = self._path.with_suffix(".ndjson")
+		self._log_bytes = 0
+		self._replay_log()
+		# Guards data/index mutations when several URLs are processed in parallel
+		self._lock = threading.RLock()
+		# Files known to exist, filled by scanning each archived directory once
+		self._exists_cache: set[str] = set()
+		self._scanned_dirs: set[str] = set()
+		# Secondary index for title fallback: (format, clean lowercase title) -> archive keys
+		self._by_title: dict[tuple[str, str], list[str]] = {}
+		# Reverse of _by_title, so re-adding a key under a new title leaves no stale bucket behind
+		self._title_of: dict[str, tuple[str, str]] = {}
+		for k, v in self.data.items():
+			self._index_title(k, v)
 	
-	def save(self):
-		"""Save the archive if it has been modified."""
-		if self._dirty:
+	def _replay_log(self) -> None:
+		"""Apply entries appended since the last compaction (e.g. after a crash)."""
+		try:
+			raw = self._log_path.read_bytes()
+		except OSError:
+			return
+		self._log_bytes = len(raw)
+		for line in raw.splitlines():
 			try:
-				self._path.write_text(json.dumps(self.data, indent=2, ensure_ascii=False), encoding="utf-8")
-				self._dirty = False
-			except Exception as e:
-				print(f"    {C_WARN}Warning: Could not save archive: {e}{C_RESET}")
+				self.data.update(_json_loads(line))
+			except Exception:
+				continue  # Torn final line from an interrupted write
+		# Fold the replayed entries into the canonical file on the next save
+		self._dirty = bool(raw)
+	
+	def _append_log(self, key: str, entry: dict) -> None:
+		"""Durably record one new entry with an O(1) append instead of a full rewrite."""
+		line = _json_dumps_line({key: entry}) + b"\n"
+		try:
+			with open(self._log_path, "ab") as f:
+				f.write(line)
+			self._log_bytes += len(line)
+		except OSError:
+			pass  # Still in memory - the next save() persists it
+	
+	def _index_title(self, key: str, entry: dict) -> None:
+		"""Register an entry in the title index (call after inserting into self.data)."""
+		if not isinstance(entry, dict):
+			return  # Malformed entry in a hand-edited archive - never indexed, never matched
+		clean = _sanitize(str(entry.get("title") or "")).lower()
+		index_key = (entry.get("format", ""), clean)
+		if self._title_of.get(key) == index_key:
+			return
+		self._unindex_title(key)
+		self._by_title.setdefault(index_key, []).append(key)
+		self._title_of[key] = index_key
+	
+	def _unindex_title(self, key: str) -> None:
+		"""Remove a key from the title index bucket it was last registered under."""
+		index_key = self._title_of.pop(key, None)
+		keys = self._by_title.get(index_key) if index_key is not None else None
+		if keys and key in keys:
+			keys.remove(key)
+			if not keys:
+				del self._by_title[index_key]
+	
+	def exists(self, file_path: str) -> bool:
+		"""Check that an archived file exists, using one directory scan per parent folder."""
+		with self._lock:
+			if file_path in self._exists_cache:
+				return True
+			parent = os.path.dirname(file_path)
+			if parent not in self._scanned_dirs:
+				self._scanned_dirs.add(parent)
+				try:
+					with os.scandir(parent or ".") as it:
+						for de in it:
+							if de.is_file():
+								self._exists_cache.add(de.path)
+				except OSError:
+					pass
+				if file_path in self._exists_cache:
+					return True
+			# Not seen during the scan (e.g. created later) - ask the filesystem directly
+			return os.path.exists(file_path)
+	
+	def save(self):
+		"""Save the archive if it has been modified, compacting the append log into it."""
+		with self._lock:
+			if self._dirty:
+				try:
+					tmp = self._path.with_name(self._path.name + ".tmp")
+					tmp.write_bytes(_json_dumps(self.data, pretty=self.PRETTY))
+					os.replace(tmp, self._path)
+					# Everything in the log is now in the JSON file
+					if self._log_bytes:
+						try:
+							os.unlink(self._log_path)
+						except FileNotFoundError:
+							pass
+						self._log_bytes = 0
+					self._dirty = False
+				except Exception as e:
+					print(f"    {C_WARN}Warning: Could not save archive: {e}{C_RESET}")
+	
+	def compact_if_needed(self):
+		"""Rewrite the JSON only once the append log is large; new entries are already durable."""
+		with self._lock:
+			if self._log_bytes >= self.LOG_COMPACT_BYTES:
+				self.save()
 	
 	def key(self, vid: str, extractor: str, container: str) -> str:
 		"""Generate a consistent key for archive entries."""
-		# Normalize extractor to handle common variations
-		extractor_clean = (extractor or 'youtube').lower()
-		# Map common YouTube extractor variations to a standard name
-		if extractor_clean in ('youtube', 'youtubetab', 'youtube:tab'):
-			extractor_clean = 'youtube'
-		return f"{extractor_clean}_{vid}_{container}"
+		return f"{_archive_extractor_name(extractor)}_{vid}_{container}"
 	
 	def find(self, vid: str, extractor: str, container: str, title: str | None = None) -> dict | None:
 		"""Find a video in the archive, with title fallback if no exact match."""
-		k = self.key(vid, extractor, container)
-		
-		# Debug output - uncomment if needed for troubleshooting
-		# print(f"    🔍 Looking for archive key: {k} (vid={vid}, extractor={extractor}, container={container})")
-		
-		# First try exact key match
-		if k in self.data:
-			p = Path(self.data[k]["file_path"])
-			if p.exists():
-				# print(f"    ✅ Found exact match in archive: {k}")
-				return self.data[k]
-			# File no longer exists, remove from archive
-			del self.data[k]
-			self._dirty = True
-		
-		# Title-based fallback search
-		if title:
-			clean = sanitize_filename(title, restricted=False).lower()
-			keys_to_remove = []
-			
-			for kk, v in list(self.data.items()):
-				if kk.endswith(f"_{container}"):
-					p = Path(v["file_path"])
-					if not p.exists():
-						keys_to_remove.append(kk)
-						continue
-					
-					if sanitize_filename(v.get("title", ""), restricted=False).lower() == clean:
-						# Clean up missing files we found along the way
-						for key_to_remove in keys_to_remove:
-							del self.data[key_to_remove]
-						if keys_to_remove:
-							self._dirty = True
-						return v
-			
-			# Clean up any missing files we found
-			for key_to_remove in keys_to_remove:
-				del self.data[key_to_remove]
-			if keys_to_remove:
+		with self._lock:
+			k = self.key(vid, extractor, container)
+		
+			# Debug output - uncomment if needed for troubleshooting
+			# print(f"    🔍 Looking for archive key: {k} (vid={vid}, extractor={extractor}, container={container})")
+		
+			# First try exact key match
+			if k in self.data:
+				if self.exists(self.data[k]["file_path"]):
+					# print(f"    ✅ Found exact match in archive: {k}")
+					return self.data[k]
+				# File no longer exists, remove from archive
+				del self.data[k]
 				self._dirty = True
 		
-		return None
+			# Title-based fallback via the title index
+			if title:
+				clean = _sanitize(title).lower()
+				index_key = (container, clean)
+				keys = self._by_title.get(index_key)
+				if keys:
+					# Single pass: stop at the first live match, remember stale keys seen before it
+					found = None
+					stale = 0
+					for kk in keys:
+						v = self.data.get(kk)
+						if v is not None and self.exists(v["file_path"]):
+							found = v
+							break
+						stale += 1
+				
+					# Stale keys form a prefix of the bucket - drop them from index and archive at once
+					if stale:
+						for kk in keys[:stale]:
+							self._title_of.pop(kk, None)
+							if self.data.pop(kk, None) is not None:
+								self._dirty = True
+						del keys[:stale]
+						if not keys:
+							del self._by_title[index_key]
+					return found
+		
+			return None
 	
-	def add(self, vid: str, extractor: str, title: str, file_path: Path, container: str):
-		"""Add a new entry to the archive."""
-		k = self.key(vid, extractor, container)
-		self.data[k] = {
-			"id": vid,
-			"extractor": extractor,
-			"title": title,
-			"format": container,
-			"file_path": str(file_path),
-			"download_date": file_path.stat().st_mtime if file_path.exists() else 0.0
-		}
-		self._dirty = True
+	def add(self, vid: str, extractor: str, title: str, file_path: Path | str, container: str, mtime: float | None = None):
+		"""Add a new entry to the archive. Pass mtime when the caller already has a stat result."""
+		with self._lock:
+			k = self.key(vid, extractor, container)
+			path_str = os.fspath(file_path)
+			exists = True
+			if mtime is None:
+				try:
+					mtime = os.stat(path_str).st_mtime
+				except OSError:
+					mtime, exists = 0.0, False
+			self.data[k] = {
+				"id": vid,
+				"extractor": extractor,
+				"title": title,
+				"format": container,
+				"file_path": path_str,
+				"download_date": mtime
+			}
+			self._index_title(k, self.data[k])
+			self._append_log(k, self.data[k])
+			if exists:
+				self._exists_cache.add(path_str)
+			self._dirty = True
+	
+	def add_entries(self, entries: dict[str, dict]) -> None:
+		"""Bulk add prebuilt entries, persisted with one log append instead of a full JSON rewrite."""
+		if not entries:
+			return
+		with self._lock:
+			self.data.update(entries)
+			for k, v in entries.items():
+				self._index_title(k, v)
+			blob = b"".join(_json_dumps_line({k: v}) + b"\n" for k, v in entries.items())
+			self._dirty = True
+			try:
+				with open(self._log_path, "ab") as f:
+					f.write(blob)
+				self._log_bytes += len(blob)
+			except OSError:
+				self.save()  # Can't append - fall back to rewriting the JSON
+				return
+			self.compact_if_needed()
 	
 	# Make ArchiveManager compatible with yt-dlp's archive expectations
 	def __contains__(self, key):
@@ -187,13 +475,65 @@ class ArchiveManager:
 		return self.data.keys()
 
 
-def flat_entries(url: str, use_cookies: bool) -> list[dict]:
-	"""Extract flat playlist entries (IDs + titles only) without heavy extractor work."""
+class FlatCache:
+	"""Cached flat playlist listings so repeat runs skip the network fetch."""
+	
+	TTL = 6 * 3600  # seconds a cached listing stays valid
+	# Entry fields fast_copy_from_archive needs - keeps the cache file small
+	ENTRY_KEYS = ("id", "title", "extractor_key", "extractor")
+	
+	def __init__(self):
+		self._path = get_flat_cache_path()
+		try:
+			self.data = _load_json_file(self._path)
+		except Exception:
+			self.data = {}
+		self._dirty = False
+	
+	def get(self, url: str) -> tuple[dict, list[dict]] | None:
+		"""Return cached (info, entries) for a URL, or None if missing/expired."""
+		item = self.data.get(url)
+		if not item or time.time() - item.get("ts", 0) >= self.TTL:
+			return None
+		return {"playlist_title": item.get("title")}, item.get("entries") or []
+	
+	def put(self, url: str, info: dict, entries: list[dict]) -> None:
+		"""Store a fresh flat listing for a URL."""
+		self.data[url] = {
+			"ts": time.time(),
+			"title": info.get("playlist_title") or info.get("playlist") or info.get("title"),
+			"entries": [
+				{k: e[k] for k in self.ENTRY_KEYS if e.get(k) is not None}
+				for e in entries if e
+			],
+		}
+		self._dirty = True
+	
+	def save(self):
+		"""Save the cache if it has been modified, dropping expired listings."""
+		if self._dirty:
+			try:
+				now = time.time()
+				self.data = {u: v for u, v in self.data.items() if now - v.get("ts", 0) < self.TTL}
+				self._path.write_bytes(_json_dumps(self.data))
+				self._dirty = False
+			except Exception as e:
+				print(f"    {C_WARN}Warning: Could not save playlist cache: {e}{C_RESET}")
+
+
+def flat_entries(url: str, use_cookies: bool, cache: FlatCache | None = None) -> tuple[dict, list[dict]]:
+	"""Extract flat playlist info and entries (IDs + titles only) without heavy extractor work."""
+	if cache is not None:
+		cached = cache.get(url)
+		if cached is not None:
+			print(f"    {C_DIM}Using cached playlist listing (--no-cache to refresh){C_RESET}")
+			return cached
+	
 	opts = {
-		"extract_flat": True,         # <- no per-item player probing
+		"extract_flat": "in_playlist",  # <- no per-item player probing, keep playlist metadata
 		"dump_single_json": True,
 		"quiet": True,
-		"logger": _YDLLogger(),
+		"logger": _YDL_LOGGER_SINGLETON,
 		"socket_timeout": 15,
 		"extractor_retries": 3,
 	}
@@ -202,45 +542,122 @@ def flat_entries(url: str, use_cookies: bool) -> list[dict]:
 	
 	try:
 		with YoutubeDL(opts) as ydl:
-			info = ydl.extract_info(url, download=False)
-		return (info.get("entries") if info else []) or []
+			info = ydl.extract_info(url, download=False) or {}
+		entries = info.get("entries") or []
+		if cache is not None and entries:
+			cache.put(url, info, entries)
+		return info, entries
 	except Exception as e:
 		print(f"    {C_WARN}Warning: Could not extract flat entries: {e}{C_RESET}")
-		return []
+		return {}, []
+
+
+# Cached extract_info results: one file per URL, expired by the stored extraction time,
+# evicted least-recently-used (a hit bumps the file's mtime; atime is unreliable on noatime mounts)
+_INFO_CACHE_TTL = 24 * 3600
+_INFO_CACHE_MAX_ENTRIES = 3000
+_INFO_CACHE_SUFFIX = ".json.zst" if zstandard is not None else ".json"
 
 
-def fast_copy_from_archive(url: str, base_dir: Path, container: str, archive_mgr: ArchiveManager) -> list[str]:
+def _info_cache_file(url: str) -> Path:
+	return get_info_cache_dir() / (hashlib.sha1(url.encode("utf-8")).hexdigest() + _INFO_CACHE_SUFFIX)
+
+
+def _get_cached_info(url: str, ttl: float = _INFO_CACHE_TTL) -> dict | None:
+	"""Return the cached extract_info result for a URL, or None if missing/expired."""
+	path = _info_cache_file(url)
+	try:
+		raw = path.read_bytes()
+		if zstandard is not None:
+			raw = zstandard.ZstdDecompressor().decompress(raw)
+		item = _json_loads(raw)
+		if time.time() - item["ts"] >= ttl:
+			return None
+		info = item["info"]
+		# Record the hit in mtime for LRU eviction
+		os.utime(path)
+	except Exception:
+		return None
+	return info if isinstance(info, dict) else None
+
+
+def _put_cached_info(url: str, info: dict) -> None:
+	"""Store an extract_info result atomically, then trim the cache to its size bound."""
+	path = _info_cache_file(url)
+	try:
+		path.parent.mkdir(parents=True, exist_ok=True)
+		raw = _json_dumps({"ts": time.time(), "info": YoutubeDL.sanitize_info(info)})
+		if zstandard is not None:
+			raw = zstandard.ZstdCompressor().compress(raw)
+		tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+		tmp.write_bytes(raw)
+		os.replace(tmp, path)
+		_evict_info_cache(path.parent)
+	except Exception as e:
+		print(f"    {C_WARN}Warning: Could not cache playlist information: {e}{C_RESET}")
+
+
+def _evict_info_cache(cache_dir: Path, max_entries: int = _INFO_CACHE_MAX_ENTRIES) -> None:
+	"""Drop the least recently used cache files beyond max_entries."""
+	with os.scandir(cache_dir) as it:
+		files = [de for de in it if de.name.endswith(_INFO_CACHE_SUFFIX)]
+	if len(files) <= max_entries:
+		return
+	files.sort(key=lambda de: de.stat().st_mtime)
+	for de in files[:len(files) - max_entries]:
+		try:
+			os.unlink(de.path)
+		except OSError:
+			pass
+
+
+def _playlist_unchanged(info: dict, flat_info: dict, listing: list[dict]) -> bool:
+	"""True if cached playlist info has the same title and track IDs (in order) as a flat listing."""
+	def title(d: dict):
+		return d.get("playlist_title") or d.get("playlist") or d.get("title")
+	return (
+		bool(listing)
+		and title(info) == title(flat_info)
+		and [e.get("id") for e in info.get("entries") or () if e] == [e.get("id") for e in listing if e]
+	)
+
+
+def clear_metadata_cache() -> int:
+	"""Delete all cached extract_info results. Returns the number of files removed."""
+	removed = 0
+	try:
+		with os.scandir(get_info_cache_dir()) as it:
+			for de in it:
+				if de.is_file():
+					os.unlink(de.path)
+					removed += 1
+	except FileNotFoundError:
+		pass
+	print(C_OK + f"✓ Cleared {removed} cached metadata file(s)." + C_RESET)
+	return removed
+
+
+def fast_copy_from_archive(url: str, base_dir: Path, container: str, archive_mgr: ArchiveManager, flat_cache: FlatCache | None = None) -> list[str]:
 	"""Fast prepass: copy everything from archive, return missing IDs for download."""
-	entries = flat_entries(url, use_cookies=is_youtube_music_liked(url))
+	is_liked = is_youtube_music_liked(url)
+	info, entries = flat_entries(url, use_cookies=is_liked, cache=flat_cache)
 	if not entries:
 		return []
 	
 	# Create playlist folder
-	if is_youtube_music_liked(url):
+	if is_liked:
 		playlist_dir = base_dir / "Liked Music"
 	else:
-		# Try to get playlist title from flat extraction
-		playlist_title = "Playlist"  # fallback
-		try:
-			# Extract basic info to get playlist title
-			temp_opts = {"quiet": True, "logger": _YDLLogger()}
-			if is_youtube_music_liked(url):
-				temp_opts["cookiesfrombrowser"] = ("firefox", None, None, None)
-			
-			with YoutubeDL(temp_opts) as ydl:
-				info = ydl.extract_info(url, download=False)
-				if info:
-					playlist_title = info.get("playlist_title") or info.get("playlist") or playlist_title
-		except Exception:
-			pass
-		
-		playlist_dir = base_dir / sanitize_filename(playlist_title, restricted=False)
+		# The flat extraction already carries the playlist title - no second round-trip
+		playlist_title = info.get("playlist_title") or info.get("playlist") or info.get("title") or "Playlist"
+		playlist_dir = base_dir / _sanitize(str(playlist_title))
 	
 	playlist_dir.mkdir(parents=True, exist_ok=True)
 	
 	missing_ids = []
-	copied_count = 0
+	to_copy: list[dict] = []
 	
+	# Resolve archive matches on this thread - find() may prune stale entries
 	for e in entries:
 		vid = e.get("id")
 		title = e.get("title") or "unknown"
@@ -251,11 +668,24 @@ def fast_copy_from_archive(url: str, base_dir: Path, container: str, archive_mgr
 		extractor = e.get("extractor_key", e.get("extractor", "youtube"))
 		entry = archive_mgr.find(vid, extractor, container, title)
 		if entry:
-			if optimized_copy_from_archive(entry, playlist_dir, container):
-				copied_count += 1
+			to_copy.append(entry)
 		else:
 			missing_ids.append(vid)
 	
+	# Hardlinks/copies are I/O-bound, so overlap them across worker threads
+	copied_count = 0
+	if len(to_copy) > 1:
+		def copy_one(entry: dict) -> bool:
+			# Each copy prints several lines; keep them together as one block
+			with buffered_output():
+				return optimized_copy_from_archive(entry, playlist_dir, container)
+		
+		workers = min(16, (os.cpu_count() or 1) * 4, len(to_copy))
+		with ThreadPoolExecutor(max_workers=workers) as pool:
+			copied_count = sum(pool.map(copy_one, to_copy))
+	elif to_copy:
+		copied_count = int(optimized_copy_from_archive(to_copy[0], playlist_dir, container))
+	
 	if copied_count > 0:
 		print(f"  📋 {C_OK}Copied {copied_count} files from archive{C_RESET}")
 	
@@ -265,42 +695,81 @@ def fast_copy_from_archive(url: str, base_dir: Path, container: str, archive_mgr
 	return missing_ids
 
 
+def archive_target_name(archive_entry: dict, container: str) -> str:
+	"""File name an archive entry gets when copied into a target folder."""
+	clean_title_str = clean_title(archive_entry.get('title'))
+	source_ext = os.path.splitext(archive_entry['file_path'])[1]
+	
+	# Determine extension based on format and source file
+	if container == "mp3":
+		# For MP3 mode, enforce .mp3 extension regardless of source format
+		target_ext = ".mp3"
+	elif container == "native":
+		# For native mode, preserve original extension
+		target_ext = source_ext
+	else:
+		# For video containers, use specified container or source extension
+		target_ext = source_ext or f".{container}"
+	return f"{clean_title_str}{target_ext}"
+
+
+# Linux FICLONE ioctl: share the source's extents (btrfs, XFS, bcachefs...) instead of copying data
+_FICLONE = 0x40049409
+
+
+def _clone_or_copy(source_path: Path, target_path: Path) -> bool:
+	"""Copy a file, as a copy-on-write clone where the filesystem supports it. Returns True if cloned.
+	
+	Data goes to a temporary name first, so a failed copy never leaves a stub at target_path.
+	"""
+	tmp_path = target_path.with_name(f".{target_path.name}.{os.getpid()}.{threading.get_ident()}.part")
+	try:
+		cloned = False
+		if fcntl is not None and sys.platform.startswith("linux"):
+			try:
+				with open(source_path, "rb") as fsrc, open(tmp_path, "wb") as fdst:
+					fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+				shutil.copystat(source_path, tmp_path)
+				cloned = True
+			except OSError:
+				pass  # Not supported here (or cross-device) - the full copy below overwrites the temp file
+		if not cloned:
+			shutil.copy2(source_path, tmp_path)
+		os.replace(tmp_path, target_path)
+		return cloned
+	except BaseException:
+		try:
+			os.unlink(tmp_path)
+		except OSError:
+			pass
+		raise
+
+
 def optimized_copy_from_archive(archive_entry: dict, target_dir: Path, container: str) -> bool:
 	"""Copy with hardlink optimization for same-volume files."""
 	try:
-		source_path = Path(archive_entry['file_path'])
-		if not source_path.exists():
+		if not os.path.exists(archive_entry['file_path']):
 			return False
+		source_path = Path(archive_entry['file_path'])
+		target_path = target_dir / archive_target_name(archive_entry, container)
 		
-		# Determine target filename
-		title = archive_entry['title']
-		clean_title_str = clean_title(title)
-		
-		# Determine extension based on format and source file
-		if container == "mp3":
-			# For MP3 mode, enforce .mp3 extension regardless of source format
-			target_ext = ".mp3"
-		elif container == "native":
-			# For native mode, preserve original extension
-			target_ext = source_path.suffix
-		else:
-			# For video containers, use specified container or source extension
-			target_ext = source_path.suffix or f".{container}"
-		
-		target_path = target_dir / f"{clean_title_str}{target_ext}"
-		
-		# Avoid copying to the same location
-		if source_path.resolve() == target_path.resolve():
-			return True
+		# Avoid copying to the same location (lexists short-circuits when target is new)
+		try:
+			if os.path.lexists(target_path) and os.path.samefile(source_path, target_path):
+				return True
+		except OSError:
+			pass
 		
 		# Try hardlink first (fast path on same volume)
 		try:
 			os.link(source_path, target_path)  # Windows supports this on NTFS
 			print(f"    📎 {C_OK}Hardlinked from archive:{C_RESET} {target_path.name}")
 		except Exception:
-			# Fallback to copy if hardlink fails (different volumes, etc.)
-			shutil.copy2(source_path, target_path)
-			print(f"    📋 {C_OK}Copied from archive:{C_RESET} {target_path.name}")
+			# Fallback to a clone/copy if hardlink fails (different volumes, link limits, etc.)
+			if _clone_or_copy(source_path, target_path):
+				print(f"    🧬 {C_OK}Cloned from archive (copy-on-write):{C_RESET} {target_path.name}")
+			else:
+				print(f"    📋 {C_OK}Copied from archive:{C_RESET} {target_path.name}")
 		
 		print(f"      {C_DIM}Source: {source_path}{C_RESET}")
 		print(f"      {C_DIM}Target: {target_path}{C_RESET}")
@@ -312,37 +781,21 @@ def optimized_copy_from_archive(archive_entry: dict, target_dir: Path, container
 
 
 class _YDLLogger:
+	# Debug lines worth showing; everything else from yt-dlp is dropped
+	_KEEP = ("downloading", "extract", "playlist", "continuation", "api", "cookies")
+	
 	def debug(self, msg): 
 		# Filter super-chatty lines, but keep useful extractor messages
 		low = msg.lower()
-		if any(k in low for k in ("downloading", "extract", "playlist", "continuation", "api", "cookies")):
+		if any(k in low for k in self._KEEP):
 			print(f"    {C_DIM}{msg}{C_RESET}")
 	def warning(self, msg): print(f"    {C_WARN}[warn] {msg}{C_RESET}")
 	def error(self, msg):   print(f"    {C_ERR}[err ] {msg}{C_RESET}")
 
 
-class Heartbeat:
-	def __init__(self, label: str = "working…", interval: float = 2.0):
-		self.label, self.interval, self._stop = label, interval, False
-		
-	def start(self):
-		def run():
-			import threading, time
-			i = 0
-			while not self._stop:
-				i = (i + 1) % 4
-				dots = "." * i + " " * (3 - i)
-				print(f"\r  {self.label} {dots}", end="", flush=True)
-				time.sleep(self.interval)
-			print("\r" + " " * 40 + "\r", end="")
-		import threading
-		self._thr = threading.Thread(target=run, daemon=True)
-		self._thr.start()
-		
-	def stop(self):
-		self._stop = True
-		if hasattr(self, "_thr"): 
-			self._thr.join(timeout=0.2)
+# The logger is stateless, so every YoutubeDL instance shares one
+_YDL_LOGGER_SINGLETON = _YDLLogger()
+
 
 # Optional: color support
 try:
@@ -386,9 +839,27 @@ def detect_ffmpeg() -> bool:
 	return exe is not None
 
 
+def _is_liked_lower(u: str) -> bool:
+	"""Liked Music check on an already-lowercased URL."""
+	return ("music.youtube.com" in u) and ("list=lm" in u or "liked" in u)
+
+
 def is_youtube_music_liked(url: str) -> bool:
+	return classify_url(url).is_liked
+
+
+class UrlKind(NamedTuple):
+	"""URL classification computed once per URL (one lowercase pass)."""
+	is_playlist: bool
+	is_liked: bool
+	lowered: str
+
+
+@lru_cache(maxsize=1024)
+def classify_url(url: str) -> UrlKind:
+	"""Classify a URL as playlist-like and/or YouTube Music Liked in a single pass."""
 	u = url.lower()
-	return ("music.youtube.com" in u) and ("list=lm" in u or "liked" in u)
+	return UrlKind("playlist" in u or "list=" in u, _is_liked_lower(u), u)
 
 
 def outtmpl_for_unknown_playlist(base_dir: Path) -> str:
@@ -397,12 +868,13 @@ def outtmpl_for_unknown_playlist(base_dir: Path) -> str:
 	return str(base_dir / "%(playlist_title|playlist|uploader|channel|id)s" / "%(title)s.%(ext)s")
 
 
-def download_immediate(urls: list[str], base_dir: Path, container: str, fmt_type: str, fast_mode: bool = False) -> int:
+def download_immediate(urls: list[str], base_dir: Path, container: str, fmt_type: str, fast_mode: bool = False, use_cache: bool = True, archive_mgr: ArchiveManager | None = None) -> int:
 	"""Download URLs immediately with fast copy prepass optimization."""
 	print(f"  🚀 {C_OK}Starting optimized download mode (with fast copy prepass)...{C_RESET}")
 	
-	# Initialize archive manager once
-	archive_mgr = ArchiveManager()
+	# Initialize archive manager (and flat playlist cache) once
+	archive_mgr = archive_mgr or ArchiveManager()
+	flat_cache = FlatCache() if use_cache else None
 	
 	# Common opts
 	opts = ydl_opts_common(base_dir, container, fmt_type, False, fast_mode)
@@ -412,7 +884,7 @@ def download_immediate(urls: list[str], base_dir: Path, container: str, fmt_type
 		"break_on_existing": True,     # Stop early when hitting existing files
 		"break_per_url": True,         # Apply break_on_existing per URL
 		"progress_with_newline": True,
-		"logger": _YDLLogger(),
+		"logger": _YDL_LOGGER_SINGLETON,
 		"socket_timeout": 15,
 		"extractor_retries": 3,
 		"noprogress": False,
@@ -434,36 +906,41 @@ def download_immediate(urls: list[str], base_dir: Path, container: str, fmt_type
 	except Exception as e:
 		print(f"    {C_WARN}Warning: Could not build archive from existing files: {e}{C_RESET}")
 
-	for url in urls:
-		print(f"\n{C_HEAD}➡ Processing: {url}{C_RESET}")
-		
-		# Fast copy prepass for playlists
-		if "playlist" in url.lower() or "list=" in url.lower():
-			print(f"  🔍 {C_DIM}Fast copy prepass: checking archive for existing files...{C_RESET}")
-			missing_ids = fast_copy_from_archive(url, base_dir, container, archive_mgr)
+	ydl: SmartYoutubeDL | None = None
+	with ExitStack() as stack:
+		for url in urls:
+			print(f"\n{C_HEAD}➡ Processing: {url}{C_RESET}")
 			
-			if not missing_ids:
-				print(f"  ✅ {C_OK}All items satisfied from archive - no downloads needed!{C_RESET}")
-				total_ok += 1
-				continue
-			
-			# Only download the missing items
-			if len(missing_ids) < 50:  # Don't spam for large playlists
-				print(f"  📥 {C_DIM}Downloading {len(missing_ids)} missing items: {', '.join(missing_ids[:10])}{('...' if len(missing_ids) > 10 else '')}{C_RESET}")
+			# Fast copy prepass for playlists
+			if classify_url(url).is_playlist:
+				print(f"  🔍 {C_DIM}Fast copy prepass: checking archive for existing files...{C_RESET}")
+				missing_ids = fast_copy_from_archive(url, base_dir, container, archive_mgr, flat_cache)
+				
+				if not missing_ids:
+					print(f"  ✅ {C_OK}All items satisfied from archive - no downloads needed!{C_RESET}")
+					total_ok += 1
+					continue
+				
+				# Only download the missing items
+				if len(missing_ids) < 50:  # Don't spam for large playlists
+					print(f"  📥 {C_DIM}Downloading {len(missing_ids)} missing items: {', '.join(missing_ids[:10])}{('...' if len(missing_ids) > 10 else '')}{C_RESET}")
+				else:
+					print(f"  📥 {C_DIM}Downloading {len(missing_ids)} missing items{C_RESET}")
+				
+				# Convert missing IDs to full URLs for download
+				real_urls = [f"https://www.youtube.com/watch?v={vid}" for vid in missing_ids]
 			else:
-				print(f"  📥 {C_DIM}Downloading {len(missing_ids)} missing items{C_RESET}")
+				# Single video - process normally
+				real_urls = [url]
 			
-			# Convert missing IDs to full URLs for download
-			real_urls = [f"https://www.youtube.com/watch?v={vid}" for vid in missing_ids]
-		else:
-			# Single video - process normally
-			real_urls = [url]
-		
-		with SmartYoutubeDL(opts, base_dir, container, url, archive_mgr=archive_mgr) as ydl:
-			# Use heartbeat around download to show continuous progress
-			hb = Heartbeat("Processing")
+			# One downloader serves every URL (the options are identical), created on first use
+			if ydl is None:
+				ydl = stack.enter_context(SmartYoutubeDL(opts, base_dir, container, url, archive_mgr=archive_mgr))
+			ydl.url = url
+			
+			# Progress is reported by the (throttled) progress hook - no spinner thread needed
 			try:
-				hb.start()
+				print(f"  ⏳ {C_DIM}Processing...{C_RESET}")
 				print(f"  📥 {C_OK}Starting download...{C_RESET}")
 				
 				# For playlists with missing items, download only those
@@ -474,26 +951,25 @@ def download_immediate(urls: list[str], base_dir: Path, container: str, fmt_type
 					print(f"  ✅ {C_OK}Download completed successfully{C_RESET}")
 				else:
 					print(f"    ⚠ {C_WARN}Download completed with warnings for: {url}{C_RESET}")
-					
+			
 			except KeyboardInterrupt:
 				print(f"\n{C_WARN}Download interrupted by user{C_RESET}")
 				raise
 			except Exception as e:
 				print(f"    ✗ {C_ERR}Error downloading {url}: {e}{C_RESET}")
 				continue
-			finally:
-				hb.stop()
 
-	# Save archive once at the end
+	# Save archive and playlist cache once at the end
 	archive_mgr.save()
+	if flat_cache is not None:
+		flat_cache.save()
 	return total_ok
 
 
 def should_retry_with_cookies(error_message: str, url: str) -> bool:
 	"""Determine if we should retry a failed playlist download with cookies."""
 	# Check if it's a playlist URL and the error suggests authentication issues
-	is_playlist_url = ("playlist" in url.lower() or "list=" in url.lower())
-	if not is_playlist_url:
+	if not classify_url(url).is_playlist:
 		return False
 	
 	# Common error patterns that suggest private/restricted content
@@ -528,6 +1004,15 @@ def prompt(question: str, default: str | None = None) -> str:
 	return ans or (default or "")
 
 
+# --format value -> (container, format type)
+_FORMAT_MAP: dict[str, tuple[str, str]] = {
+	"mp3": ("mp3", "audio"),
+	"mkv": ("mkv", "video"),
+	"mp4": ("mp4", "video"),
+	"native": ("native", "audio"),
+}
+
+
 def choose_format() -> tuple[str, str]:
 	print(C_ASK + "Select format:" + C_RESET)
 	print(f"  {C_HEAD}[1]{C_RESET} MP3 (audio only)")
@@ -548,17 +1033,17 @@ def choose_format() -> tuple[str, str]:
 
 
 def split_urls(s: str) -> list[str]:
-	# Allow space or newline separated multiple URLs
-	parts = re.split(r"\s+", s.strip())
-	return [p for p in parts if p]
+	# Allow space or newline separated multiple URLs (str.split drops empty parts itself)
+	return s.split()
 
 
-def build_outtmpl(base_dir: Path, is_audio: bool, url: str = "", info: dict | None = None) -> str:
+def build_outtmpl(base_dir: Path, is_audio: bool, url: str = "", info: dict | None = None, kind: UrlKind | None = None) -> str:
 	"""Build output template using centralized target directory resolution."""
 	target_dir = resolve_target_dir(base_dir, url, info)
 	
 	# If we suspect a playlist but don't have info yet, let yt-dlp resolve it with template
-	if ("playlist" in url.lower() or "list=" in url.lower()) and not info and not is_youtube_music_liked(url):
+	kind = kind or classify_url(url)
+	if kind.is_playlist and not info and not kind.is_liked:
 		base_dir.mkdir(parents=True, exist_ok=True)
 		# Use a robust fallthrough so yt-dlp fills whichever it knows
 		return str(base_dir / "%(playlist_title|playlist|uploader|channel|id)s" / "%(title)s.%(ext)s")
@@ -573,7 +1058,7 @@ def build_outtmpl(base_dir: Path, is_audio: bool, url: str = "", info: dict | No
 def folder_name_from_info(info: dict) -> str:
 	name = info.get("playlist_title") or info.get("uploader") or info.get("channel") or "Unknown"
 	# Use yt-dlp's sanitizer to match file naming rules
-	return sanitize_filename(str(name), restricted=False)
+	return _sanitize(str(name))
 
 
 def get_playlist_folder_name(url: str, info: dict | None = None) -> str:
@@ -583,7 +1068,7 @@ def get_playlist_folder_name(url: str, info: dict | None = None) -> str:
 	if info:
 		name = info.get("playlist_title") or info.get("playlist") \
 		       or info.get("uploader") or info.get("channel") or "Playlist"
-		return sanitize_filename(str(name), restricted=False)
+		return _sanitize(str(name))
 	return "Playlist"
 
 
@@ -601,42 +1086,76 @@ def create_playlist_folder(base_dir: Path, url: str, info: dict | None = None) -
 		return base_dir
 
 
-def check_existing_file(base_dir: Path, info: dict, container: str) -> bool:
-	"""Check if a file already exists based on the video info and format."""
+def check_existing_file(base_dir: Path, info: dict, container: str, existing: set[str] | None = None) -> bool:
+	"""Check if a file already exists based on the video info and format.
+	
+	If ``existing`` (file names already in ``base_dir``) is given, no filesystem calls are made.
+	"""
 	try:
 		clean_title_str = clean_title(info)
-		extensions = expected_extensions(container)
 		
-		# Check for existing files with any of the possible extensions
-		for ext in extensions:
-			potential_file = base_dir / f"{clean_title_str}{ext}"
-			if potential_file.exists():
-				return True
-		return False
+		if existing is not None:
+			return any(f"{clean_title_str}{ext}" in existing for ext in expected_extension_set(container))
+		
+		# Check for existing files with any of the possible extensions (one stat each, no Path objects)
+		stem_path = os.path.join(base_dir, clean_title_str)
+		return any(os.path.exists(stem_path + ext) for ext in expected_extension_set(container))
 	except Exception:
 		return False
 
 
+# Minimum seconds between in-place "downloading" progress updates
+_PROGRESS_INTERVAL = 0.1
+_last_progress_ts = 0.0
+
+# Thumbnails shared by sibling tracks (album art) are kept here and hardlinked into place
+_THUMB_CACHE_DIRNAME = ".thumb_cache"
+_THUMB_CACHE_TTL = 24 * 3600
+
+# Max URLs processed concurrently by download_urls_with_prepass
+_MAX_URL_WORKERS = 8
+# Set on Ctrl+C so downloads running in worker threads abort at their next progress update
+_cancel_event = threading.Event()
+# Downloads run one at a time; only metadata extraction overlaps across URL workers
+_download_slot = threading.BoundedSemaphore(1)
+
+
+@contextmanager
+def _download_turn():
+	"""Wait for the download slot, giving up promptly if the run is cancelled."""
+	while not _download_slot.acquire(timeout=0.5):
+		if _cancel_event.is_set():
+			raise KeyboardInterrupt
+	try:
+		yield
+	finally:
+		_download_slot.release()
+
+
 def download_progress_hook(d: dict, base_dir: Path, container: str) -> None:
 	"""Progress hook to provide real-time download feedback."""
+	global _last_progress_ts
+	if _cancel_event.is_set():
+		raise KeyboardInterrupt
 	if d['status'] == 'downloading':
+		# yt-dlp fires this per chunk; throttle the carriage-return redraws
+		now = time.monotonic()
+		if now - _last_progress_ts < _PROGRESS_INTERVAL:
+			return
+		_last_progress_ts = now
+		speed = d.get('speed', 0)
+		speed_str = f" at {speed/1024/1024:.1f}MB/s" if speed else ""
 		if 'total_bytes' in d and 'downloaded_bytes' in d:
 			percent = (d['downloaded_bytes'] / d['total_bytes']) * 100
-			speed = d.get('speed', 0)
-			if speed:
-				speed_str = f" at {speed/1024/1024:.1f}MB/s"
-			else:
-				speed_str = ""
-			print(f"\r    📥 {percent:.1f}% downloaded{speed_str}", end='', flush=True)
+			line = f"\r    📥 {percent:.1f}% downloaded{speed_str}"
 		else:
 			# For streams without known total size
 			downloaded = d.get('downloaded_bytes', 0)
-			speed = d.get('speed', 0)
-			if speed:
-				speed_str = f" at {speed/1024/1024:.1f}MB/s"
-			else:
-				speed_str = ""
-			print(f"\r    📥 {downloaded/1024/1024:.1f}MB downloaded{speed_str}", end='', flush=True)
+			line = f"\r    📥 {downloaded/1024/1024:.1f}MB downloaded{speed_str}"
+		# Hot path: one locked write instead of going through print()
+		with _print_lock:
+			sys.stdout.write(line)
+			sys.stdout.flush()
 	elif d['status'] == 'finished':
 		filename = Path(d['filename']).name
 		print(f"\r    ✅ {C_OK}Downloaded:{C_RESET} {filename}")
@@ -661,33 +1180,111 @@ def should_download_hook(info: dict, base_dir: Path, container: str) -> bool:
 	return True
 
 
+def _legacy_stable_key_for_path(abs_path: str, fmt: str) -> str:
+	"""Generate the blake2b-based key used before xxhash support (and as fallback)."""
+	h = hashlib.blake2b(abs_path.encode('utf-8'), digest_size=8).hexdigest()
+	return f"local_{h}_{fmt}"
+
+
 def _stable_key_for_path(abs_path: str, fmt: str) -> str:
 	"""Generate a stable hash-based key for a file path to avoid collisions."""
-	h = hashlib.blake2b(abs_path.encode('utf-8'), digest_size=8).hexdigest()
+	if xxhash is None:
+		return _legacy_stable_key_for_path(abs_path, fmt)
+	# The key is only a dedup token, so a fast non-cryptographic hash is fine
+	h = xxhash.xxh3_64_hexdigest(abs_path.encode('utf-8'))
 	return f"local_{h}_{fmt}"
 
 
+# Folders never descended into by recursive scans (tooling, OS and trash folders; hidden ones too)
+_SCAN_SKIP_DIRS = frozenset({
+	'__pycache__', 'node_modules', 'venv', 'AppData', '$RECYCLE.BIN', 'System Volume Information',
+})
+
+
+def _scan_media_dir(path: str, extensions, recursive: bool = False, with_mtime: bool = True) -> tuple[list[tuple[str, str, float | None]], list[str]]:
+	"""List one directory: (stem, abs_path, mtime) for its media files, plus subdirectories if recursive.
+	
+	With with_mtime=False the stat() is left to the caller and mtime is None.
+	"""
+	files: list[tuple[str, str, float | None]] = []
+	subdirs: list[str] = []
+	try:
+		it = os.scandir(path)
+	except OSError:
+		return files, subdirs
+	with it:
+		for de in it:
+			# Directories first: album folders like "Live.mp3/" carry media extensions too
+			if de.is_dir(follow_symlinks=False):
+				if recursive and de.name[:1] != '.' and de.name not in _SCAN_SKIP_DIRS:
+					subdirs.append(de.path)
+				continue
+			stem, ext = os.path.splitext(de.name)
+			if ext.lower() in extensions and de.is_file():
+				mtime = None
+				if with_mtime:
+					try:
+						mtime = de.stat().st_mtime
+					except OSError:
+						mtime = 0.0
+				files.append((stem, de.path, mtime))
+	return files, subdirs
+
+
+def _iter_media_files(root: str | Path, extensions, recursive: bool = False, with_mtime: bool = True):
+	"""Yield (stem, abs_path, mtime) for media files under root via os.scandir (stack-based walk)."""
+	# Resolve the root once: DirEntry.path under a normalized absolute root is already absolute
+	stack = [os.path.abspath(root)]
+	while stack:
+		files, subdirs = _scan_media_dir(stack.pop(), extensions, recursive, with_mtime)
+		yield from files
+		stack.extend(subdirs)
+
+
+def _iter_media_files_parallel(root: str | Path, extensions, pool: ThreadPoolExecutor):
+	"""Recursive _iter_media_files with every directory listed on a pool thread (completion order)."""
+	pending = {pool.submit(_scan_media_dir, os.path.abspath(root), extensions, True)}
+	while pending:
+		done, pending = wait(pending, return_when=FIRST_COMPLETED)
+		for fut in done:
+			files, subdirs = fut.result()
+			# Queue the children before yielding so the workers stay busy meanwhile
+			pending.update(pool.submit(_scan_media_dir, d, extensions, True) for d in subdirs)
+			yield from files
+
+
 def build_archive_from_existing_files_optimized(download_dir: Path, container: str, archive_mgr: ArchiveManager) -> None:
 	"""Build archive from existing files using the optimized ArchiveManager."""
 	try:
-		extensions = expected_extensions(container)
+		extensions = expected_extension_set(container)
 		
 		added_count = 0
-		for file_path in download_dir.glob("*"):
-			if file_path.is_file() and file_path.suffix.lower() in extensions:
+		# Insert the whole batch under one lock acquisition
+		with archive_mgr._lock:
+			for stem, abs_path, mtime in _iter_media_files(download_dir, extensions):
 				# Generate a stable key for existing files
-				key = _stable_key_for_path(str(file_path.absolute()), container)
+				key = _stable_key_for_path(abs_path, container)
+				
+				# Migrate entries stored under the legacy blake2b key (one-time)
+				if key not in archive_mgr.data and xxhash is not None:
+					legacy_key = _legacy_stable_key_for_path(abs_path, container)
+					if legacy_key in archive_mgr.data:
+						archive_mgr.data[key] = archive_mgr.data.pop(legacy_key)
+						archive_mgr._unindex_title(legacy_key)
+						archive_mgr._index_title(key, archive_mgr.data[key])
+						archive_mgr._dirty = True
 				
 				# Check if already in archive
 				if key not in archive_mgr.data:
 					archive_mgr.data[key] = {
-						'id': file_path.stem,
+						'id': stem,
 						'extractor': 'local',
-						'title': file_path.stem,
+						'title': stem,
 						'format': container,
-						'file_path': str(file_path.absolute()),
-						'download_date': file_path.stat().st_mtime
+						'file_path': abs_path,
+						'download_date': mtime
 					}
+					archive_mgr._index_title(key, archive_mgr.data[key])
 					archive_mgr._dirty = True
 					added_count += 1
 		
@@ -697,9 +1294,6 @@ def build_archive_from_existing_files_optimized(download_dir: Path, container: s
 		print(f"    {C_WARN}Warning: Could not build archive from existing files: {e}{C_RESET}")
 
 
-
-
-
 def generate_m3u_for_playlist(info: dict, download_dir: Path, container: str) -> None:
 	"""Generate an .m3u file with original playlist order, including existing and newly downloaded tracks."""
 	entries = info.get("entries") or []
@@ -707,14 +1301,20 @@ def generate_m3u_for_playlist(info: dict, download_dir: Path, container: str) ->
 		return
 	ext = "mp3" if container == "mp3" else container
 
+	# One directory listing instead of a stat per playlist entry
+	try:
+		with os.scandir(download_dir) as it:
+			existing = {de.name for de in it if de.is_file()}
+	except OSError:
+		return
+
 	lines: list[str] = []
 	for entry in entries:
 		if not entry:
 			continue
 		title = entry.get("title") or "unknown"
 		fname = clean_title(title) + f".{ext}"
-		fpath = download_dir / fname
-		if fpath.exists():
+		if fname in existing:
 			# Write relative path for portability
 			lines.append(fname)
 
@@ -724,13 +1324,27 @@ def generate_m3u_for_playlist(info: dict, download_dir: Path, container: str) ->
 	m3u_name_source = info.get("playlist_title") or folder_name_from_info(info)
 	m3u_name = clean_title(m3u_name_source) + ".m3u"
 	try:
-		with (download_dir / m3u_name).open("w", encoding="utf-8") as f:
-			for line in lines:
-				f.write(line + "\n")
+		with (download_dir / m3u_name).open("w", encoding="utf-8", newline="\n") as f:
+			f.write("".join(line + "\n" for line in lines))
 	except Exception:
 		pass
 
 
+def _prune_thumb_cache(cache_dir: Path, ttl: float = _THUMB_CACHE_TTL) -> None:
+	"""Remove cached thumbnails older than ttl so the cache stays small."""
+	cutoff = time.time() - ttl
+	try:
+		with os.scandir(cache_dir) as it:
+			for de in it:
+				try:
+					if de.is_file() and de.stat().st_mtime < cutoff:
+						os.unlink(de.path)
+				except OSError:
+					pass
+	except OSError:
+		pass
+
+
 class SmartYoutubeDL(YoutubeDL):
 	"""Custom YoutubeDL class that uses JSON archive and copies existing files."""
 	
@@ -744,6 +1358,38 @@ class SmartYoutubeDL(YoutubeDL):
 		self.copied_count = 0
 		self._playlist_info: dict | None = None
 		self.archive = archive_mgr or ArchiveManager()
+		# Per target directory: file names present, listed once with os.scandir
+		self._target_index: dict[str, set[str]] = {}
+	
+	def _target_files(self, target_dir: Path) -> set[str]:
+		"""Memoized set of file names in a target directory."""
+		key = str(target_dir)
+		names = self._target_index.get(key)
+		if names is None:
+			try:
+				with os.scandir(target_dir) as it:
+					names = {de.name for de in it if de.is_file()}
+			except OSError:
+				names = set()
+			self._target_index[key] = names
+		return names
+	
+	def download_from_info(self, info: dict) -> int:
+		"""Download from an info dict extracted earlier in this run instead of extracting the URL again.
+		
+		yt-dlp re-runs format selection with this instance's options and falls back to the
+		webpage URL if the extracted media URLs no longer work.
+		"""
+		fd, info_path = tempfile.mkstemp(suffix=".info.json")
+		try:
+			with os.fdopen(fd, "wb") as f:
+				f.write(_json_dumps(YoutubeDL.sanitize_info(info)))
+			return self.download_with_info_file(info_path)
+		finally:
+			try:
+				os.unlink(info_path)
+			except OSError:
+				pass
 	
 	def __exit__(self, *args):
 		"""Ensure archive is saved when context manager exits."""
@@ -753,9 +1399,44 @@ class SmartYoutubeDL(YoutubeDL):
 		except Exception as e:
 			print(f"    {C_WARN}Warning: Could not save archive on exit: {e}{C_RESET}")
 		
+		if self.base_dir:
+			_prune_thumb_cache(Path(self.base_dir) / _THUMB_CACHE_DIRNAME)
+		
 		# Call parent's exit
 		return super().__exit__(*args)
 	
+	def _write_thumbnails(self, label, info_dict, filename, thumb_filename_base=None):
+		"""Reuse thumbnails already fetched for sibling tracks (e.g. album art) from the shared cache."""
+		thumbnails = info_dict.get('thumbnails') or []
+		best = thumbnails[-1] if thumbnails else {}
+		if (not self.base_dir or not filename or not best.get('url')
+				or not self.params.get('writethumbnail') or self.params.get('write_all_thumbnails')):
+			return super()._write_thumbnails(label, info_dict, filename, thumb_filename_base)
+		
+		# Same selection yt-dlp makes: best (last) thumbnail, named after the media file
+		thumb_ext = best.get('ext') or determine_ext(best['url'], 'jpg')
+		thumb_filename = replace_extension(filename, thumb_ext, info_dict.get('ext'))
+		cached = Path(self.base_dir) / _THUMB_CACHE_DIRNAME / f"{hashlib.sha1(best['url'].encode('utf-8')).hexdigest()}.{thumb_ext}"
+		
+		# A file already in place makes yt-dlp skip the fetch ("thumbnail is already present")
+		if cached.exists() and not os.path.exists(thumb_filename):
+			try:
+				os.makedirs(os.path.dirname(thumb_filename) or ".", exist_ok=True)
+				os.link(cached, thumb_filename)
+			except OSError:
+				pass  # Cross-device or unsupported - yt-dlp downloads it normally
+		
+		ret = super()._write_thumbnails(label, info_dict, filename, thumb_filename_base)
+		
+		# Seed the cache with a hardlink before EmbedThumbnail deletes the per-track copy
+		if ret and not cached.exists() and os.path.exists(thumb_filename):
+			try:
+				cached.parent.mkdir(parents=True, exist_ok=True)
+				os.link(thumb_filename, cached)
+			except OSError:
+				pass
+		return ret
+	
 	def process_info(self, info_dict):
 		"""Override to add archive checking and copy logic."""
 		# Check if this is a single video entry (not a playlist)
@@ -764,46 +1445,51 @@ class SmartYoutubeDL(YoutubeDL):
 			extractor = info_dict.get('extractor_key', info_dict.get('extractor', 'youtube'))
 			title = info_dict.get('title', 'unknown')
 			
-			# Show which item we're processing
-			print(f"  🎵 {C_DIM}Processing:{C_RESET} {title}")
+			# Hold this track's lines and write them as one block so --jobs workers don't interleave
+			with buffered_output():
+				# Show which item we're processing
+				print(f"  🎵 {C_DIM}Processing:{C_RESET} {title}")
 			
-			if video_id and extractor:
-				# Check if we have this in our archive for the specific format
-				archive_entry = self.archive.find(video_id, extractor, self.container, title)
-				if archive_entry:
-					print(f"    📋 {C_OK}Found in archive - skipping download{C_RESET}")
-					print(f"    {C_DIM}Archive location: {archive_entry['file_path']}{C_RESET}")
-					# Try to copy from archive
-					# Determine target directory (playlist folder if applicable)
+				if video_id and extractor:
+					# Determine target directory once (playlist folder if applicable)
 					target_dir = resolve_target_dir(self.base_dir, self.url, getattr(self, '_playlist_info', None))
-					
-					if optimized_copy_from_archive(archive_entry, target_dir, self.container):
-						self.copied_count += 1
-						return None  # Skip downloading
-					else:
-						print(f"    ⚠️  {C_WARN}Archive copy failed, will re-download{C_RESET}")
+					target_files = self._target_files(target_dir)
 				
-				# Check if file already exists in current directory
-				target_dir = resolve_target_dir(self.base_dir, self.url, getattr(self, '_playlist_info', None))
+					# Check if we have this in our archive for the specific format
+					archive_entry = self.archive.find(video_id, extractor, self.container, title)
+					if archive_entry:
+						print(f"    📋 {C_OK}Found in archive - skipping download{C_RESET}")
+						print(f"    {C_DIM}Archive location: {archive_entry['file_path']}{C_RESET}")
+						# Try to copy from archive
+						if optimized_copy_from_archive(archive_entry, target_dir, self.container):
+							target_files.add(archive_target_name(archive_entry, self.container))
+							self.copied_count += 1
+							return None  # Skip downloading
+						else:
+							print(f"    ⚠️  {C_WARN}Archive copy failed, will re-download{C_RESET}")
 				
-				if check_existing_file(target_dir, info_dict, self.container):
-					print(f"    ⏭️  {C_DIM}Skipping (file already exists locally){C_RESET}")
-					self.skipped_count += 1
-					return None  # Skip this video
+					# Check if file already exists in current directory
+					if check_existing_file(target_dir, info_dict, self.container, target_files):
+						print(f"    ⏭️  {C_DIM}Skipping (file already exists locally){C_RESET}")
+						self.skipped_count += 1
+						return None  # Skip this video
 			
-			# If we get here, we need to download
-			print(f"    📥 {C_DIM}Starting download...{C_RESET}")
+				# If we get here, we need to download
+				print(f"    📥 {C_DIM}Starting download...{C_RESET}")
 		
 		# Process normally (download)
 		result = super().process_info(info_dict)
 		
-		# If download was successful, add to archive
-		if result and info_dict.get('_type') != 'playlist':
+		# If download was successful, add to archive. Current yt-dlp returns None here and
+		# records the final (post-processed) path on the info dict instead
+		if (result or info_dict.get('filepath')) and info_dict.get('_type') != 'playlist':
 			self.downloaded_count += 1
-			title = info_dict.get('title', 'unknown')
-			print(f"    ✅ {C_OK}Successfully downloaded{C_RESET}")
-			self._add_successful_download_to_archive(info_dict)
+			with buffered_output():
+				print(f"    ✅ {C_OK}Successfully downloaded{C_RESET}")
+				self._add_successful_download_to_archive(info_dict)
 		
+		# New entries are already in the append log; only fold it into the JSON once it grows large
+		self.archive.compact_if_needed()
 		return result
 	
 	def _add_successful_download_to_archive(self, info_dict):
@@ -814,46 +1500,61 @@ class SmartYoutubeDL(YoutubeDL):
 			title = info_dict.get('title', 'unknown')
 			
 			if video_id and extractor and self.container and self.base_dir:
+				# yt-dlp knows the real final path (including its own renames); trust it when present
+				final_path = info_dict.get('filepath') or (info_dict.get('requested_downloads') or [{}])[-1].get('filepath')
+				if final_path:
+					final_path = Path(final_path)
+					names = self._target_index.get(str(final_path.parent))
+					if names is not None:
+						names.add(final_path.name)
+					self.archive.add(video_id, extractor, title, final_path, self.container)
+					return
+
 				# NEW: resolve the real target folder (playlist vs single) and then locate actual file
 				target_dir = resolve_target_dir(self.base_dir, self.url, getattr(self, '_playlist_info', None))
 				clean_title_str = clean_title(title)
 
-				file_path = None
+				# The download just created a file: refresh the memoized listing once,
+				# then match candidate names in memory instead of stat-ing each one
+				self._target_index.pop(str(target_dir), None)
+				names = self._target_files(target_dir)
 				if self.container == "mp3":
-					# Always .mp3
-					candidate = target_dir / f"{clean_title_str}.mp3"
-					if candidate.exists():
-						file_path = candidate
+					exts = (".mp3",)
 				elif self.container == "native":
-					# Probe native audio extensions (keep in sync with expected_extensions)
-					for ext in [".m4a", ".opus", ".webm", ".mp3", ".aac"]:
-						candidate = target_dir / f"{clean_title_str}{ext}"
-						if candidate.exists():
-							file_path = candidate
-							break
+					# Native audio extensions in preference order
+					exts = _NATIVE_AUDIO_EXTS
 				else:
-					# Video container (mp4/mkv) — prefer chosen container
-					candidate = target_dir / f"{clean_title_str}.{self.container}"
-					if not candidate.exists():
-						# Fallback to actual merged ext if yt-dlp decided otherwise
-						for ext in [".mp4", ".mkv", ".webm", ".avi"]:
-							alt = target_dir / f"{clean_title_str}{ext}"
-							if alt.exists():
-								candidate = alt
-								break
-					if candidate.exists():
-						file_path = candidate
-
-				if file_path and file_path.exists():
-					self.archive.add(video_id, extractor, title, file_path, self.container)
+					# Video container (mp4/mkv) — prefer chosen container, then whatever yt-dlp merged to
+					exts = (f".{self.container}",) + _VIDEO_EXTS
+				file_name = next((f"{clean_title_str}{ext}" for ext in exts if f"{clean_title_str}{ext}" in names), None)
+
+				if file_name:
+					self.archive.add(video_id, extractor, title, target_dir / file_name, self.container)
 		except Exception as e:
 			print(f"    {C_DIM}Note: Could not add to archive: {e}{C_RESET}")
 
 
-def ydl_opts_common(base_dir: Path, container: str, fmt_type: str, use_firefox_cookies: bool, fast_mode: bool = False, url: str = "", info: dict | None = None) -> dict:
+# FFmpeg postprocessor arguments shared by every options build
+_PP_ARGS_BASE = (
+	"-metadata", "comment=Downloaded with yt-dlp wrapper",
+	# VLC-friendly options to fix fast-forward issues
+	"-avoid_negative_ts", "make_zero",
+	"-fflags", "+discardcorrupt",
+)
+# Faststart equivalent for MKV seeking
+_PP_ARGS_MKV_EXTRA = ("-movflags", "+faststart")
+# Extra MP4 seeking fixes
+_PP_ARGS_MP4_EXTRA = (
+	"-movflags", "+faststart",
+	"-fflags", "+genpts",  # Generate presentation timestamps
+)
+
+
+def ydl_opts_common(base_dir: Path, container: str, fmt_type: str, use_firefox_cookies: bool, fast_mode: bool = False, url: str = "", info: dict | None = None, kind: UrlKind | None = None) -> dict:
 	is_audio = fmt_type == "audio"
+	kind = kind or classify_url(url)
 	opts: dict = {
-		"outtmpl": build_outtmpl(base_dir, is_audio, url, info),
+		"outtmpl": build_outtmpl(base_dir, is_audio, url, info, kind),
 		"restrictfilenames": False,
 		"windowsfilenames": True,
 		"noprogress": fast_mode,  # Reduce console writes in fast mode
@@ -865,17 +1566,12 @@ def ydl_opts_common(base_dir: Path, container: str, fmt_type: str, use_firefox_c
 		"writeinfojson": False,  # Disable individual JSON files
 		"writethumbnail": not fast_mode,  # Skip thumbnails in fast mode
 		"overwrites": False,
-		"extract_flat": "in_playlist" if ("playlist" in url.lower() or "list=" in url.lower()) else False,  # Reduce per-item overhead for playlists
+		"extract_flat": "in_playlist" if kind.is_playlist else False,  # Reduce per-item overhead for playlists
 		"lazy_playlist": True,  # Enable lazy playlist processing for faster startup
 		"playlistreverse": False,  # Ensure consistent playlist order
 		"progress_hooks": [lambda d: download_progress_hook(d, base_dir, container)],
-		"postprocessor_args": [
-			"-metadata", "comment=Downloaded with yt-dlp wrapper",
-			# VLC-friendly options to fix fast-forward issues
-			"-avoid_negative_ts", "make_zero",
-			"-fflags", "+discardcorrupt",
-		],
-		"logger": _YDLLogger(),
+		"postprocessor_args": list(_PP_ARGS_BASE),
+		"logger": _YDL_LOGGER_SINGLETON,
 		"socket_timeout": 15,          # don't sit forever on a bad socket
 		"extractor_retries": 3,        # retry different pathways
 		"nocheckcertificate": False,   # leave True only if you *need* it
@@ -931,8 +1627,7 @@ def ydl_opts_common(base_dir: Path, container: str, fmt_type: str, use_firefox_c
 			})
 			if not fast_mode:
 				video_postprocessors.append({"key": "EmbedThumbnail"})
-			# Add faststart equivalent for MKV seeking
-			opts["postprocessor_args"].extend(["-movflags", "+faststart"])
+			opts["postprocessor_args"] += _PP_ARGS_MKV_EXTRA
 		else:
 			# MP4: Max compatibility, but more finicky seeking
 			opts.update({
@@ -940,11 +1635,7 @@ def ydl_opts_common(base_dir: Path, container: str, fmt_type: str, use_firefox_c
 				"merge_output_format": "mp4",
 				"remux_video": "mp4",
 			})
-			# Extra MP4 seeking fixes
-			opts["postprocessor_args"].extend([
-				"-movflags", "+faststart",
-				"-fflags", "+genpts",  # Generate presentation timestamps
-			])
+			opts["postprocessor_args"] += _PP_ARGS_MP4_EXTRA
 		
 		video_postprocessors.append({
 			"key": "FFmpegVideoConvertor",
@@ -962,63 +1653,113 @@ def ydl_opts_common(base_dir: Path, container: str, fmt_type: str, use_firefox_c
 	return opts
 
 
-def download_urls(urls: list[str], base_dir: Path, container: str, fmt_type: str, force_firefox_cookies: bool, fast_mode: bool = False) -> int:
+def download_urls(urls: list[str], base_dir: Path, container: str, fmt_type: str, force_firefox_cookies: bool, fast_mode: bool = False, use_cache: bool = True, refresh_metadata: bool = False) -> int:
+	# Drop repeated URLs (common in --file lists) while keeping order - each would redo extraction
+	urls = list(dict.fromkeys(urls))
+	
 	# Check if any URLs are Liked Music - use immediate mode for better streaming
-	liked_music_urls = [url for url in urls if is_youtube_music_liked(url)]
-	regular_urls = [url for url in urls if not is_youtube_music_liked(url)]
+	liked_music_urls: list[str] = []
+	regular_urls: list[str] = []
+	for url in urls:
+		(liked_music_urls if classify_url(url).is_liked else regular_urls).append(url)
 	
 	total_ok = 0
+	# A mixed batch runs both modes - parse the archive once and share it between them
+	archive_mgr = ArchiveManager() if liked_music_urls and regular_urls else None
 	
 	# Process Liked Music URLs with immediate mode (no prepass)
 	if liked_music_urls:
 		print(f"\n🎵 {C_HEAD}Processing Liked Music URLs with streaming mode...{C_RESET}")
-		total_ok += download_immediate(liked_music_urls, base_dir, container, fmt_type, fast_mode)
+		total_ok += download_immediate(liked_music_urls, base_dir, container, fmt_type, fast_mode, use_cache, archive_mgr)
 	
 	# Process regular URLs with the existing logic (with prepass for better folder naming)
 	if regular_urls:
 		if liked_music_urls:
 			print(f"\n📁 {C_HEAD}Processing other URLs with info prepass...{C_RESET}")
-		total_ok += download_urls_with_prepass(regular_urls, base_dir, container, fmt_type, force_firefox_cookies, fast_mode)
+		total_ok += download_urls_with_prepass(regular_urls, base_dir, container, fmt_type, force_firefox_cookies, fast_mode, refresh_metadata, use_cache, archive_mgr)
 	
 	return total_ok
 
 
-def download_urls_with_prepass(urls: list[str], base_dir: Path, container: str, fmt_type: str, force_firefox_cookies: bool, fast_mode: bool = False) -> int:
-	total_ok = 0
+def _print_url_summary(ydl: SmartYoutubeDL) -> None:
+	"""Print the per-URL download/copy/skip summary as one buffered write."""
+	total_actions = ydl.downloaded_count + ydl.copied_count + ydl.skipped_count
 	
-	# Initialize archive manager once for all URLs
-	archive_mgr = ArchiveManager()
+	with buffered_output():
+		print(f"\n  📈 {C_HEAD}Summary for this URL:{C_RESET}")
+		if ydl.downloaded_count > 0:
+			print(f"    ✅ {C_OK}Downloaded (new files): {ydl.downloaded_count} file(s){C_RESET}")
+		if ydl.copied_count > 0:
+			print(f"    📋 {C_OK}Copied from archive (not downloaded): {ydl.copied_count} file(s){C_RESET}")
+		if ydl.skipped_count > 0:
+			print(f"    ⏭️  {C_DIM}Skipped (already exists locally): {ydl.skipped_count} file(s){C_RESET}")
+		
+		if total_actions > 0:
+			archive_efficiency = (ydl.copied_count / total_actions) * 100
+			if archive_efficiency > 0:
+				print(f"    🎯 {C_DIM}Archive efficiency: {archive_efficiency:.1f}% (avoided {ydl.copied_count} downloads){C_RESET}")
+			download_efficiency = (ydl.skipped_count / total_actions) * 100
+			if download_efficiency > 0:
+				print(f"    💾 {C_DIM}Already had locally: {download_efficiency:.1f}% ({ydl.skipped_count} files){C_RESET}")
+		
+		# Show total bandwidth/time saved
+		total_saved = ydl.copied_count + ydl.skipped_count
+		if total_saved > 0:
+			print(f"    🚀 {C_OK}Total files not downloaded: {total_saved}/{total_actions} ({(total_saved/total_actions)*100:.1f}%){C_RESET}")
+
+
+def _process_one_url(url: str, archive_mgr: ArchiveManager, base_dir: Path, container: str, fmt_type: str, force_firefox_cookies: bool, fast_mode: bool = False, refresh_metadata: bool = False, flat_cache: FlatCache | None = None) -> int:
+	"""Extract, download and summarize a single URL. Returns 1 on success, 0 otherwise."""
+	ok = 0
+	kind = classify_url(url)
+	print(f"\n{C_HEAD}➡ Processing: {url}{C_RESET}")
+	
+	# A recent playlist snapshot whose every track the archive can serve needs no extraction at all
+	snapshot = flat_cache.get(url) if (flat_cache is not None and kind.is_playlist and not refresh_metadata) else None
+	if snapshot is not None and snapshot[1]:
+		print(f"  🔍 {C_DIM}Checking archive against the last playlist snapshot...{C_RESET}")
+		if not fast_copy_from_archive(url, base_dir, container, archive_mgr, flat_cache):
+			print(f"  ✅ {C_OK}All items satisfied from archive - skipped playlist extraction{C_RESET}")
+			snap_info = {"_type": "playlist", "playlist_title": snapshot[0].get("playlist_title"), "entries": snapshot[1]}
+			try:
+				generate_m3u_for_playlist(snap_info, resolve_target_dir(base_dir, url, snap_info), container)
+			except Exception as e:
+				print(f"    {C_DIM}Note: Could not generate M3U file: {e}{C_RESET}")
+			return 1
+	print(f"  🔍 {C_DIM}Extracting playlist information...{C_RESET}")
+	
+	info = None
+	is_playlist = False
+	# Extracted during this run (not from the metadata cache), so its media URLs are still valid
+	fresh_info = False
 	
-	# Build archive from existing files in the download directory
 	try:
-		build_archive_from_existing_files_optimized(base_dir, container, archive_mgr)
-	except Exception as e:
-		print(f"    {C_WARN}Warning: Could not build archive from existing files: {e}{C_RESET}")
-
-	for url in urls:
-		print(f"\n{C_HEAD}➡ Processing: {url}{C_RESET}")
-		print(f"  🔍 {C_DIM}Extracting playlist information...{C_RESET}")
-		
-		info = None
-		is_playlist = False
+		# Set up temporary extractor with cookies if needed
+		temp_opts = {
+			"quiet": False,               # <-- turn quiet OFF so we can see progress
+			"no_warnings": False,
+			"logger": _YDL_LOGGER_SINGLETON,
+			"socket_timeout": 15,
+			"extractor_retries": 3,
+		}
 		
-		try:
-			# Set up temporary extractor with cookies if needed
-			temp_opts = {
-				"quiet": False,               # <-- turn quiet OFF so we can see progress
-				"no_warnings": False,
-				"logger": _YDLLogger(),
-				"socket_timeout": 15,
-				"extractor_retries": 3,
-			}
-			
-			# Check if we need Firefox cookies for this URL
-			use_cookies_for_info = force_firefox_cookies or is_youtube_music_liked(url)
-			if use_cookies_for_info:
-				print(f"  🍪 {C_DIM}Loading Firefox cookies for authentication...{C_RESET}")
-				temp_opts["cookiesfrombrowser"] = ("firefox", None, None, None)
-			
-			# First, extract info to determine if it's a playlist and get metadata
+		# Check if we need Firefox cookies for this URL
+		use_cookies_for_info = force_firefox_cookies or kind.is_liked
+		if use_cookies_for_info:
+			print(f"  🍪 {C_DIM}Loading Firefox cookies for authentication...{C_RESET}")
+			temp_opts["cookiesfrombrowser"] = ("firefox", None, None, None)
+		
+		# First, extract info to determine if it's a playlist and get metadata
+		info = None if refresh_metadata else _get_cached_info(url)
+		# Cached playlist info names the folder and the M3U - only trust it while the
+		# (cheap, flat) listing still shows the same title and tracks
+		if info is not None and (info.get("_type") == "playlist" or info.get("entries")):
+			if not _playlist_unchanged(info, *flat_entries(url, use_cookies_for_info, flat_cache)):
+				print(f"  🔄 {C_DIM}Playlist changed since it was cached - re-extracting...{C_RESET}")
+				info = None
+		if info is not None:
+			print(f"  ⚡ {C_OK}Using cached playlist information (--refresh-metadata to re-fetch){C_RESET}")
+		else:
 			print(f"  📊 {C_DIM}Connecting to YouTube Music...{C_RESET}")
 			try:
 				temp_ydl = YoutubeDL(temp_opts)
@@ -1027,44 +1768,51 @@ def download_urls_with_prepass(urls: list[str], base_dir: Path, container: str,
 				print(f"  ⏳ {C_DIM}This may take 10-30 seconds for large playlists...{C_RESET}")
 				
 				info = temp_ydl.extract_info(url, download=False)
+				fresh_info = isinstance(info, dict) and bool(info.get("webpage_url"))
 				print(f"  ✅ {C_OK}Successfully extracted playlist information!{C_RESET}")
-				
+				_put_cached_info(url, info)
+				# Snapshot the track list so an unchanged playlist can skip extraction next time
+				if flat_cache is not None and isinstance(info, dict) and info.get("entries"):
+					flat_cache.put(url, info, info["entries"])
+			
 			except Exception as extract_error:
 				print(f"  ❌ {C_WARN}Connection failed: {str(extract_error)[:100]}{'...' if len(str(extract_error)) > 100 else ''}{C_RESET}")
 				raise extract_error
+		
+		# Determine if this is a playlist
+		is_playlist = isinstance(info, dict) and (info.get("_type") == "playlist" or info.get("entries"))
+		
+		if is_playlist and info:
+			print(f"  🎵 {C_HEAD}Playlist detected:{C_RESET} {info.get('playlist_title', 'Unknown Playlist')}")
+			print(f"  📊 {C_DIM}Contains {len(info.get('entries', []))} items{C_RESET}")
+			print(f"  📁 {C_DIM}Preparing download folder structure...{C_RESET}")
+		else:
+			print(f"  🎬 {C_HEAD}Single video detected{C_RESET}")
+		
+		# Build options with playlist info
+		print(f"  ⚙️  {C_DIM}Configuring download options...{C_RESET}")
+		opts = ydl_opts_common(base_dir, container, fmt_type, force_firefox_cookies, fast_mode, url, info if is_playlist else None, kind)
+		
+	except Exception as e:
+		print(f"  ⚠️  {C_WARN}Initial info extraction failed: {e}{C_RESET}")
+		print(f"  🔄 {C_DIM}Will extract playlist info during download...{C_RESET}")
+		# Fallback to basic options, let yt-dlp handle playlist detection during download
+		try:
+			# Make educated guess about playlist status from URL
+			is_playlist = kind.is_playlist
 			
-			# Determine if this is a playlist
-			is_playlist = isinstance(info, dict) and (info.get("_type") == "playlist" or info.get("entries"))
-			
-			if is_playlist and info:
-				print(f"  🎵 {C_HEAD}Playlist detected:{C_RESET} {info.get('playlist_title', 'Unknown Playlist')}")
-				print(f"  📊 {C_DIM}Contains {len(info.get('entries', []))} items{C_RESET}")
-				print(f"  📁 {C_DIM}Preparing download folder structure...{C_RESET}")
+			if is_playlist:
+				print(f"  🎵 {C_HEAD}Playlist detected from URL - folder will be named from playlist title{C_RESET}")
+				# Don't pass mock info - let yt-dlp's template system handle it
+				opts = ydl_opts_common(base_dir, container, fmt_type, force_firefox_cookies, fast_mode, url, None, kind)
 			else:
-				print(f"  🎬 {C_HEAD}Single video detected{C_RESET}")
-			
-			# Build options with playlist info
-			print(f"  ⚙️  {C_DIM}Configuring download options...{C_RESET}")
-			opts = ydl_opts_common(base_dir, container, fmt_type, force_firefox_cookies, fast_mode, url, info if is_playlist else None)
-			
-		except Exception as e:
-			print(f"  ⚠️  {C_WARN}Initial info extraction failed: {e}{C_RESET}")
-			print(f"  🔄 {C_DIM}Will extract playlist info during download...{C_RESET}")
-			# Fallback to basic options, let yt-dlp handle playlist detection during download
-			try:
-				# Make educated guess about playlist status from URL
-				is_playlist = ("playlist" in url.lower() or "list=" in url)
-				
-				if is_playlist:
-					print(f"  🎵 {C_HEAD}Playlist detected from URL - folder will be named from playlist title{C_RESET}")
-					# Don't pass mock info - let yt-dlp's template system handle it
-					opts = ydl_opts_common(base_dir, container, fmt_type, force_firefox_cookies, fast_mode, url, None)
-				else:
-					opts = ydl_opts_common(base_dir, container, fmt_type, force_firefox_cookies, fast_mode, url)
-			except Exception as e2:
-				print(f"    {C_ERR}Error setting up download options: {e2}{C_RESET}")
-				continue
-		
+				opts = ydl_opts_common(base_dir, container, fmt_type, force_firefox_cookies, fast_mode, url, kind=kind)
+		except Exception as e2:
+			print(f"    {C_ERR}Error setting up download options: {e2}{C_RESET}")
+			return ok
+	
+	# Extraction runs ahead on the worker pool, but downloads take turns
+	with _download_turn():
 		print(f"  🚀 {C_OK}Starting download process...{C_RESET}")
 		
 		# Use our custom YoutubeDL class that uses JSON archive and copies files
@@ -1082,7 +1830,7 @@ def download_urls_with_prepass(urls: list[str], base_dir: Path, container: str,
 			
 			try:
 				# Auto-use cookies if it's a YT Music Liked URL
-				if not force_firefox_cookies and is_youtube_music_liked(url):
+				if not force_firefox_cookies and kind.is_liked:
 					print(f"  🍪 {C_WARN}Auto-enabling Firefox cookies for Liked Music.{C_RESET}")
 					ydl.params["cookiesfrombrowser"] = ("firefox", None, None, None)
 				
@@ -1094,36 +1842,15 @@ def download_urls_with_prepass(urls: list[str], base_dir: Path, container: str,
 				print(f"  🎯 {C_DIM}Checking archive for existing files...{C_RESET}")
 				print(f"  📥 {C_OK}Beginning download/copy process...{C_RESET}")
 				
-				# Download with smart archive checking and copying
-				res = ydl.download([url])
-				
-				# Report results with better feedback
-				total_actions = ydl.downloaded_count + ydl.copied_count + ydl.skipped_count
-				
-				print(f"\n  📈 {C_HEAD}Summary for this URL:{C_RESET}")
-				if ydl.downloaded_count > 0:
-					print(f"    ✅ {C_OK}Downloaded (new files): {ydl.downloaded_count} file(s){C_RESET}")
-				if ydl.copied_count > 0:
-					print(f"    📋 {C_OK}Copied from archive (not downloaded): {ydl.copied_count} file(s){C_RESET}")
-				if ydl.skipped_count > 0:
-					print(f"    ⏭️  {C_DIM}Skipped (already exists locally): {ydl.skipped_count} file(s){C_RESET}")
+				# Download with smart archive checking and copying; fresh prepass info
+				# is handed over directly so yt-dlp does not extract every entry twice
+				res = ydl.download_from_info(info) if fresh_info else ydl.download([url])
 				
-				if total_actions > 0:
-					archive_efficiency = (ydl.copied_count / total_actions) * 100
-					if archive_efficiency > 0:
-						print(f"    🎯 {C_DIM}Archive efficiency: {archive_efficiency:.1f}% (avoided {ydl.copied_count} downloads){C_RESET}")
-					download_efficiency = (ydl.skipped_count / total_actions) * 100
-					if download_efficiency > 0:
-						print(f"    💾 {C_DIM}Already had locally: {download_efficiency:.1f}% ({ydl.skipped_count} files){C_RESET}")
-				
-				# Show total bandwidth/time saved
-				total_saved = ydl.copied_count + ydl.skipped_count
-				if total_saved > 0:
-					print(f"    🚀 {C_OK}Total files not downloaded: {total_saved}/{total_actions} ({(total_saved/total_actions)*100:.1f}%){C_RESET}")
+				_print_url_summary(ydl)
 				
 				# ydl.download returns 0 on success
 				if res == 0:
-					total_ok += 1
+					ok = 1
 				else:
 					print(f"    ⚠ {C_WARN}Download completed with warnings for: {url}{C_RESET}")
 					
@@ -1144,7 +1871,7 @@ def download_urls_with_prepass(urls: list[str], base_dir: Path, container: str,
 			except Exception as e:
 				# Check if we should retry with cookies for private playlists
 				if (not force_firefox_cookies and 
-				    not is_youtube_music_liked(url) and 
+				    not kind.is_liked and 
 				    should_retry_with_cookies(str(e), url)):
 					
 					print(f"  🔒 {C_WARN}Download failed - playlist may be private/restricted{C_RESET}")
@@ -1172,33 +1899,11 @@ def download_urls_with_prepass(urls: list[str], base_dir: Path, container: str,
 							print(f"  🍪 {C_OK}Authenticated successfully - resuming download...{C_RESET}")
 							res = ydl_with_cookies.download([url])
 							
-							# Report results with better feedback
-							total_actions = ydl_with_cookies.downloaded_count + ydl_with_cookies.copied_count + ydl_with_cookies.skipped_count
-							
-							print(f"\n  📈 {C_HEAD}Summary for this URL:{C_RESET}")
-							if ydl_with_cookies.downloaded_count > 0:
-								print(f"    ✅ {C_OK}Downloaded (new files): {ydl_with_cookies.downloaded_count} file(s){C_RESET}")
-							if ydl_with_cookies.copied_count > 0:
-								print(f"    📋 {C_OK}Copied from archive (not downloaded): {ydl_with_cookies.copied_count} file(s){C_RESET}")
-							if ydl_with_cookies.skipped_count > 0:
-								print(f"    ⏭️  {C_DIM}Skipped (already exists locally): {ydl_with_cookies.skipped_count} file(s){C_RESET}")
-							
-							if total_actions > 0:
-								archive_efficiency = (ydl_with_cookies.copied_count / total_actions) * 100
-								if archive_efficiency > 0:
-									print(f"    🎯 {C_DIM}Archive efficiency: {archive_efficiency:.1f}% (avoided {ydl_with_cookies.copied_count} downloads){C_RESET}")
-								download_efficiency = (ydl_with_cookies.skipped_count / total_actions) * 100
-								if download_efficiency > 0:
-									print(f"    💾 {C_DIM}Already had locally: {download_efficiency:.1f}% ({ydl_with_cookies.skipped_count} files){C_RESET}")
-							
-							# Show total bandwidth/time saved
-							total_saved = ydl_with_cookies.copied_count + ydl_with_cookies.skipped_count
-							if total_saved > 0:
-								print(f"    🚀 {C_OK}Total files not downloaded: {total_saved}/{total_actions} ({(total_saved/total_actions)*100:.1f}%){C_RESET}")
+							_print_url_summary(ydl_with_cookies)
 							
 							# Download successful
 							if res == 0:
-								total_ok += 1
+								ok = 1
 								print(f"  ✅ {C_OK}Authentication retry successful!{C_RESET}")
 							else:
 								print(f"    ⚠ {C_WARN}Download completed with warnings for: {url}{C_RESET}")
@@ -1215,21 +1920,58 @@ def download_urls_with_prepass(urls: list[str], base_dir: Path, container: str,
 									print(f"    {C_DIM}Note: Could not generate M3U file: {m3u_error}{C_RESET}")
 							
 							# Continue to next URL after successful retry
-							continue
+							return ok
 							
 					except Exception as retry_error:
 						print(f"  ❌ {C_ERR}Retry with cookies also failed: {retry_error}{C_RESET}")
 						print(f"    ✗ {C_ERR}Error downloading {url}: {e}{C_RESET}")
 						# Continue with other URLs even if retry fails
-						continue
+						return ok
 				else:
 					# Original error, no retry needed
 					print(f"    ✗ {C_ERR}Error downloading {url}: {e}{C_RESET}")
 					# Continue with other URLs even if one fails
-					continue
+					return ok
 	
-	# Save archive once at the end
+	return ok
+
+
+def download_urls_with_prepass(urls: list[str], base_dir: Path, container: str, fmt_type: str, force_firefox_cookies: bool, fast_mode: bool = False, refresh_metadata: bool = False, use_cache: bool = True, archive_mgr: ArchiveManager | None = None) -> int:
+	# Initialize archive manager (and playlist snapshot cache) once for all URLs
+	archive_mgr = archive_mgr or ArchiveManager()
+	flat_cache = FlatCache() if use_cache else None
+	
+	# Build archive from existing files in the download directory
+	try:
+		build_archive_from_existing_files_optimized(base_dir, container, archive_mgr)
+	except Exception as e:
+		print(f"    {C_WARN}Warning: Could not build archive from existing files: {e}{C_RESET}")
+
+	total_ok = 0
+	if len(urls) <= 1:
+		for url in urls:
+			total_ok += _process_one_url(url, archive_mgr, base_dir, container, fmt_type, force_firefox_cookies, fast_mode, refresh_metadata, flat_cache)
+	else:
+		# URLs are I/O bound (extraction + network), so overlap them across a small pool
+		pool = ThreadPoolExecutor(max_workers=min(_MAX_URL_WORKERS, len(urls)))
+		futures = [pool.submit(_process_one_url, url, archive_mgr, base_dir, container, fmt_type, force_firefox_cookies, fast_mode, refresh_metadata, flat_cache) for url in urls]
+		try:
+			for fut in as_completed(futures):
+				total_ok += fut.result()
+		except KeyboardInterrupt:
+			# Stop queued URLs and make running downloads bail out at their next progress tick
+			_cancel_event.set()
+			for fut in futures:
+				fut.cancel()
+			raise
+		finally:
+			pool.shutdown(wait=True)
+			_cancel_event.clear()
+	
+	# Save archive and playlist snapshots once at the end
 	archive_mgr.save()
+	if flat_cache is not None:
+		flat_cache.save()
 	return total_ok
 
 
@@ -1248,10 +1990,17 @@ def show_help() -> None:
   {C_ASK}--non-interactive{C_RESET}         Auto-confirm prompts (for scripts/scheduled tasks)
   {C_ASK}--outdir{C_RESET} PATH             Output directory (default: current directory)
   {C_ASK}--firefox-cookies{C_RESET}         Use Firefox cookies for authentication
+  {C_ASK}--no-cache{C_RESET}                Re-fetch playlist listings instead of using the 6h cache
+  {C_ASK}--refresh-metadata{C_RESET}        Re-extract playlist information instead of using the 24h cache
   {C_ASK}--file{C_RESET} FILE               Read URLs from text file (one per line)
   {C_ASK}--load{C_RESET} DIRECTORY          Scan directory and add existing files to archive
+  {C_ASK}--rebuild{C_RESET}                 With --load: replace the archive with the scan results
+  {C_ASK}--jobs{C_RESET} N                  With --load: scan folders on N threads (network/cloud drives)
   {C_ASK}--show-archive{C_RESET}            Display archive information
-  {C_ASK}--backup{C_RESET}                  Create backup of download archive
+  {C_ASK}--backup{C_RESET} [--deep]         Create backup of download archive
+                            (--deep forces an independent copy)
+  {C_ASK}--clear-metadata-cache{C_RESET}    Delete cached playlist information
+  {C_ASK}--pretty{C_RESET}                  Write the archive file indented (human-readable)
   {C_ASK}--clear{C_RESET} [OPTIONS]         Clear archive entries:
                             all              - Clear entire archive
                             NAME             - Clear entries matching name
@@ -1317,12 +2066,18 @@ def parse_args(argv: list[str]) -> dict:
 	#   --non-interactive         (auto-confirm prompts)
 	#   --outdir <path>
 	#   --firefox-cookies
+	#   --no-cache                (bypass cached flat playlist listings)
+	#   --refresh-metadata        (bypass cached extract_info results)
 	#   --load <directory>        (scan directory and add files to archive)
+	#   --rebuild                 (with --load: re-index from scratch)
+	#   --jobs <n>                (with --load: parallel directory scan)
 	#   --file <file>             (load URLs from text file)
 	#   --show-archive
-	#   --backup                  (backup archive)
+	#   --backup [--deep]         (backup archive; --deep copies instead of hardlinking)
+	#   --clear-metadata-cache    (delete cached extract_info results)
 	#   --clear [all|<name>|<from_date> [to_date]]
 	#   --debug                   (enable debug output)
+	#   --pretty                  (write the archive JSON indented)
 	#   <urls...>
 	args = {
 		"help": False,
@@ -1331,12 +2086,19 @@ def parse_args(argv: list[str]) -> dict:
 		"non_interactive": False,
 		"outdir": None,
 		"firefox_cookies": False,
+		"no_cache": False,
+		"refresh_metadata": False,
 		"load_directory": None,
+		"rebuild": False,
+		"jobs": 1,
 		"file_path": None,
 		"show_archive": False,
 		"backup": False,
+		"deep": False,
+		"clear_metadata_cache": False,
 		"clear": [],
 		"debug": False,
+		"pretty": False,
 		"urls": [],
 	}
 	
@@ -1362,9 +2124,24 @@ def parse_args(argv: list[str]) -> dict:
 		elif tok == "--firefox-cookies":
 			args["firefox_cookies"] = True
 			i += 1
+		elif tok == "--no-cache":
+			args["no_cache"] = True
+			i += 1
+		elif tok == "--refresh-metadata":
+			args["refresh_metadata"] = True
+			i += 1
 		elif tok == "--load" and i + 1 < n:
 			args["load_directory"] = argv[i + 1]
 			i += 2
+		elif tok == "--rebuild":
+			args["rebuild"] = True
+			i += 1
+		elif tok == "--jobs" and i + 1 < n:
+			try:
+				args["jobs"] = max(1, int(argv[i + 1]))
+			except ValueError:
+				pass  # keep the serial default
+			i += 2
 		elif tok == "--file" and i + 1 < n:
 			args["file_path"] = argv[i + 1]
 			i += 2
@@ -1374,9 +2151,18 @@ def parse_args(argv: list[str]) -> dict:
 		elif tok == "--backup":
 			args["backup"] = True
 			i += 1
+		elif tok == "--deep":
+			args["deep"] = True
+			i += 1
+		elif tok == "--clear-metadata-cache":
+			args["clear_metadata_cache"] = True
+			i += 1
 		elif tok == "--debug":
 			args["debug"] = True
 			i += 1
+		elif tok == "--pretty":
+			args["pretty"] = True
+			i += 1
 		elif tok == "--clear":
 			i += 1
 			clear_args = []
@@ -1394,16 +2180,44 @@ def parse_args(argv: list[str]) -> dict:
 	return args
 
 
-def backup_archive() -> bool:
-	"""Create a backup of the current archive."""
+def backup_archive(deep: bool = False) -> bool:
+	"""Create a backup of the current archive (a hardlink unless deep=True)."""
 	try:
+		# Fold any pending append-log entries into the JSON so the backup is complete
+		ArchiveManager().save()
 		archive_path = get_appdata_archive_path()
 		if not archive_path.exists():
 			print(C_WARN + "No archive file found to backup." + C_RESET)
 			return False
 		
 		backup_path = archive_path.parent / "download_archive_backup.json"
-		shutil.copy2(archive_path, backup_path)
+		# Build the new backup under a temp name and swap it in, so a failed
+		# link/copy leaves the previous backup untouched
+		tmp_path = backup_path.with_name(backup_path.name + ".tmp")
+		try:
+			tmp_path.unlink()
+		except FileNotFoundError:
+			pass
+		
+		# save() always swaps in a new file via os.replace, so a hardlink keeps
+		# pointing at this snapshot - no data needs to be copied
+		linked = False
+		try:
+			if not deep:
+				try:
+					os.link(archive_path, tmp_path)
+					linked = True
+				except OSError:
+					pass  # Filesystem without hardlinks - fall back to a real copy
+			if not linked:
+				shutil.copy2(archive_path, tmp_path)
+			os.replace(tmp_path, backup_path)
+		except BaseException:
+			try:
+				tmp_path.unlink()
+			except OSError:
+				pass
+			raise
 		
 		print(C_OK + f"✓ Archive backed up to: {backup_path}" + C_RESET)
 		return True
@@ -1420,12 +2234,9 @@ def clear_archive_by_name(search_term: str) -> int:
 			print(C_WARN + "Archive is empty." + C_RESET)
 			return 0
 		
-		# Find matching entries
-		matches = []
-		for key, entry in archive_mgr.data.items():
-			title = entry.get('title', '').lower()
-			if search_term.lower() in title:
-				matches.append((key, entry))
+		# Find matching entries (lowercase the needle once, not per entry)
+		needle = search_term.lower()
+		matches = [(key, entry) for key, entry in archive_mgr.data.items() if needle in entry.get('title', '').lower()]
 		
 		if not matches:
 			print(C_WARN + f"No entries found matching '{search_term}'." + C_RESET)
@@ -1460,37 +2271,64 @@ def clear_archive_by_name(search_term: str) -> int:
 		return 0
 
 
-def parse_date_input(date_str: str) -> datetime | None:
+# Absolute date formats accepted by parse_date_input
+_DATE_FORMATS: tuple[str, ...] = (
+	"%Y-%m-%d",           # 2023-12-25
+	"%Y/%m/%d",           # 2023/12/25
+	"%m/%d/%Y",           # 12/25/2023
+	"%d/%m/%Y",           # 25/12/2023
+	"%Y-%m-%d %H:%M",     # 2023-12-25 14:30
+	"%Y-%m-%d %H:%M:%S",  # 2023-12-25 14:30:45
+)
+# Zero-padded input shapes, keyed on (length, 5th char), mapped to the format that fits
+_DATE_DISPATCH: dict[tuple[int, str], tuple[str, ...]] = {
+	(10, "-"): ("%Y-%m-%d",),
+	(10, "/"): ("%Y/%m/%d",),
+	(16, "-"): ("%Y-%m-%d %H:%M",),
+	(19, "-"): ("%Y-%m-%d %H:%M:%S",),
+}
+# Only inputs of exactly this shape (digits zeroed, truncated to length) take the fromisoformat path
+_ISO_SHAPE = "0000-00-00 00:00:00"
+_DIGITS_TO_ZERO = str.maketrans("123456789", "000000000")
+_DAY_MONTH_FORMATS = ("%m/%d/%Y", "%d/%m/%Y")  # "12/25/2023" style, US order first
+_MIDNIGHT = {"hour": 0, "minute": 0, "second": 0, "microsecond": 0}
+# Relative keywords, checked in order: (needle, now -> datetime)
+_RELATIVE_DATES = (
+	("today", lambda now: now.replace(**_MIDNIGHT)),
+	("yesterday", lambda now: (now - timedelta(days=1)).replace(**_MIDNIGHT)),
+	("week", lambda now: now - timedelta(weeks=1)),
+	("month", lambda now: now - timedelta(days=30)),
+)
+
+
+def parse_date_input(date_str: str, now: datetime | None = None) -> datetime | None:
 	"""Parse various date formats into datetime object."""
 	try:
-		# Try different date formats
-		formats = [
-			"%Y-%m-%d",           # 2023-12-25
-			"%Y/%m/%d",           # 2023/12/25
-			"%m/%d/%Y",           # 12/25/2023
-			"%d/%m/%Y",           # 25/12/2023
-			"%Y-%m-%d %H:%M",     # 2023-12-25 14:30
-			"%Y-%m-%d %H:%M:%S",  # 2023-12-25 14:30:45
-		]
-		
-		for fmt in formats:
-			try:
-				return datetime.strptime(date_str, fmt)
-			except ValueError:
-				continue
+		# Every absolute format starts with a digit - skip strptime entirely for "last week" etc.
+		if date_str[:1].isdigit():
+			if date_str[2:3] == "/":
+				likely = _DAY_MONTH_FORMATS
+			else:
+				likely = _DATE_DISPATCH.get((len(date_str), date_str[4:5]), ())
+				# Exact dashed shapes: C-level fromisoformat, no format-string parsing at all
+				# (anything else, e.g. week dates or UTC offsets, must not reach fromisoformat)
+				if likely and date_str.translate(_DIGITS_TO_ZERO) == _ISO_SHAPE[:len(date_str)]:
+					try:
+						return datetime.fromisoformat(date_str)
+					except ValueError:
+						pass
+			# Common shapes hit on the first try; anything else (e.g. unpadded) falls back to the full list
+			for fmt in likely + tuple(f for f in _DATE_FORMATS if f not in likely):
+				try:
+					return datetime.strptime(date_str, fmt)
+				except ValueError:
+					continue
 		
 		# Try relative dates
 		date_str_lower = date_str.lower()
-		now = datetime.now()
-		
-		if "today" in date_str_lower:
-			return now.replace(hour=0, minute=0, second=0, microsecond=0)
-		elif "yesterday" in date_str_lower:
-			return (now - timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
-		elif "week" in date_str_lower:
-			return now - timedelta(weeks=1)
-		elif "month" in date_str_lower:
-			return now - timedelta(days=30)
+		for needle, resolve in _RELATIVE_DATES:
+			if needle in date_str_lower:
+				return resolve(now or datetime.now())
 		
 		return None
 	except Exception:
@@ -1505,7 +2343,8 @@ def clear_archive_by_date(from_date_str: str, to_date_str: str | None = None) ->
 			print(C_WARN + "Archive is empty." + C_RESET)
 			return 0
 		
-		from_date = parse_date_input(from_date_str)
+		now = datetime.now()
+		from_date = parse_date_input(from_date_str, now)
 		if not from_date:
 			print(C_ERR + f"Invalid date format: {from_date_str}" + C_RESET)
 			print(C_DIM + "Try formats like: 2023-12-25, 12/25/2023, 'last week', 'last month'" + C_RESET)
@@ -1513,24 +2352,24 @@ def clear_archive_by_date(from_date_str: str, to_date_str: str | None = None) ->
 		
 		to_date = None
 		if to_date_str:
-			to_date = parse_date_input(to_date_str)
+			to_date = parse_date_input(to_date_str, now)
 			if not to_date:
 				print(C_ERR + f"Invalid date format: {to_date_str}" + C_RESET)
 				return 0
 		else:
-			to_date = datetime.now()
+			to_date = now
 		
-		# Find matching entries
+		# Find matching entries by comparing raw timestamps - datetimes are only built for the rows shown
+		from_ts = from_date.timestamp()
+		to_ts = to_date.timestamp()
 		matches = []
 		for key, entry in archive_mgr.data.items():
 			try:
 				download_date = float(entry.get('download_date', 0))
-				entry_date = datetime.fromtimestamp(download_date)
-				
-				if from_date <= entry_date <= to_date:
-					matches.append((key, entry, entry_date))
-			except (ValueError, TypeError, OSError):
+			except (ValueError, TypeError):
 				continue
+			if from_ts <= download_date <= to_ts:
+				matches.append((key, entry, download_date))
 		
 		if not matches:
 			print(C_WARN + f"No entries found between {from_date.strftime('%Y-%m-%d')} and {to_date.strftime('%Y-%m-%d')}." + C_RESET)
@@ -1538,10 +2377,10 @@ def clear_archive_by_date(from_date_str: str, to_date_str: str | None = None) ->
 		
 		# Show matches and confirm
 		print(C_HEAD + f"Found {len(matches)} entries between {from_date.strftime('%Y-%m-%d')} and {to_date.strftime('%Y-%m-%d')}:" + C_RESET)
-		for i, (key, entry, entry_date) in enumerate(matches[:10], 1):  # Show first 10
+		for i, (key, entry, download_date) in enumerate(matches[:10], 1):  # Show first 10
 			title = entry.get('title', 'Unknown')
 			fmt = entry.get('format', 'unknown')
-			date_str = entry_date.strftime('%Y-%m-%d')
+			date_str = datetime.fromtimestamp(download_date).strftime('%Y-%m-%d')
 			print(f"  {i}. {title} ({fmt}) - {date_str}")
 		
 		if len(matches) > 10:
@@ -1637,42 +2476,62 @@ def show_archive_info() -> None:
 	print(f"  Total entries: {C_DIM}{len(archive_mgr.data)}{C_RESET}")
 	
 	if archive_mgr.data:
-		mp3_count = sum(1 for entry in archive_mgr.data.values() if entry.get('format') == 'mp3')
-		mp4_count = sum(1 for entry in archive_mgr.data.values() if entry.get('format') == 'mp4')
-		mkv_count = sum(1 for entry in archive_mgr.data.values() if entry.get('format') == 'mkv')
-		native_count = sum(1 for entry in archive_mgr.data.values() if entry.get('format') == 'native')
-		local_count = sum(1 for entry in archive_mgr.data.values() if entry.get('extractor') == 'local')
-		
-		print(f"  MP3 files: {C_DIM}{mp3_count}{C_RESET}")
-		print(f"  MP4 files: {C_DIM}{mp4_count}{C_RESET}")
-		print(f"  MKV files: {C_DIM}{mkv_count}{C_RESET}")
-		print(f"  Native files: {C_DIM}{native_count}{C_RESET}")
+		# Tally formats and local entries in a single pass over the archive
+		formats: Counter[str] = Counter()
+		local_count = 0
+		for entry in archive_mgr.data.values():
+			formats[entry.get('format')] += 1
+			if entry.get('extractor') == 'local':
+				local_count += 1
+		
+		print(f"  MP3 files: {C_DIM}{formats['mp3']}{C_RESET}")
+		print(f"  MP4 files: {C_DIM}{formats['mp4']}{C_RESET}")
+		print(f"  MKV files: {C_DIM}{formats['mkv']}{C_RESET}")
+		print(f"  Native files: {C_DIM}{formats['native']}{C_RESET}")
 		print(f"  Local files: {C_DIM}{local_count}{C_RESET}")
 
 
+_URL_SCHEMES = ('http://', 'https://')
+
+
 def load_urls_from_file(file_path: str) -> list[str]:
 	"""Load URLs from a text file, one per line."""
+	urls = []
 	try:
-		with open(file_path, 'r', encoding='utf-8') as f:
-			urls = []
+		# Large read buffer: URL lists can run to many thousands of lines
+		with open(file_path, 'r', encoding='utf-8', buffering=1 << 16) as f:
 			for line_num, line in enumerate(f, 1):
 				line = line.strip()
 				if line and not line.startswith('#'):  # Skip empty lines and comments
-					if line.startswith(('http://', 'https://')):
+					if line.startswith(_URL_SCHEMES):
 						urls.append(line)
 					else:
 						print(C_WARN + f"Line {line_num}: '{line}' doesn't look like a valid URL" + C_RESET)
-			return urls
 	except FileNotFoundError:
 		print(C_ERR + f"File not found: {file_path}" + C_RESET)
 		return []
 	except Exception as e:
 		print(C_ERR + f"Error reading file {file_path}: {e}" + C_RESET)
 		return []
+	return urls
+
 
+# Extensions picked up by --load, mapped to the archive format they are filed under
+# (video defaults to mkv for better seeking); one dict lookup both filters and classifies
+_LOAD_AUDIO_EXTS = frozenset({'.mp3', '.m4a', '.aac', '.flac', '.wav'})
+_LOAD_VIDEO_EXTS = frozenset({'.mp4', '.mkv', '.webm', '.avi', '.mov'})
+_LOAD_CONTAINER_BY_EXT = {**dict.fromkeys(_LOAD_VIDEO_EXTS, 'mkv'), **dict.fromkeys(_LOAD_AUDIO_EXTS, 'mp3')}
+_LOAD_PRINT_CHUNK = 512
+_LOAD_ADDED_PREFIX = "  📁 Added: "
+_LOAD_SKIP_PREFIX = "  ⏭️  Already in archive: "
 
-def load_directory_to_archive(directory_path: str) -> bool:
-	"""Scan a directory and add all MP3/MP4 files to the archive using optimized ArchiveManager."""
+
+def load_directory_to_archive(directory_path: str, rebuild: bool = False, jobs: int = 1) -> bool:
+	"""Scan a directory and add all MP3/MP4 files to the archive using optimized ArchiveManager.
+	
+	With rebuild=True the archive is replaced by the scan results, skipping all duplicate checks.
+	jobs > 1 lists folders (and stats their files) on worker threads (slow network/cloud mounts).
+	"""
 	try:
 		dir_path = Path(directory_path)
 		if not dir_path.exists():
@@ -1685,51 +2544,77 @@ def load_directory_to_archive(directory_path: str) -> bool:
 		
 		print(f"{C_HEAD}Scanning directory: {dir_path}{C_RESET}")
 		
-		# Supported file extensions
-		audio_extensions = ['.mp3', '.m4a', '.aac', '.flac', '.wav']
-		video_extensions = ['.mp4', '.mkv', '.webm', '.avi', '.mov']
-		all_extensions = audio_extensions + video_extensions
-		
 		archive_mgr = ArchiveManager()
 		added_count = 0
-		
-		# Recursively scan directory
-		for file_path in dir_path.rglob('*'):
-			if file_path.is_file() and file_path.suffix.lower() in all_extensions:
-				# Determine format based on extension
-				if file_path.suffix.lower() in audio_extensions:
-					container = 'mp3'
-				else:
-					# Default to mkv for video files (better seeking)
-					container = 'mkv'
-				
-				# Generate a stable key based on absolute path and format
-				abs_path = str(file_path.absolute())
-				key = _stable_key_for_path(abs_path, container)
+		# New entries only; merged into the archive in one step after the scan
+		new_entries: dict[str, dict] = {}
+		if rebuild:
+			# Full re-index: nothing to deduplicate against
+			if archive_mgr.data:
+				print(f"  {C_WARN}Rebuilding replaces all {len(archive_mgr.data)} existing archive entries, including download records{C_RESET}")
+				confirm = prompt(f"Replace these {len(archive_mgr.data)} entries with the scan results? (y/n)", "n").lower()
+				if confirm not in ("y", "yes"):
+					print(C_WARN + "Cancelled." + C_RESET)
+					return False
+			archive_mgr.data.clear()
+			archive_mgr._dirty = True
+			existing: set[tuple[str, str]] = set()
+		else:
+			# Paths already archived per format, built once so each file is an O(1) check
+			existing = {(e.get('file_path'), e.get('format')) for e in archive_mgr.data.values()}
+		# Per-file status lines, written out in chunks rather than one print each
+		pending_lines: list[str] = []
+		
+		with ExitStack() as stack:
+			# Recursively scan directory (one scandir per folder; type and mtime come from the DirEntry)
+			if jobs > 1:
+				pool = stack.enter_context(ThreadPoolExecutor(max_workers=jobs))
+				# Folders are listed (and their files stat'ed) concurrently; slow mounts overlap the latency
+				files = _iter_media_files_parallel(dir_path, _LOAD_CONTAINER_BY_EXT, pool)
+			else:
+				# stat() only the files that turn out to be new (most of them on a re-scan are not)
+				files = _iter_media_files(dir_path, _LOAD_CONTAINER_BY_EXT, recursive=True, with_mtime=False)
+			for stem, abs_path, mtime in files:
+				name = os.path.basename(abs_path)
+				# Determine format based on extension (the walker already split off the stem)
+				container = _LOAD_CONTAINER_BY_EXT[name[len(stem):].lower()]
 				
 				# Check if this exact file path is already in archive (prevent duplicates)
-				already_exists = any(
-					entry.get('file_path') == abs_path and entry.get('format') == container
-					for entry in archive_mgr.data.values()
-				)
-				
-				if not already_exists:
-					archive_mgr.data[key] = {
-						'id': file_path.stem,
+				if rebuild or (abs_path, container) not in existing:
+					if not rebuild:
+						existing.add((abs_path, container))
+					if mtime is None:
+						try:
+							mtime = os.stat(abs_path).st_mtime
+						except OSError:
+							mtime = 0.0
+					# Generate a stable key based on absolute path and format (new files only)
+					key = _stable_key_for_path(abs_path, container)
+					new_entries[key] = {
+						'id': stem,
 						'extractor': 'local',
-						'title': file_path.stem,
+						'title': stem,
 						'format': container,
 						'file_path': abs_path,
-						'download_date': file_path.stat().st_mtime
+						'download_date': mtime
 					}
-					archive_mgr._dirty = True
 					added_count += 1
-					print(f"  📁 Added: {file_path.name}")
+					pending_lines.append(_LOAD_ADDED_PREFIX + name)
 				else:
-					print(f"  ⏭️  Already in archive: {file_path.name}")
-		
-		# Save the updated archive
-		archive_mgr.save()
+					pending_lines.append(_LOAD_SKIP_PREFIX + name)
+				if len(pending_lines) >= _LOAD_PRINT_CHUNK:
+					print("\n".join(pending_lines))
+					pending_lines.clear()
+		
+		if pending_lines:
+			print("\n".join(pending_lines))
+		
+		# Save the updated archive: a rebuild rewrites it, a merge only appends the delta
+		if rebuild:
+			archive_mgr.data.update(new_entries)
+			archive_mgr.save()
+		else:
+			archive_mgr.add_entries(new_entries)
 		
 		print(f"{C_OK}✓ Added {added_count} new files to archive{C_RESET}")
 		if added_count == 0:
@@ -1742,14 +2627,86 @@ def load_directory_to_archive(directory_path: str) -> bool:
 		return False
 
 
-def main() -> int:
-	banner()
+def _run_backup(args: dict) -> int:
+	"""--backup [--deep]"""
+	backup_archive(deep=args["deep"])
+	return 0
+
+
+def _run_clear_metadata_cache(args: dict) -> int:
+	"""--clear-metadata-cache"""
+	clear_metadata_cache()
+	return 0
+
+
+def _run_show_archive(args: dict) -> int:
+	"""--show-archive"""
+	show_archive_info()
+	return 0
+
+
+def _run_clear(args: dict) -> int:
+	"""--clear [all|<name>|<from_date> [to_date]]"""
+	clear_args = args["clear"]
+	if not clear_args:
+		# Interactive mode
+		interactive_clear()
+	elif len(clear_args) == 1:
+		if clear_args[0].lower() == "all":
+			clear_entire_archive()
+		else:
+			# Clear by name
+			clear_archive_by_name(clear_args[0])
+	elif len(clear_args) == 2:
+		# Clear by date range
+		clear_archive_by_date(clear_args[0], clear_args[1])
+	else:
+		print(C_ERR + "Invalid --clear arguments. Use: --clear [all|<name>|<from_date> [to_date]]" + C_RESET)
+		return 1
+	return 0
 
-	if not detect_ffmpeg():
-		print(C_WARN + "ffmpeg not found. Conversions, merges, and thumbnails may fail." + C_RESET)
-		print(C_DIM + "Install from https://ffmpeg.org/download.html or winget: winget install Gyan.FFmpeg" + C_RESET)
 
+# Archive/admin commands checked by main() in this order; each handler returns the exit code
+_ADMIN_COMMANDS = (
+	("backup", _run_backup),
+	("clear_metadata_cache", _run_clear_metadata_cache),
+	("show_archive", _run_show_archive),
+	("clear", _run_clear),
+)
+
+
+def _check_writable(base_dir: Path, windows: bool = os.name == "nt") -> None:
+	"""Raise PermissionError if files can't be created in base_dir.
+	
+	POSIX uses a permission check, with no probe file to create and delete (slow on
+	network/FUSE mounts, bumps the folder mtime). On Windows os.access ignores ACLs and
+	only sees the read-only flag, so a real probe file is written there.
+	"""
+	if windows:
+		test_file = base_dir / ".write_test"
+		try:
+			test_file.touch()
+			test_file.unlink()
+		except Exception:
+			raise PermissionError(f"Cannot write to directory: {base_dir}")
+	elif not os.access(base_dir, os.W_OK | os.X_OK):
+		raise PermissionError(f"Cannot write to directory: {base_dir}")
+
+
+def main() -> int:
 	args = parse_args(sys.argv[1:])
+	if args["pretty"]:
+		ArchiveManager.PRETTY = True
+
+	# Archive/admin commands never touch ffmpeg - only look it up for runs that download
+	admin_only = (args["help"] or any(args[name] for name, _ in _ADMIN_COMMANDS)
+		or (args["load_directory"] and not args["urls"]))
+	# The banner is for help and interactive/download runs, not one-shot archive commands
+	if args["help"] or not admin_only:
+		banner()
+	if not admin_only and not detect_ffmpeg():
+		print(C_WARN + "ffmpeg not found. Conversions, merges, and thumbnails may fail." + C_RESET)
+		print(C_DIM + "Install from https://ffmpeg.org/download.html or winget: winget install Gyan.FFmpeg" + C_RESET)
 
 	# Handle help first
 	if args["help"]:
@@ -1757,46 +2714,19 @@ def main() -> int:
 		return 0
 
 	# Handle special commands
-	if args["backup"]:
-		backup_archive()
-		return 0
-	
-	if args["show_archive"]:
-		show_archive_info()
-		return 0
-	
-	if args["clear"]:
-		clear_args = args["clear"]
-		
-		if not clear_args:
-			# Interactive mode
-			result = interactive_clear()
-			return 0 if result >= 0 else 0
-		elif len(clear_args) == 1:
-			if clear_args[0].lower() == "all":
-				# Clear all
-				clear_entire_archive()
-				return 0
-			else:
-				# Clear by name
-				clear_archive_by_name(clear_args[0])
-				return 0
-		elif len(clear_args) == 2:
-			# Clear by date range
-			clear_archive_by_date(clear_args[0], clear_args[1])
-			return 0
-		else:
-			print(C_ERR + "Invalid --clear arguments. Use: --clear [all|<name>|<from_date> [to_date]]" + C_RESET)
-			return 1
+	for name, handler in _ADMIN_COMMANDS:
+		if args[name]:
+			return handler(args)
 
 	# Collect URL(s)
 	urls: list[str]
+	prevalidated = False
 	if args["urls"]:
 		urls = args["urls"]
 	elif args["load_directory"]:
 		# Directory mode - scan and add files to archive
 		print(C_HEAD + f"Directory mode: Adding files from {args['load_directory']} to archive" + C_RESET)
-		success = load_directory_to_archive(args["load_directory"])
+		success = load_directory_to_archive(args["load_directory"], rebuild=args["rebuild"], jobs=args["jobs"])
 		if success:
 			print(C_OK + "Directory scan completed successfully!" + C_RESET)
 			return 0
@@ -1811,6 +2741,7 @@ def main() -> int:
 			print(C_ERR + "No valid URLs found in file." + C_RESET)
 			return 1
 		print(C_OK + f"Loaded {len(urls)} URL(s) from file" + C_RESET)
+		prevalidated = True  # load_urls_from_file only returns http(s) lines
 	else:
 		entered = prompt("Enter video/playlist URL(s) (space or newline separated)")
 		urls = split_urls(entered)
@@ -1819,26 +2750,21 @@ def main() -> int:
 			entered = prompt("Enter video/playlist URL(s)")
 			urls = split_urls(entered)
 
-	# Validate URLs
+	# Validate URLs and spot Liked Music playlists in the same pass
+	has_liked = False
 	for url in urls:
-		if not url.startswith(('http://', 'https://')):
+		if not prevalidated and not url.startswith(_URL_SCHEMES):
 			print(C_WARN + f"Warning: '{url}' doesn't look like a valid URL" + C_RESET)
+		if not has_liked and is_youtube_music_liked(url):
+			has_liked = True
 
 	# Format
 	try:
 		if args["format"]:
 			# Handle command line format argument
-			if args["format"] == "mp3":
-				container, fmt_type = ("mp3", "audio")
-			elif args["format"] == "mkv":
-				container, fmt_type = ("mkv", "video")
-			elif args["format"] == "mp4":
-				container, fmt_type = ("mp4", "video")
-			elif args["format"] == "native":
-				container, fmt_type = ("native", "audio")
-			else:
+			if args["format"] not in _FORMAT_MAP:
 				print(C_ERR + f"Invalid format: {args['format']}. Using MP3 as default." + C_RESET)
-				container, fmt_type = ("mp3", "audio")
+			container, fmt_type = _FORMAT_MAP.get(args["format"], _FORMAT_MAP["mp3"])
 		else:
 			container, fmt_type = choose_format()
 	except Exception as e:
@@ -1850,17 +2776,13 @@ def main() -> int:
 	outdir_str = args["outdir"] or prompt("Output folder", str(default_dir))
 	
 	try:
-		base_dir = Path(outdir_str).expanduser().resolve()
+		# Plain absolute path - no per-component readlink() like Path.resolve()
+		base_dir = Path(os.path.abspath(os.path.expanduser(outdir_str)))
 		# Test if we can create the directory
 		base_dir.mkdir(parents=True, exist_ok=True)
 		
 		# Test if we can write to the directory
-		test_file = base_dir / ".write_test"
-		try:
-			test_file.touch()
-			test_file.unlink()
-		except Exception:
-			raise PermissionError(f"Cannot write to directory: {base_dir}")
+		_check_writable(base_dir)
 			
 	except PermissionError as e:
 		print(C_ERR + f"Permission Error: {e}" + C_RESET)
@@ -1872,19 +2794,15 @@ def main() -> int:
 	except Exception as e:
 		print(C_ERR + f"Error creating output directory: {e}" + C_RESET)
 		print(C_WARN + f"Failed to create: {outdir_str}" + C_RESET)
-		print(C_DIM + f"Resolved to: {Path(outdir_str).expanduser().resolve()}" + C_RESET)
+		print(C_DIM + f"Resolved to: {os.path.abspath(os.path.expanduser(outdir_str))}" + C_RESET)
 		return 1
 
 	# Firefox cookies preference
-	try:
-		use_firefox_cookies = args["firefox_cookies"]
-		# If any URL matches liked music, auto-enable regardless of toggle
-		if any(is_youtube_music_liked(u) for u in urls):
-			use_firefox_cookies = True
-			print(C_WARN + "Detected YouTube Music Liked playlist; Firefox cookies will be used." + C_RESET)
-	except Exception as e:
-		print(C_WARN + f"Warning: Could not check for YouTube Music URLs: {e}" + C_RESET)
-		use_firefox_cookies = args["firefox_cookies"]
+	use_firefox_cookies = args["firefox_cookies"]
+	# If any URL matches liked music, auto-enable regardless of toggle
+	if has_liked:
+		use_firefox_cookies = True
+		print(C_WARN + "Detected YouTube Music Liked playlist; Firefox cookies will be used." + C_RESET)
 
 	# Summary
 	print()
@@ -1916,7 +2834,7 @@ def main() -> int:
 
 	# Download
 	try:
-		ok = download_urls(urls, base_dir, container, fmt_type, use_firefox_cookies, args["fast"])
+		ok = download_urls(urls, base_dir, container, fmt_type, use_firefox_cookies, args["fast"], not args["no_cache"], args["refresh_metadata"])
 	except KeyboardInterrupt:
 		print(C_WARN + "\nDownload interrupted by user." + C_RESET)
 		return 130
@@ -39,6 +39,13 @@ def main():
         "--color=yes"
     ]
     
+    # Spread test files across all cores when pytest-xdist is installed
+    try:
+        import xdist  # noqa: F401
+        test_args.extend(["-n", "auto", "--dist", "loadfile"])
+    except ImportError:
+        pass
+    
     # Add any command line arguments passed to this script
     if len(sys.argv) > 1:
         test_args.extend(sys.argv[1:])
@@ -31,6 +31,9 @@ setup(
     ],
     python_requires=">=3.8",
     install_requires=requirements,
+    extras_require={
+        "fast": ["xxhash>=3.0", "orjson>=3.6", "zstandard>=0.15"],
+    },
     entry_points={
         "console_scripts": [
             "mpx-downloader=download:main",
@@ -0,0 +1,42 @@
+import pytest
+import sys
+import os
+
+# Add the parent directory to the path so we can import download
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_data_home(tmp_path_factory, monkeypatch):
+    """Keep every test's archive and caches out of the real user data directory.
+
+    Each test gets its own data home, so the suite can also run in parallel
+    (pytest -n auto with pytest-xdist) without tests sharing an archive file.
+    """
+    data_home = tmp_path_factory.mktemp("data_home")
+    monkeypatch.setenv("XDG_DATA_HOME", str(data_home))
+    monkeypatch.setenv("APPDATA", str(data_home))
+
+
+def _make_files(*paths, content=b""):
+    """Create (or truncate) files with one open/[write]/close each; Path.touch tries os.utime first."""
+    flags = os.O_CREAT | os.O_WRONLY | os.O_TRUNC | getattr(os, "O_CLOEXEC", 0)
+    for path in paths:
+        fd = os.open(os.fspath(path), flags, 0o644)
+        try:
+            if content:
+                os.write(fd, content)
+        finally:
+            os.close(fd)
+
+
+@pytest.fixture
+def make_files():
+    """Fixture form of _make_files for tests that need a handful of placeholder media files."""
+    return _make_files
+
+
+@pytest.fixture
+def archive_file(tmp_path):
+    """Archive path inside the test's tmp_path, for tests that redirect get_appdata_archive_path."""
+    return tmp_path / "test_archive.json"
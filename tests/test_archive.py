@@ -1,14 +1,10 @@
 import pytest
 import json
-import tempfile
-import shutil
 from pathlib import Path
-from unittest.mock import patch, mock_open
+from unittest.mock import patch
 import sys
 import os
-
-# Add the parent directory to the path so we can import download
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import time
 
 import download
 
@@ -16,28 +12,16 @@ import download
 class TestArchiveFunctions:
     """Test archive-related functionality using ArchiveManager."""
     
-    def setup_method(self):
-        """Setup for each test method."""
-        self.temp_dir = Path(tempfile.mkdtemp())
-        self.archive_file = self.temp_dir / "test_archive.json"
-    
-    def teardown_method(self):
-        """Cleanup after each test method."""
-        if self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
-    
-    @patch('download.get_appdata_archive_path')
-    def test_archive_manager_empty(self, mock_path):
+    def test_archive_manager_empty(self, monkeypatch, archive_file):
         """Test ArchiveManager with empty/non-existent archive."""
-        mock_path.return_value = self.archive_file
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
         archive_mgr = download.ArchiveManager()
         assert archive_mgr.data == {}
         assert not archive_mgr._dirty
     
-    @patch('download.get_appdata_archive_path')
-    def test_archive_manager_existing(self, mock_path):
+    def test_archive_manager_existing(self, monkeypatch, tmp_path, archive_file):
         """Test ArchiveManager loading existing archive."""
-        mock_path.return_value = self.archive_file
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
         
         # Create test archive data
         test_data = {
@@ -46,23 +30,33 @@ class TestArchiveFunctions:
                 "extractor": "youtube",
                 "title": "Test Video",
                 "format": "mp3",
-                "file_path": str(self.temp_dir / "test.mp3"),
+                "file_path": str(tmp_path / "test.mp3"),
                 "download_date": 1234567890.0
             }
         }
         
         # Write test data to file
-        with self.archive_file.open('w', encoding='utf-8') as f:
+        with archive_file.open('w', encoding='utf-8') as f:
             json.dump(test_data, f)
         
         archive_mgr = download.ArchiveManager()
         assert archive_mgr.data == test_data
         assert not archive_mgr._dirty
     
-    @patch('download.get_appdata_archive_path')
-    def test_archive_manager_save(self, mock_path):
+    @pytest.mark.skipif(download.orjson is None, reason="orjson not installed")
+    def test_archive_manager_load_large_archive_via_mmap(self, monkeypatch, archive_file):
+        """Test that archives above the mmap threshold load identically."""
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
+        test_data = {"youtube_abc123_mp3": {"id": "abc123", "title": "Test Video", "format": "mp3"}}
+        archive_file.write_text(json.dumps(test_data), encoding="utf-8")
+        
+        with patch('download._MMAP_THRESHOLD', 0):
+            archive_mgr = download.ArchiveManager()
+        assert archive_mgr.data == test_data
+    
+    def test_archive_manager_save(self, monkeypatch, archive_file):
         """Test ArchiveManager saving functionality."""
-        mock_path.return_value = self.archive_file
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
         
         archive_mgr = download.ArchiveManager()
         test_data = {
@@ -77,19 +71,71 @@ class TestArchiveFunctions:
         archive_mgr.save()
         
         # Verify the file was created and contains correct data
-        assert self.archive_file.exists()
-        with self.archive_file.open('r', encoding='utf-8') as f:
+        assert archive_file.exists()
+        with archive_file.open('r', encoding='utf-8') as f:
             saved_data = json.load(f)
         assert saved_data == test_data
         assert not archive_mgr._dirty
+        # Machine-only file: compact by default, indented on request (--pretty)
+        assert "\n" not in archive_file.read_text(encoding="utf-8")
+        with patch.object(download.ArchiveManager, 'PRETTY', True):
+            archive_mgr._dirty = True
+            archive_mgr.save()
+        assert '\n  "test_key"' in archive_file.read_text(encoding="utf-8")
+    
+    def test_archive_manager_save_stdlib_fallback(self, monkeypatch, archive_file):
+        """Test that archives round-trip identically with and without orjson."""
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
+        test_data = {"test_key": {"id": "test123", "title": "Café – 日本語"}}
+        
+        with patch('download.orjson', None):
+            archive_mgr = download.ArchiveManager()
+            archive_mgr.data = test_data
+            archive_mgr._dirty = True
+            archive_mgr.save()
+        
+        # Non-ASCII text is stored as UTF-8, not escaped
+        assert "Café – 日本語" in archive_file.read_text(encoding="utf-8")
+        assert download.ArchiveManager().data == test_data
+    
+    def test_archive_manager_append_log_replay_and_compaction(self, monkeypatch, tmp_path, archive_file):
+        """Test that adds are appended as NDJSON, replayed on load and compacted on save."""
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
+        log_file = archive_file.with_suffix(".ndjson")
+        test_file = tmp_path / "test.mp3"
+        test_file.touch()
+        
+        archive_mgr = download.ArchiveManager()
+        archive_mgr.add("abc123", "youtube", "Test Video", test_file, "mp3")
+        assert not archive_file.exists()
+        assert len(log_file.read_bytes().splitlines()) == 1
+        
+        # Simulate a crash: a fresh manager replays the log, ignoring a torn last line
+        with open(log_file, "ab") as f:
+            f.write(b'{"broken')
+        reloaded = download.ArchiveManager()
+        assert reloaded.find("abc123", "youtube", "mp3") is not None
+        
+        # Saving folds the log into the canonical JSON and removes it
+        reloaded.save()
+        assert "youtube_abc123_mp3" in json.loads(archive_file.read_bytes())
+        assert not log_file.exists()
+        
+        # compact_if_needed only rewrites once the log passes the size threshold
+        reloaded.add("def456", "youtube", "Other Video", test_file, "mp3")
+        reloaded.compact_if_needed()
+        assert log_file.exists()
+        with patch.object(download.ArchiveManager, "LOG_COMPACT_BYTES", 1):
+            reloaded.compact_if_needed()
+        assert not log_file.exists()
+        assert "youtube_def456_mp3" in json.loads(archive_file.read_bytes())
     
-    @patch('download.get_appdata_archive_path')
-    def test_archive_manager_add(self, mock_path):
+    def test_archive_manager_add(self, monkeypatch, tmp_path, archive_file):
         """Test adding entries to ArchiveManager."""
-        mock_path.return_value = self.archive_file
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
         
         # Create a test file
-        test_file = self.temp_dir / "test.mp3"
+        test_file = tmp_path / "test.mp3"
         test_file.touch()
         
         archive_mgr = download.ArchiveManager()
@@ -103,13 +149,27 @@ class TestArchiveFunctions:
         assert archive_mgr.data[key]["format"] == "mp3"
         assert archive_mgr._dirty
     
-    @patch('download.get_appdata_archive_path')
-    def test_archive_manager_find_existing(self, mock_path):
+    def test_archive_manager_add_with_mtime(self, monkeypatch, tmp_path, archive_file):
+        """Test that a caller-supplied mtime is stored without another stat."""
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
+        
+        archive_mgr = download.ArchiveManager()
+        archive_mgr.add("abc123", "youtube", "Test Video", str(tmp_path / "test.mp3"), "mp3", mtime=42.0)
+        
+        entry = archive_mgr.data["youtube_abc123_mp3"]
+        assert entry["download_date"] == 42.0
+        assert entry["file_path"] == str(tmp_path / "test.mp3")
+        
+        # Missing files without an mtime fall back to 0.0
+        archive_mgr.add("def456", "youtube", "Other", tmp_path / "missing.mp3", "mp3")
+        assert archive_mgr.data["youtube_def456_mp3"]["download_date"] == 0.0
+    
+    def test_archive_manager_find_existing(self, monkeypatch, tmp_path, archive_file):
         """Test finding existing entry in ArchiveManager."""
-        mock_path.return_value = self.archive_file
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
         
         # Create test file and add to archive
-        test_file = self.temp_dir / "test.mp3"
+        test_file = tmp_path / "test.mp3"
         test_file.touch()
         
         archive_mgr = download.ArchiveManager()
@@ -121,10 +181,9 @@ class TestArchiveFunctions:
         assert entry["id"] == "abc123"
         assert entry["title"] == "Test Video"
     
-    @patch('download.get_appdata_archive_path')
-    def test_archive_manager_find_missing_file(self, mock_path):
+    def test_archive_manager_find_missing_file(self, monkeypatch, tmp_path, archive_file):
         """Test finding entry with missing file (should be removed)."""
-        mock_path.return_value = self.archive_file
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
         
         # Create archive entry without actual file
         test_data = {
@@ -133,12 +192,12 @@ class TestArchiveFunctions:
                 "extractor": "youtube",
                 "title": "Test Video",
                 "format": "mp3",
-                "file_path": str(self.temp_dir / "nonexistent.mp3"),
+                "file_path": str(tmp_path / "nonexistent.mp3"),
                 "download_date": 1234567890.0
             }
         }
         
-        with self.archive_file.open('w', encoding='utf-8') as f:
+        with archive_file.open('w', encoding='utf-8') as f:
             json.dump(test_data, f)
         
         archive_mgr = download.ArchiveManager()
@@ -151,13 +210,86 @@ class TestArchiveFunctions:
         assert "youtube_abc123_mp3" not in archive_mgr.data
         assert archive_mgr._dirty
 
-    @patch('download.get_appdata_archive_path')
-    def test_archive_manager_extractor_normalization(self, mock_path):
+    def test_archive_manager_find_by_title(self, monkeypatch, tmp_path, archive_file):
+        """Test title fallback lookup through the title index."""
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
+        
+        # Create test file and add to archive under a different ID
+        test_file = tmp_path / "test.mp3"
+        test_file.touch()
+        
+        archive_mgr = download.ArchiveManager()
+        archive_mgr.add("abc123", "youtube", "Test Video", test_file, "mp3")
+        
+        # Unknown ID but matching title should fall back to the indexed entry
+        entry = archive_mgr.find("zzz999", "youtube", "mp3", "Test Video")
+        assert entry is not None
+        assert entry["id"] == "abc123"
+        
+        # Same title in a different container should not match
+        assert archive_mgr.find("zzz999", "youtube", "mp4", "Test Video") is None
+        
+        # Stale entries are dropped from both the archive and the index
+        archive_mgr.save()
+        test_file.unlink()
+        reloaded = download.ArchiveManager()
+        assert reloaded.find("zzz999", "youtube", "mp3", "Test Video") is None
+        assert "youtube_abc123_mp3" not in reloaded.data
+        assert ("mp3", "test video") not in reloaded._by_title
+        assert reloaded._dirty
+
+    def test_archive_manager_readd_moves_title_bucket(self, monkeypatch, tmp_path, archive_file):
+        """Test that re-adding a key under a new title stops it matching the old title."""
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
+        test_file = tmp_path / "test.mp3"
+        test_file.touch()
+        
+        archive_mgr = download.ArchiveManager()
+        archive_mgr.add("v1", "youtube", "Old Title", test_file, "mp3")
+        archive_mgr.add("v1", "youtube", "New Title", test_file, "mp3")
+        
+        assert archive_mgr.find("other", "youtube", "mp3", "Old Title") is None
+        assert archive_mgr.find("other", "youtube", "mp3", "New Title")["id"] == "v1"
+        assert ("mp3", "old title") not in archive_mgr._by_title
+
+    def test_archive_manager_loads_malformed_entries(self, monkeypatch, archive_file):
+        """Test that null titles and non-dict entries don't stop the archive from loading."""
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
+        archive_file.write_text(json.dumps({
+            "youtube_a_mp3": {"id": "a", "title": None, "format": "mp3", "file_path": "/x/a.mp3"},
+            "broken": "not an entry",
+        }))
+        
+        archive_mgr = download.ArchiveManager()
+        assert len(archive_mgr.data) == 2
+        assert ("mp3", "") in archive_mgr._by_title
+        assert archive_mgr.find("zzz", "youtube", "mp3", "Anything") is None
+
+    def test_archive_manager_exists_scans_directory_once(self, monkeypatch, tmp_path, archive_file):
+        """Test that exists() caches a whole directory listing on first use."""
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
+        
+        (tmp_path / "a.mp3").touch()
+        (tmp_path / "b.mp3").touch()
+        
+        archive_mgr = download.ArchiveManager()
+        assert archive_mgr.exists(str(tmp_path / "a.mp3"))
+        
+        # Sibling files were cached by the same scan
+        assert str(tmp_path / "b.mp3") in archive_mgr._exists_cache
+        assert str(tmp_path) in archive_mgr._scanned_dirs
+        
+        # Files created after the scan fall back to a direct check
+        (tmp_path / "c.mp3").touch()
+        assert archive_mgr.exists(str(tmp_path / "c.mp3"))
+        assert not archive_mgr.exists(str(tmp_path / "missing.mp3"))
+
+    def test_archive_manager_extractor_normalization(self, monkeypatch, tmp_path, archive_file):
         """Test that extractor names are normalized consistently."""
-        mock_path.return_value = self.archive_file
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
         
         # Create test file
-        test_file = self.temp_dir / "test.mp3"
+        test_file = tmp_path / "test.mp3"
         test_file.touch()
         
         archive_mgr = download.ArchiveManager()
@@ -177,13 +309,12 @@ class TestArchiveFunctions:
         assert entry2["id"] == "abc123"
         assert entry3["id"] == "abc123"
 
-    @patch('download.get_appdata_archive_path')
-    def test_archive_manager_youtube_tab_extractor(self, mock_path):
+    def test_archive_manager_youtube_tab_extractor(self, monkeypatch, tmp_path, archive_file):
         """Test that youtube:tab and youtubetab extractors are normalized to youtube."""
-        mock_path.return_value = self.archive_file
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
         
         # Create test file
-        test_file = self.temp_dir / "test.mp3"
+        test_file = tmp_path / "test.mp3"
         test_file.touch()
         
         archive_mgr = download.ArchiveManager()
@@ -202,6 +333,122 @@ class TestArchiveFunctions:
         assert entry2 is not None
         assert entry2["id"] == "def456"
 
+        # Extractor prefixes are normalized once and shared between keys
+        assert archive_mgr.key("x", "YoutubeTab", "mp3") == archive_mgr.key("x", None, "mp3") == "youtube_x_mp3"
+        assert download._archive_extractor_name("Vimeo") is download._archive_extractor_name("Vimeo")
+
+    
+    @patch('download.prompt', return_value="y")
+    def test_clear_archive_by_date(self, mock_prompt, monkeypatch, archive_file):
+        """Test that entries are cleared by comparing stored timestamps to the range."""
+        from datetime import datetime
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
+        inside = datetime(2024, 1, 15).timestamp()
+        outside = datetime(2024, 3, 1).timestamp()
+        archive_file.write_text(json.dumps({
+            "a": {"title": "Inside", "format": "mp3", "download_date": inside},
+            "b": {"title": "Outside", "format": "mp3", "download_date": outside},
+            "c": {"title": "Broken", "format": "mp3", "download_date": "n/a"},
+        }))
+        
+        assert download.clear_archive_by_date("2024-01-01", "2024-01-31") == 1
+        assert set(json.loads(archive_file.read_bytes())) == {"b", "c"}
+    
+    def test_flat_cache_roundtrip_and_ttl(self, monkeypatch, tmp_path):
+        """Test that flat playlist listings are cached, persisted and expire."""
+        monkeypatch.setattr(download, "get_flat_cache_path", lambda: tmp_path / "flat_cache.json")
+        url = "https://youtube.com/playlist?list=PLtest"
+        entries = [{"id": "abc123", "title": "Test Video", "url": "https://x", "duration": None}]
+        
+        cache = download.FlatCache()
+        assert cache.get(url) is None
+        cache.put(url, {"title": "My Playlist"}, entries)
+        cache.save()
+        
+        # Reloaded cache serves a slim listing with the playlist title
+        info, cached_entries = download.FlatCache().get(url)
+        assert info["playlist_title"] == "My Playlist"
+        assert cached_entries == [{"id": "abc123", "title": "Test Video"}]
+        
+        # Expired listings are ignored
+        with patch('download.time.time', return_value=cache.data[url]["ts"] + download.FlatCache.TTL):
+            assert download.FlatCache().get(url) is None
+    
+    def test_info_cache_roundtrip_ttl_and_eviction(self, monkeypatch, tmp_path):
+        """Test that extract_info results are cached on disk, expire and are bounded."""
+        cache_dir = tmp_path / "info_cache"
+        monkeypatch.setattr(download, "get_info_cache_dir", lambda: cache_dir)
+        url = "https://youtube.com/playlist?list=PLtest"
+        info = {"_type": "playlist", "title": "My Playlist", "entries": [{"id": "abc123"}]}
+        
+        assert download._get_cached_info(url) is None
+        download._put_cached_info(url, info)
+        assert download._get_cached_info(url) == info
+        
+        # Expired results are ignored; the TTL counts from extraction, not from the last hit
+        assert download._get_cached_info(url, ttl=0) is None
+        with patch('download.time.time', return_value=time.time() + download._INFO_CACHE_TTL):
+            assert download._get_cached_info(url) is None
+        
+        # A hit marks the file as recently used through its mtime (atime may never update)
+        cache_file = download._info_cache_file(url)
+        os.utime(cache_file, (0, 0))
+        assert download._get_cached_info(url) == info
+        assert cache_file.stat().st_mtime > 0
+        
+        # Oldest-accessed files beyond the bound are evicted
+        for i in range(3):
+            download._put_cached_info(f"{url}{i}", info)
+        os.utime(download._info_cache_file(url), (time.time(), 0))
+        download._evict_info_cache(cache_dir, max_entries=3)
+        assert download._get_cached_info(url) is None
+        assert download._get_cached_info(f"{url}0") == info
+        
+        assert download.clear_metadata_cache() == 3
+        assert download._get_cached_info(f"{url}0") is None
+    
+    def test_show_archive_info_counts(self, monkeypatch, capsys, archive_file):
+        """Test that format and local tallies are reported from one pass."""
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
+        entries = [("mp3", "youtube"), ("mp3", "local"), ("mkv", "local"), ("native", "youtube")]
+        archive_file.write_text(json.dumps({
+            f"k{i}": {"format": fmt, "extractor": ext, "title": str(i), "file_path": f"/x/{i}"}
+            for i, (fmt, ext) in enumerate(entries)
+        }))
+        
+        download.show_archive_info()
+        out = capsys.readouterr().out
+        for label, count in (("MP3", 2), ("MP4", 0), ("MKV", 1), ("Native", 1), ("Local", 2)):
+            assert f"{label} files: {download.C_DIM}{count}" in out
+    
+    def test_backup_archive_hardlink_and_deep(self, monkeypatch, tmp_path, archive_file):
+        """Test that backups hardlink the archive snapshot, or copy it with deep=True."""
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
+        archive_file.write_text(json.dumps({"k": {"title": "old"}}))
+        backup = tmp_path / "download_archive_backup.json"
+        
+        assert download.backup_archive()
+        assert os.path.samefile(backup, archive_file)
+        
+        # The atomic save swaps in a new file; the backup keeps the old snapshot
+        archive_mgr = download.ArchiveManager()
+        archive_mgr.data = {"k": {"title": "new"}}
+        archive_mgr._dirty = True
+        archive_mgr.save()
+        assert json.loads(backup.read_bytes()) == {"k": {"title": "old"}}
+        
+        # An existing backup is replaced; deep forces an independent copy
+        assert download.backup_archive(deep=True)
+        assert not os.path.samefile(backup, archive_file)
+        assert json.loads(backup.read_bytes()) == {"k": {"title": "new"}}
+        
+        # If neither link nor copy works, the previous backup survives
+        with patch('download.os.link', side_effect=OSError("no links")), \
+                patch('download.shutil.copy2', side_effect=OSError(28, "No space left on device")):
+            assert not download.backup_archive()
+        assert json.loads(backup.read_bytes()) == {"k": {"title": "new"}}
+        assert not (tmp_path / "download_archive_backup.json.tmp").exists()
+
 
 class TestUtilityFunctions:
     """Test utility functions."""
@@ -217,6 +464,20 @@ class TestUtilityFunctions:
         assert not download.is_youtube_music_liked("https://youtube.com/watch?v=abc123")
         assert not download.is_youtube_music_liked("https://music.youtube.com/playlist?list=PLrAXtmRdnEQy")
     
+    def test_classify_url(self):
+        """Test single-pass URL classification."""
+        kind = download.classify_url("https://music.youtube.com/playlist?list=LM")
+        assert kind.is_playlist and kind.is_liked
+        
+        kind = download.classify_url("https://youtube.com/playlist?list=PLrAXtmRdnEQy")
+        assert kind.is_playlist and not kind.is_liked
+        
+        kind = download.classify_url("https://youtube.com/watch?v=abc123")
+        assert not kind.is_playlist and not kind.is_liked
+        
+        # The lowercased URL is kept for reuse by callers
+        assert download.classify_url("https://YouTube.com/Playlist?LIST=PL1").lowered == "https://youtube.com/playlist?list=pl1"
+    
     def test_split_urls(self):
         """Test URL splitting functionality."""
         # Test single URL
@@ -256,21 +517,17 @@ class TestUtilityFunctions:
         # For now, just test that the function exists
         assert callable(download.choose_format)
     
-    def test_build_outtmpl(self):
+    def test_build_outtmpl(self, tmp_path):
         """Test output template building."""
-        temp_dir = Path(tempfile.mkdtemp())
-        try:
-            # Test audio template
-            template = download.build_outtmpl(temp_dir, True)
-            assert str(temp_dir) in template
-            assert "%(title)s.%(ext)s" in template
-            
-            # Test video template
-            template = download.build_outtmpl(temp_dir, False)
-            assert str(temp_dir) in template
-            assert "%(title)s.%(ext)s" in template
-        finally:
-            shutil.rmtree(temp_dir)
+        # Test audio template
+        template = download.build_outtmpl(tmp_path, True)
+        assert str(tmp_path) in template
+        assert "%(title)s.%(ext)s" in template
+        
+        # Test video template
+        template = download.build_outtmpl(tmp_path, False)
+        assert str(tmp_path) in template
+        assert "%(title)s.%(ext)s" in template
 
 
 class TestArchivePathFunctions:
@@ -283,6 +540,17 @@ class TestArchivePathFunctions:
         assert path.name == "download_archive.json"
         assert "yt-dlp-wrapper" in str(path)
     
+    def test_get_appdata_archive_path_follows_env(self, tmp_path):
+        """Test that the cached directory still tracks the data-home environment variable."""
+        if os.name == 'nt':
+            pytest.skip("XDG_DATA_HOME is not used on Windows")
+        with patch.dict(os.environ, {"XDG_DATA_HOME": str(tmp_path)}):
+            path = download.get_appdata_archive_path()
+            assert path == tmp_path / "yt-dlp-wrapper" / "download_archive.json"
+            assert path.parent.is_dir()
+            assert download.get_appdata_archive_path() == path
+        assert download.get_appdata_archive_path() != path
+    
     def test_stable_key_for_path(self):
         """Test stable key generation for file paths."""
         # Test that same path generates same key
@@ -311,6 +579,70 @@ class TestCommandLineArgs:
         assert args["format"] is None
         assert args["urls"] == []
     
+    @patch('download.show_archive_info')
+    @patch('download.detect_ffmpeg')
+    def test_main_admin_commands_skip_ffmpeg_lookup(self, mock_ffmpeg, mock_show):
+        """Test that archive-only commands run without looking for ffmpeg."""
+        with patch.object(sys, 'argv', ["download.py", "--show-archive"]):
+            assert download.main() == 0
+        mock_show.assert_called_once()
+        mock_ffmpeg.assert_not_called()
+    
+    @patch('download.show_help')
+    @patch('download.backup_archive', return_value=True)
+    @patch('download.banner')
+    def test_main_banner_only_for_help_and_download_runs(self, mock_banner, mock_backup, mock_help):
+        """Test that one-shot archive commands print no banner while --help still does."""
+        with patch.object(sys, 'argv', ["download.py", "--backup"]):
+            assert download.main() == 0
+        mock_backup.assert_called_once()
+        mock_banner.assert_not_called()
+        
+        with patch.object(sys, 'argv', ["download.py", "--help"]):
+            assert download.main() == 0
+        mock_help.assert_called_once()
+        mock_banner.assert_called_once()
+    
+    @patch('download.clear_archive_by_date')
+    @patch('download.clear_archive_by_name')
+    @patch('download.detect_ffmpeg')
+    def test_main_dispatches_clear_arguments(self, mock_ffmpeg, mock_by_name, mock_by_date):
+        """Test that --clear picks the handler from its argument count."""
+        with patch.object(sys, 'argv', ["download.py", "--clear", "Artist"]):
+            assert download.main() == 0
+        mock_by_name.assert_called_once_with("Artist")
+        with patch.object(sys, 'argv', ["download.py", "--clear", "2024-01-01", "2024-12-31"]):
+            assert download.main() == 0
+        mock_by_date.assert_called_once_with("2024-01-01", "2024-12-31")
+        with patch.object(sys, 'argv', ["download.py", "--clear", "a", "b", "c"]):
+            assert download.main() == 1
+        mock_ffmpeg.assert_not_called()
+    
+    @patch('download.download_urls', return_value=1)
+    @patch('download.detect_ffmpeg', return_value=True)
+    def test_main_liked_music_enables_cookies(self, mock_ffmpeg, mock_download, tmp_path):
+        """Test that a Liked Music URL turns on Firefox cookies for the run."""
+        argv = ["download.py", "--format", "mp3", "--outdir", str(tmp_path), "--non-interactive",
+                "https://youtube.com/watch?v=abc123", "https://music.youtube.com/playlist?list=LM"]
+        with patch.object(sys, 'argv', argv):
+            download.main()
+        assert mock_download.call_args.args[4] is True
+    
+    def test_check_writable(self, tmp_path):
+        """Test the output folder check: os.access on POSIX, a real probe file on Windows."""
+        download._check_writable(tmp_path, windows=False)
+        download._check_writable(tmp_path, windows=True)
+        assert list(tmp_path.iterdir()) == []  # The probe file is cleaned up
+        
+        # os.access ignores Windows ACLs, so the probe must decide there
+        with patch('download.os.access', return_value=True), \
+                patch.object(Path, 'touch', side_effect=PermissionError("denied")):
+            with pytest.raises(PermissionError):
+                download._check_writable(tmp_path, windows=True)
+        with patch('download.os.access', return_value=False):
+            with pytest.raises(PermissionError):
+                download._check_writable(tmp_path, windows=False)
+    
     def test_parse_args_help(self):
         """Test help flag parsing."""
         args = download.parse_args(["--help"])
@@ -337,6 +669,42 @@ class TestCommandLineArgs:
         args = download.parse_args(["--firefox-cookies"])
         assert args["firefox_cookies"] is True
     
+    def test_parse_args_no_cache(self):
+        """Test --no-cache flag parsing."""
+        assert download.parse_args([])["no_cache"] is False
+        assert download.parse_args(["--no-cache"])["no_cache"] is True
+    
+    def test_parse_args_refresh_metadata(self):
+        """Test --refresh-metadata flag parsing."""
+        assert download.parse_args([])["refresh_metadata"] is False
+        assert download.parse_args(["--refresh-metadata"])["refresh_metadata"] is True
+    
+    def test_parse_args_clear_metadata_cache(self):
+        """Test --clear-metadata-cache flag parsing."""
+        assert download.parse_args([])["clear_metadata_cache"] is False
+        assert download.parse_args(["--clear-metadata-cache"])["clear_metadata_cache"] is True
+    
+    def test_parse_args_deep(self):
+        """Test --deep flag parsing."""
+        assert download.parse_args([])["deep"] is False
+        assert download.parse_args(["--backup", "--deep"])["deep"] is True
+    
+    def test_parse_args_rebuild(self):
+        """Test --rebuild flag parsing."""
+        assert download.parse_args(["--load", "dir"])["rebuild"] is False
+        assert download.parse_args(["--load", "dir", "--rebuild"])["rebuild"] is True
+    
+    def test_parse_args_jobs(self):
+        """Test --jobs parsing, falling back to 1 for non-numbers."""
+        assert download.parse_args([])["jobs"] == 1
+        assert download.parse_args(["--jobs", "8"])["jobs"] == 8
+        assert download.parse_args(["--jobs", "x"])["jobs"] == 1
+    
+    def test_parse_args_pretty(self):
+        """Test --pretty flag parsing."""
+        assert download.parse_args([])["pretty"] is False
+        assert download.parse_args(["--pretty"])["pretty"] is True
+    
     def test_parse_args_urls(self):
         """Test URL argument parsing."""
         args = download.parse_args(["https://youtube.com/watch?v=abc123"])
@@ -1,67 +1,65 @@
 import pytest
-import tempfile
-import shutil
 from pathlib import Path
 from unittest.mock import patch, MagicMock, call
-import sys
 import os
 
-# Add the parent directory to the path so we can import download
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 import download
 
 
+# Postprocessors every audio / video options build must include
+AUDIO_PPS = frozenset({"FFmpegExtractAudio", "EmbedThumbnail", "FFmpegMetadata"})
+VIDEO_PPS = frozenset({"FFmpegMetadata", "EmbedThumbnail"})
+
+
+# Bound before any test patches download.SmartYoutubeDL, so mocks can be spec'd from the real class
+_SMART_YDL = download.SmartYoutubeDL
+
+
+def _mock_ydl(downloaded=1):
+    """SmartYoutubeDL stand-in (spec'd, so unknown methods fail) usable as a context manager, counts preset."""
+    ydl = MagicMock(spec=_SMART_YDL)
+    ydl.__enter__.return_value = ydl
+    ydl.__exit__.return_value = None
+    ydl.download.return_value = 0
+    ydl.downloaded_count = downloaded
+    ydl.copied_count = 0
+    ydl.skipped_count = 0
+    return ydl
+
+
 class TestDownloadFunctions:
     """Test download-related functionality."""
     
-    def setup_method(self):
-        """Setup for each test method."""
-        self.temp_dir = Path(tempfile.mkdtemp())
-        self.test_info = {
-            "id": "abc123",
-            "title": "Test Video Title",
-            "extractor": "youtube",
-            "extractor_key": "Youtube"
-        }
+    # Read-only, so shared by every test instead of rebuilt per test
+    test_info = {
+        "id": "abc123",
+        "title": "Test Video Title",
+        "extractor": "youtube",
+        "extractor_key": "Youtube"
+    }
     
-    def teardown_method(self):
-        """Cleanup after each test method."""
-        if self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
-    
-    def test_check_existing_file(self):
+    def test_check_existing_file(self, tmp_path):
         """Test checking for existing files."""
         # Create a test file
-        test_file = self.temp_dir / "Test Video Title.mp3"
+        test_file = tmp_path / "Test Video Title.mp3"
         test_file.touch()
         
         # Test that it finds existing MP3
-        exists = download.check_existing_file(self.temp_dir, self.test_info, "mp3")
+        exists = download.check_existing_file(tmp_path, self.test_info, "mp3")
         assert exists is True
         
         # Test that it doesn't find non-existent file
-        exists = download.check_existing_file(self.temp_dir, {"title": "Non-existent"}, "mp3")
+        exists = download.check_existing_file(tmp_path, {"title": "Non-existent"}, "mp3")
         assert exists is False
     
-    def test_check_existing_file_video_formats(self):
+    @pytest.mark.parametrize("ext", ["mp4", "mkv", "webm"])
+    def test_check_existing_file_video_formats(self, ext, tmp_path):
         """Test checking for existing video files with different extensions."""
-        # Create test files with different extensions
-        test_files = [
-            self.temp_dir / "Test Video Title.mp4",
-            self.temp_dir / "Test Video Title.mkv",
-            self.temp_dir / "Test Video Title.webm"
-        ]
+        (tmp_path / f"Test Video Title.{ext}").touch()
         
-        for test_file in test_files:
-            test_file.touch()
-            
-            # Should find the file regardless of requested container
-            exists = download.check_existing_file(self.temp_dir, self.test_info, "mp4")
-            assert exists is True
-            
-            # Clean up for next iteration
-            test_file.unlink()
+        # Should find the file regardless of requested container
+        exists = download.check_existing_file(tmp_path, self.test_info, "mp4")
+        assert exists is True
     
     def test_folder_name_from_info(self):
         """Test folder name generation from video info."""
@@ -87,22 +85,16 @@ class TestDownloadFunctions:
     
     @patch('download.build_archive_from_existing_files_optimized')
     @patch('download.SmartYoutubeDL')
-    def test_download_urls_basic(self, mock_ydl_class, mock_build_archive):
+    def test_download_urls_basic(self, mock_ydl_class, mock_build_archive, tmp_path):
         """Test basic URL downloading functionality."""
         # Mock the YoutubeDL instance
-        mock_ydl = MagicMock()
-        mock_ydl.__enter__ = MagicMock(return_value=mock_ydl)
-        mock_ydl.__exit__ = MagicMock(return_value=None)
-        mock_ydl.download.return_value = 0
-        mock_ydl.downloaded_count = 1
-        mock_ydl.copied_count = 0
-        mock_ydl.skipped_count = 0
+        mock_ydl = _mock_ydl()
         mock_ydl.extract_info.return_value = {"_type": "video"}
         mock_ydl_class.return_value = mock_ydl
         
         # Test download
         urls = ["https://youtube.com/watch?v=abc123"]
-        result = download.download_urls(urls, self.temp_dir, "mp3", "audio", False)
+        result = download.download_urls(urls, tmp_path, "mp3", "audio", False)
         
         # Verify YoutubeDL was called correctly
         mock_ydl_class.assert_called_once()
@@ -111,21 +103,15 @@ class TestDownloadFunctions:
     
     @patch('download.build_archive_from_existing_files_optimized')
     @patch('download.SmartYoutubeDL')
-    def test_download_urls_youtube_music_auto_cookies(self, mock_ydl_class, mock_build_archive):
+    def test_download_urls_youtube_music_auto_cookies(self, mock_ydl_class, mock_build_archive, tmp_path):
         """Test automatic cookie enabling for YouTube Music in immediate mode."""
         # Mock the SmartYoutubeDL instance used in immediate mode
-        mock_ydl = MagicMock()
-        mock_ydl.__enter__ = MagicMock(return_value=mock_ydl)
-        mock_ydl.__exit__ = MagicMock(return_value=None)
-        mock_ydl.download.return_value = 0
-        mock_ydl.downloaded_count = 1
-        mock_ydl.copied_count = 0
-        mock_ydl.skipped_count = 0
+        mock_ydl = _mock_ydl()
         mock_ydl_class.return_value = mock_ydl
         
         # Test with YouTube Music Liked URL
         urls = ["https://music.youtube.com/playlist?list=LM"]
-        download.download_urls(urls, self.temp_dir, "mp3", "audio", False)
+        download.download_urls(urls, tmp_path, "mp3", "audio", False)
         
         # Verify SmartYoutubeDL was called with options that include cookies
         mock_ydl_class.assert_called_once()
@@ -139,7 +125,7 @@ class TestDownloadFunctions:
     @patch('download.build_archive_from_existing_files_optimized')
     @patch('download.YoutubeDL')
     @patch('download.SmartYoutubeDL')
-    def test_download_urls_retry_with_cookies(self, mock_ydl_class, mock_temp_ydl_class, mock_build_archive):
+    def test_download_urls_retry_with_cookies(self, mock_ydl_class, mock_temp_ydl_class, mock_build_archive, tmp_path):
         """Test automatic retry with cookies when playlist access fails."""
         # Mock the temporary YoutubeDL for info extraction to fail first
         mock_temp_ydl = MagicMock()
@@ -147,62 +133,193 @@ class TestDownloadFunctions:
         mock_temp_ydl_class.return_value = mock_temp_ydl
         
         # Mock the first SmartYoutubeDL instance to fail
-        mock_ydl_fail = MagicMock()
-        mock_ydl_fail.__enter__ = MagicMock(return_value=mock_ydl_fail)
-        mock_ydl_fail.__exit__ = MagicMock(return_value=None)
+        mock_ydl_fail = _mock_ydl(downloaded=0)
         mock_ydl_fail.download.side_effect = Exception("This playlist is private")
         
         # Mock the retry SmartYoutubeDL instance to succeed
-        mock_ydl_success = MagicMock()
-        mock_ydl_success.__enter__ = MagicMock(return_value=mock_ydl_success)
-        mock_ydl_success.__exit__ = MagicMock(return_value=None)
-        mock_ydl_success.download.return_value = 0
-        mock_ydl_success.downloaded_count = 1
-        mock_ydl_success.copied_count = 0
-        mock_ydl_success.skipped_count = 0
+        mock_ydl_success = _mock_ydl()
         
         # Set up mock to return failing instance first, then success instance
         mock_ydl_class.side_effect = [mock_ydl_fail, mock_ydl_success]
         
         # Test with a private playlist URL
         urls = ["https://youtube.com/playlist?list=PLprivate123"]
-        result = download.download_urls(urls, self.temp_dir, "mp3", "audio", False)
+        result = download.download_urls(urls, tmp_path, "mp3", "audio", False)
         
         # Verify that both instances were created (original + retry)
         assert mock_ydl_class.call_count == 2
         # Verify the retry succeeded
         assert result == 1
+
+    @patch('download.ArchiveManager')
+    @patch('download.build_archive_from_existing_files_optimized')
+    @patch('download.SmartYoutubeDL')
+    def test_download_immediate_reuses_one_downloader(self, mock_ydl_class, mock_build_archive, mock_archive_class, tmp_path):
+        """Test that immediate mode builds one downloader and points it at each URL in turn."""
+        mock_ydl = MagicMock()
+        seen_urls = []
+        mock_ydl.download.side_effect = lambda real_urls: seen_urls.append(mock_ydl.url) or 0
+        mock_ydl_class.return_value.__enter__.return_value = mock_ydl
+
+        urls = ["https://youtube.com/watch?v=one", "https://youtube.com/watch?v=two"]
+        result = download.download_immediate(urls, tmp_path, "mp3", "audio", use_cache=False)
+
+        assert result == 2
+        mock_ydl_class.assert_called_once()
+        assert seen_urls == urls
+
+    @patch('download.ArchiveManager')
+    @patch('download.build_archive_from_existing_files_optimized')
+    @patch('download._process_one_url')
+    def test_download_urls_with_prepass_parallel(self, mock_process, mock_build_archive, mock_archive_class, tmp_path):
+        """Test that several URLs are processed through the worker pool and counted."""
+        mock_process.side_effect = lambda url, *args: 0 if url.endswith("bad") else 1
+
+        urls = [f"https://youtube.com/watch?v={i}" for i in range(3)] + ["https://youtube.com/watch?v=bad"]
+        result = download.download_urls_with_prepass(urls, tmp_path, "mp3", "audio", False)
+
+        assert result == 3
+        assert sorted(c.args[0] for c in mock_process.call_args_list) == sorted(urls)
+        # All workers share one archive manager, saved once after the pool finishes
+        assert {c.args[1] for c in mock_process.call_args_list} == {mock_archive_class.return_value}
+        mock_archive_class.return_value.save.assert_called_once()
+
+    @patch('download.generate_m3u_for_playlist')
+    @patch('download.fast_copy_from_archive', return_value=[])
+    @patch('download.YoutubeDL')
+    def test_process_one_url_snapshot_skips_extraction(self, mock_ydl, mock_fast_copy, mock_m3u, tmp_path):
+        """Test that a playlist fully served from its snapshot never reaches yt-dlp."""
+        url = "https://youtube.com/playlist?list=abc"
+        flat_cache = MagicMock()
+        flat_cache.get.return_value = ({"playlist_title": "Mix"}, [{"id": "a", "title": "A"}])
+        archive_mgr = MagicMock()
+
+        result = download._process_one_url(url, archive_mgr, tmp_path, "mp3", "audio", False, flat_cache=flat_cache)
+
+        assert result == 1
+        mock_fast_copy.assert_called_once_with(url, tmp_path, "mp3", archive_mgr, flat_cache)
+        mock_ydl.assert_not_called()
+        assert mock_m3u.call_args[0][1] == tmp_path / "Mix"
+
+        # --refresh-metadata ignores the snapshot and goes back to extraction
+        mock_fast_copy.reset_mock()
+        mock_ydl.return_value.__enter__.return_value.extract_info.side_effect = Exception("offline")
+        with patch('download._get_cached_info', return_value=None):
+            download._process_one_url(url, archive_mgr, tmp_path, "mp3", "audio", False, refresh_metadata=True, flat_cache=flat_cache)
+        mock_fast_copy.assert_not_called()
+
+    @patch('download._put_cached_info')
+    @patch('download._get_cached_info', return_value=None)
+    @patch('download.SmartYoutubeDL')
+    @patch('download.YoutubeDL')
+    def test_process_one_url_downloads_from_prepass_info(self, mock_temp_ydl_class, mock_ydl_class, mock_get, mock_put, tmp_path):
+        """Test that freshly extracted info is downloaded directly instead of re-extracting the URL."""
+        url = "https://youtube.com/watch?v=abc123"
+        info = {"_type": "video", "id": "abc123", "title": "T", "webpage_url": url}
+        mock_temp_ydl_class.return_value.extract_info.return_value = info
+        mock_ydl = mock_ydl_class.return_value.__enter__.return_value
+        mock_ydl.download_from_info.return_value = 0
+        mock_ydl.downloaded_count = mock_ydl.copied_count = mock_ydl.skipped_count = 0
+
+        result = download._process_one_url(url, MagicMock(), tmp_path, "mp3", "audio", False)
+
+        assert result == 1
+        mock_ydl.download_from_info.assert_called_once_with(info)
+        mock_ydl.download.assert_not_called()
+
+        # Cached info may carry expired media URLs - go through the URL again
+        mock_get.return_value = info
+        mock_ydl.download.return_value = 0
+        download._process_one_url(url, MagicMock(), tmp_path, "mp3", "audio", False)
+        mock_ydl.download.assert_called_once_with([url])
+        mock_ydl.download_from_info.assert_called_once()
+
+    @patch('download.generate_m3u_for_playlist')
+    @patch('download._put_cached_info')
+    @patch('download.flat_entries')
+    @patch('download._get_cached_info')
+    @patch('download.SmartYoutubeDL')
+    @patch('download.YoutubeDL')
+    def test_process_one_url_revalidates_cached_playlist(self, mock_temp_ydl_class, mock_ydl_class, mock_get, mock_flat, mock_put, mock_m3u, tmp_path):
+        """Test that cached playlist info is only used while the flat listing still matches it."""
+        url = "https://youtube.com/playlist?list=PLtest"
+        cached = {"_type": "playlist", "title": "Mix", "entries": [{"id": "a"}, {"id": "b"}]}
+        mock_get.return_value = cached
+        mock_ydl = mock_ydl_class.return_value.__enter__.return_value
+        mock_ydl.download.return_value = 0
+        mock_ydl.downloaded_count = mock_ydl.copied_count = mock_ydl.skipped_count = 0
+
+        # Same title and tracks: the cached info names the folder, no full extraction
+        mock_flat.return_value = ({"title": "Mix"}, [{"id": "a"}, {"id": "b"}])
+        assert download._process_one_url(url, MagicMock(), tmp_path, "mp3", "audio", False) == 1
+        mock_temp_ydl_class.return_value.extract_info.assert_not_called()
+        assert mock_m3u.call_args[0][0] is cached
+
+        # A track was added since caching: extract again and build the M3U from the fresh info
+        fresh = {"_type": "playlist", "title": "Mix", "entries": [{"id": "a"}, {"id": "b"}, {"id": "c"}]}
+        mock_temp_ydl_class.return_value.extract_info.return_value = fresh
+        mock_flat.return_value = ({"title": "Mix"}, fresh["entries"])
+        download._process_one_url(url, MagicMock(), tmp_path, "mp3", "audio", False)
+        mock_temp_ydl_class.return_value.extract_info.assert_called_once_with(url, download=False)
+        assert mock_m3u.call_args[0][0] is fresh
+
+    def test_download_turn_serializes_and_cancels(self):
+        """Test that downloads take turns and a waiting worker gives up once cancelled."""
+        with download._download_turn():
+            # Slot is held: another worker cannot start its download
+            assert not download._download_slot.acquire(blocking=False)
+            download._cancel_event.set()
+            try:
+                with pytest.raises(KeyboardInterrupt):
+                    with download._download_turn():
+                        pass
+            finally:
+                download._cancel_event.clear()
+        # Released again after the first download finished
+        with download._download_turn():
+            pass
+
+    @patch('download.ArchiveManager')
+    @patch('download.download_urls_with_prepass', return_value=0)
+    @patch('download.download_immediate', return_value=0)
+    def test_download_urls_dedupes_and_partitions(self, mock_immediate, mock_prepass, mock_archive_class, tmp_path):
+        """Test that repeated URLs are dropped in order before routing Liked Music separately."""
+        liked = "https://music.youtube.com/playlist?list=LM"
+        a = "https://youtube.com/watch?v=a"
+        b = "https://youtube.com/watch?v=b"
+        download.download_urls([a, liked, b, a, liked], tmp_path, "mp3", "audio", False)
+
+        assert mock_immediate.call_args[0][0] == [liked]
+        assert mock_prepass.call_args[0][0] == [a, b]
+        # Both modes share the one archive parsed for the mixed batch
+        mock_archive_class.assert_called_once_with()
+        assert mock_immediate.call_args[0][-1] is mock_prepass.call_args[0][-1] is mock_archive_class.return_value
     
-    def test_ydl_opts_common_audio(self):
+    def test_ydl_opts_common_audio(self, tmp_path):
         """Test yt-dlp options for audio downloads."""
-        opts = download.ydl_opts_common(self.temp_dir, "mp3", "audio", False)
+        opts = download.ydl_opts_common(tmp_path, "mp3", "audio", False)
         
         assert "format" in opts
         assert opts["format"] == "bestaudio/best"
         assert "postprocessors" in opts
         
         # Check for audio-specific postprocessors
-        pp_keys = [pp["key"] for pp in opts["postprocessors"]]
-        assert "FFmpegExtractAudio" in pp_keys
-        assert "EmbedThumbnail" in pp_keys
-        assert "FFmpegMetadata" in pp_keys
+        assert AUDIO_PPS <= {pp["key"] for pp in opts["postprocessors"]}
     
-    def test_ydl_opts_common_video_mkv(self):
+    def test_ydl_opts_common_video_mkv(self, tmp_path):
         """Test yt-dlp options for MKV video downloads."""
-        opts = download.ydl_opts_common(self.temp_dir, "mkv", "video", False)
+        opts = download.ydl_opts_common(tmp_path, "mkv", "video", False)
         
         assert "format" in opts
         assert "bestvideo+bestaudio" in opts["format"]
         assert opts["merge_output_format"] == "mkv"
         
         # Check for video-specific postprocessors
-        pp_keys = [pp["key"] for pp in opts["postprocessors"]]
-        assert "FFmpegMetadata" in pp_keys
-        assert "EmbedThumbnail" in pp_keys
+        assert VIDEO_PPS <= {pp["key"] for pp in opts["postprocessors"]}
     
-    def test_ydl_opts_common_video_mp4(self):
+    def test_ydl_opts_common_video_mp4(self, tmp_path):
         """Test yt-dlp options for MP4 video downloads."""
-        opts = download.ydl_opts_common(self.temp_dir, "mp4", "video", False)
+        opts = download.ydl_opts_common(tmp_path, "mp4", "video", False)
         
         assert "format" in opts
         assert opts["merge_output_format"] == "mp4"
@@ -210,9 +327,19 @@ class TestDownloadFunctions:
         # Check for MP4-specific optimizations
         assert "+faststart" in " ".join(opts["postprocessor_args"])
     
-    def test_ydl_opts_common_with_cookies(self):
+    def test_ydl_opts_common_postprocessor_args_not_shared(self, tmp_path):
+        """Test that each options build gets its own args list seeded from the constants."""
+        mkv = download.ydl_opts_common(tmp_path, "mkv", "video", False)
+        mp3 = download.ydl_opts_common(tmp_path, "mp3", "audio", False)
+        
+        assert mkv["postprocessor_args"] == list(download._PP_ARGS_BASE + download._PP_ARGS_MKV_EXTRA)
+        assert mp3["postprocessor_args"] == list(download._PP_ARGS_BASE)
+        mp3["postprocessor_args"].append("-y")
+        assert download.ydl_opts_common(tmp_path, "mp3", "audio", False)["postprocessor_args"] == list(download._PP_ARGS_BASE)
+    
+    def test_ydl_opts_common_with_cookies(self, tmp_path):
         """Test yt-dlp options with Firefox cookies enabled."""
-        opts = download.ydl_opts_common(self.temp_dir, "mp3", "audio", True)
+        opts = download.ydl_opts_common(tmp_path, "mp3", "audio", True)
         
         assert "cookiesfrombrowser" in opts
         assert opts["cookiesfrombrowser"] == ("firefox", None, None, None)
@@ -221,23 +348,14 @@ class TestDownloadFunctions:
 class TestSmartYoutubeDL:
     """Test the custom SmartYoutubeDL class."""
     
-    def setup_method(self):
-        """Setup for each test method."""
-        self.temp_dir = Path(tempfile.mkdtemp())
-    
-    def teardown_method(self):
-        """Cleanup after each test method."""
-        if self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
-    
     @patch('download.optimized_copy_from_archive')
-    def test_process_info_copy_from_archive(self, mock_copy):
+    def test_process_info_copy_from_archive(self, mock_copy, tmp_path):
         """Test copying file from archive instead of downloading."""
         # Setup mocks
         mock_copy.return_value = True
         
         # Create SmartYoutubeDL instance with a mocked archive manager
-        ydl = download.SmartYoutubeDL({}, self.temp_dir, "mp3")
+        ydl = download.SmartYoutubeDL({}, tmp_path, "mp3")
         
         # Mock the archive manager's find method
         from unittest.mock import MagicMock
@@ -252,22 +370,27 @@ class TestSmartYoutubeDL:
         }
         
         # Process the info
-        result = ydl.process_info(info_dict)
+        with patch.object(download.sys, "stdout") as mock_stdout:
+            result = ydl.process_info(info_dict)
         
         # Should return None (skip download) and increment copied count
         assert result is None
         assert ydl.copied_count == 1
+        # The track's lines go out as one write so parallel workers can't split them
+        mock_stdout.write.assert_called_once()
+        block = mock_stdout.write.call_args[0][0]
+        assert "Processing:" in block and "Found in archive" in block
         ydl.archive.find.assert_called_once_with("abc123", "Youtube", "mp3", "Test Video")
         mock_copy.assert_called_once()
     
     @patch('download.check_existing_file')
-    def test_process_info_skip_existing(self, mock_check):
+    def test_process_info_skip_existing(self, mock_check, tmp_path):
         """Test skipping existing files."""
         # Setup mock
         mock_check.return_value = True
         
         # Create SmartYoutubeDL instance
-        ydl = download.SmartYoutubeDL({}, self.temp_dir, "mp3")
+        ydl = download.SmartYoutubeDL({}, tmp_path, "mp3")
         
         # Test info dict
         info_dict = {
@@ -283,24 +406,101 @@ class TestSmartYoutubeDL:
         assert result is None
         assert ydl.skipped_count == 1
 
+    
+    def test_target_files_memoized(self, tmp_path):
+        """Test that the target directory is listed once and reused."""
+        (tmp_path / "Test Video.mp3").touch()
+        ydl = download.SmartYoutubeDL({}, tmp_path, "mp3")
+        
+        names = ydl._target_files(tmp_path)
+        assert "Test Video.mp3" in names
+        
+        # Later files are not picked up until the set is updated explicitly
+        (tmp_path / "Later.mp3").touch()
+        assert ydl._target_files(tmp_path) is names
+        assert "Later.mp3" not in names
+        
+        # check_existing_file answers from the set without touching the disk
+        assert download.check_existing_file(tmp_path, {"title": "Test Video"}, "mp3", names)
+        assert not download.check_existing_file(tmp_path, {"title": "Later"}, "mp3", names)
+
+    def test_write_thumbnails_reuses_shared_cache(self, tmp_path):
+        """Test that a thumbnail fetched for one track is hardlinked into place for the next."""
+        ydl = download.SmartYoutubeDL({"writethumbnail": True}, tmp_path, "mp3", archive_mgr=MagicMock())
+        thumbs = [{"id": "0", "url": "https://img.example/album.jpg"}]
+        seen_before_fetch = []
+
+        def fake_write(self_, label, info, filename, base=None):
+            thumb = filename.rsplit(".", 1)[0] + ".jpg"
+            seen_before_fetch.append(os.path.exists(thumb))
+            if not os.path.exists(thumb):
+                Path(thumb).write_bytes(b"art")
+            return [(thumb, thumb)]
+
+        with patch.object(download.YoutubeDL, "_write_thumbnails", fake_write):
+            for title in ("Track 1", "Track 2"):
+                info = {"ext": "webm", "thumbnails": [dict(t) for t in thumbs]}
+                ydl._write_thumbnails("video", info, str(tmp_path / f"{title}.webm"))
+
+        # Only the first track had to fetch; the second found the cached art already linked in
+        assert seen_before_fetch == [False, True]
+        assert (tmp_path / "Track 2.jpg").read_bytes() == b"art"
+        assert len(list((tmp_path / download._THUMB_CACHE_DIRNAME).iterdir())) == 1
+
+    def test_add_successful_download_native(self, tmp_path):
+        """Test that the downloaded native file is found from one directory listing."""
+        archive_mgr = MagicMock()
+        ydl = download.SmartYoutubeDL({}, tmp_path, "native", archive_mgr=archive_mgr)
+        ydl._target_files(tmp_path)  # stale listing from before the download
+        (tmp_path / "Test Video Title.opus").touch()
+
+        ydl._add_successful_download_to_archive({"id": "abc123", "title": "Test Video Title", "extractor_key": "Youtube"})
+
+        archive_mgr.add.assert_called_once_with(
+            "abc123", "Youtube", "Test Video Title", tmp_path / "Test Video Title.opus", "native"
+        )
+        assert "Test Video Title.opus" in ydl._target_files(tmp_path)
+
+    def test_add_successful_download_trusts_filepath(self, tmp_path):
+        """Test that yt-dlp's final filepath is archived as-is, without a directory listing."""
+        archive_mgr = MagicMock()
+        ydl = download.SmartYoutubeDL({}, tmp_path, "mp3", archive_mgr=archive_mgr)
+        final = tmp_path / "Test Video Title (1).mp3"
+
+        with patch.object(ydl, "_target_files") as mock_listing:
+            ydl._add_successful_download_to_archive({
+                "id": "abc123", "title": "Test Video Title", "extractor_key": "Youtube",
+                "requested_downloads": [{"filepath": str(final)}],
+            })
+
+        mock_listing.assert_not_called()
+        archive_mgr.add.assert_called_once_with("abc123", "Youtube", "Test Video Title", final, "mp3")
+
+    def test_download_from_info_uses_info_file_and_cleans_up(self, tmp_path):
+        """Test that prepass info is handed to yt-dlp through a temporary info file."""
+        ydl = download.SmartYoutubeDL({}, tmp_path, "mp3", archive_mgr=MagicMock())
+        info = {"_type": "video", "id": "abc123", "title": "Café", "webpage_url": "https://youtube.com/watch?v=abc123"}
+        seen = {}
+
+        def fake_download_with_info_file(path):
+            seen["path"] = path
+            seen["info"] = download._json_loads(Path(path).read_bytes())
+            return 0
+
+        with patch.object(ydl, "download_with_info_file", side_effect=fake_download_with_info_file):
+            assert ydl.download_from_info(info) == 0
+
+        assert seen["info"] == info
+        assert not os.path.exists(seen["path"])
 
 class TestFileOperations:
     """Test file operation functions."""
     
-    def setup_method(self):
-        """Setup for each test method."""
-        self.temp_dir = Path(tempfile.mkdtemp())
-    
-    def teardown_method(self):
-        """Cleanup after each test method."""
-        if self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
-    
-    def test_copy_from_archive_success(self):
-        """Test successful copying from archive."""
-        # Create source file
-        source_file = self.temp_dir / "source.mp3"
-        source_file.write_text("test content")
+    @patch('download.os.link')
+    def test_copy_from_archive_success(self, mock_link, tmp_path, make_files):
+        """Test successful copying from archive (only the link call is mocked; real copies are covered below)."""
+        source_file = tmp_path / "source.mp3"
+        make_files(source_file)
         
         # Archive entry
         archive_entry = {
@@ -309,28 +509,72 @@ class TestFileOperations:
         }
         
         # Target directory
-        target_dir = self.temp_dir / "target"
+        target_dir = tmp_path / "target"
         target_dir.mkdir()
         
         # Copy from archive using optimized function
         result = download.optimized_copy_from_archive(archive_entry, target_dir, "mp3")
         
-        # Verify success
+        # Verify success: hardlinked under the archived title
         assert result is True
+        mock_link.assert_called_once_with(source_file, target_dir / "Test Song.mp3")
+    
+    def test_copy_from_archive_falls_back_when_link_fails(self, tmp_path):
+        """Test that a refused hardlink still produces an independent copy with preserved mtime."""
+        source_file = tmp_path / "source.mp3"
+        source_file.write_bytes(b"test content")
+        os.utime(source_file, (1_000_000, 1_000_000))
+        target_dir = tmp_path / "target"
+        target_dir.mkdir()
+
+        with patch('download.os.link', side_effect=OSError("cross-device link")):
+            result = download.optimized_copy_from_archive({"file_path": str(source_file), "title": "Test Song"}, target_dir, "mp3")
+
         target_file = target_dir / "Test Song.mp3"
-        assert target_file.exists()
-        assert target_file.read_text() == "test content"
+        assert result is True
+        assert target_file.read_bytes() == b"test content"
+        assert not os.path.samefile(source_file, target_file)
+        assert target_file.stat().st_mtime == 1_000_000
+
+    def test_clone_or_copy_failure_leaves_no_stub(self, tmp_path):
+        """Test that a copy failing after the clone attempt leaves nothing at the target."""
+        source_file = tmp_path / "source.mp3"
+        source_file.write_bytes(b"test content")
+        target_file = tmp_path / "Test Song.mp3"
+
+        with patch('download.shutil.copy2', side_effect=OSError(28, "No space left on device")), \
+                patch('download.fcntl.ioctl', side_effect=OSError("not supported")):
+            with pytest.raises(OSError):
+                download._clone_or_copy(source_file, target_file)
+
+        # Neither the target nor the temporary file survives
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["source.mp3"]
+
+    def test_copy_from_archive_same_file(self, tmp_path):
+        """Test that copying a file onto itself is a no-op success."""
+        source_file = tmp_path / "Test Song.mp3"
+        source_file.write_bytes(b"test content")
+        
+        archive_entry = {
+            "file_path": str(source_file),
+            "title": "Test Song"
+        }
+        
+        result = download.optimized_copy_from_archive(archive_entry, tmp_path, "mp3")
+        
+        assert result is True
+        assert source_file.read_bytes() == b"test content"
     
-    def test_copy_from_archive_missing_source(self):
+    def test_copy_from_archive_missing_source(self, tmp_path):
         """Test copying when source file doesn't exist."""
         # Archive entry with non-existent file
         archive_entry = {
-            "file_path": str(self.temp_dir / "nonexistent.mp3"),
+            "file_path": str(tmp_path / "nonexistent.mp3"),
             "title": "Test Song"
         }
         
         # Target directory
-        target_dir = self.temp_dir / "target"
+        target_dir = tmp_path / "target"
         target_dir.mkdir()
         
         # Attempt to copy using optimized function
@@ -339,28 +583,142 @@ class TestFileOperations:
         # Should fail
         assert result is False
     
-    def test_build_archive_from_existing_files(self):
-        """Test building archive from existing files in directory."""
-        # Create test files
-        test_files = [
-            self.temp_dir / "song1.mp3",
-            self.temp_dir / "song2.mp3",
-            self.temp_dir / "video1.mp4"
+    @patch('download.YoutubeDL')
+    @patch('download.flat_entries')
+    def test_fast_copy_from_archive(self, mock_flat, mock_ydl_class, monkeypatch, tmp_path):
+        """Test that archived entries are copied in parallel and missing IDs returned."""
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: tmp_path / "archive.json")
+        entries = [
+            {"id": "a1", "title": "Song A"},
+            {"id": "b2", "title": "Song B"},
+            {"id": "c3", "title": "Song C"},
         ]
-        
-        for file in test_files:
-            file.touch()
+        mock_flat.return_value = ({"title": "My Playlist", "entries": entries}, entries)
+        
+        archive_mgr = download.ArchiveManager()
+        for vid, title in (("a1", "Song A"), ("b2", "Song B")):
+            source = tmp_path / f"{vid}.mp3"
+            source.write_bytes(title.encode())
+            archive_mgr.add(vid, "youtube", title, source, "mp3")
+        
+        with patch.object(download.sys, "stdout") as mock_stdout:
+            missing = download.fast_copy_from_archive(
+                "https://youtube.com/playlist?list=PLtest", tmp_path, "mp3", archive_mgr
+            )
+        
+        assert missing == ["c3"]
+        # Each copy's Hardlinked/Source/Target lines arrive in a single write
+        writes = [c[0][0] for c in mock_stdout.write.call_args_list]
+        per_item = [w for w in writes if "from archive:" in w]
+        assert len(per_item) == 2
+        assert all("Source:" in w and "Target:" in w for w in per_item)
+        # Playlist title comes from the flat extraction - no second extractor run
+        mock_ydl_class.assert_not_called()
+        playlist_dir = tmp_path / "My Playlist"
+        assert (playlist_dir / "Song A.mp3").read_bytes() == b"Song A"
+        assert (playlist_dir / "Song B.mp3").read_bytes() == b"Song B"
+    
+    @patch('download.os.scandir')
+    def test_build_archive_from_existing_files(self, mock_scandir, tmp_path):
+        """Test building archive from existing files in directory (listing mocked; see test_iter_media_files)."""
+        def entry(name, mtime=1.0):
+            de = MagicMock(spec=os.DirEntry)
+            de.name = name
+            de.path = str(tmp_path / name)
+            de.is_dir.return_value = False
+            de.is_file.return_value = True
+            de.stat.return_value.st_mtime = mtime
+            return de
+        
+        listing = MagicMock()
+        listing.__enter__.return_value = listing
+        listing.__iter__.return_value = iter([entry("song1.mp3"), entry("song2.mp3"), entry("video1.mp4")])
+        mock_scandir.return_value = listing
         
         # Create mock archive manager
         mock_archive_mgr = MagicMock()
         mock_archive_mgr.data = {}
         
         # Call the optimized function
-        download.build_archive_from_existing_files_optimized(self.temp_dir, "mp3", mock_archive_mgr)
+        download.build_archive_from_existing_files_optimized(tmp_path, "mp3", mock_archive_mgr)
         
-        # Verify that entries were added to the archive manager
-        assert len(mock_archive_mgr.data) >= 2  # Should have at least the MP3 files
+        # Only the MP3 files are archived, straight from the directory listing
+        mock_scandir.assert_called_once_with(os.path.abspath(tmp_path))
+        assert sorted(e['title'] for e in mock_archive_mgr.data.values()) == ["song1", "song2"]
+        assert {e['download_date'] for e in mock_archive_mgr.data.values()} == {1.0}
+
+    def test_iter_media_files(self, tmp_path):
+        """Test the scandir walker filters by extension and only recurses on request."""
+        (tmp_path / "song1.mp3").touch()
+        (tmp_path / "cover.jpg").touch()
+        (tmp_path / "Playlist").mkdir()
+        (tmp_path / "Playlist" / "song2.MP3").touch()
+        extensions = download.expected_extension_set("mp3")
+
+        top = list(download._iter_media_files(tmp_path, extensions))
+        assert [stem for stem, _, _ in top] == ["song1"]
+        assert top[0][1] == os.path.abspath(tmp_path / "song1.mp3")
 
+        nested = list(download._iter_media_files(tmp_path, extensions, recursive=True))
+        assert sorted(stem for stem, _, _ in nested) == ["song1", "song2"]
+        assert all(os.path.isabs(p) for _, p, _ in nested)
+
+        # Relative roots still yield absolute paths
+        with patch('os.getcwd', return_value=str(tmp_path)):
+            rel = list(download._iter_media_files("Playlist", extensions))
+        assert rel[0][1] == os.path.join(str(tmp_path), "Playlist", "song2.MP3")
+
+    def test_iter_media_files_enters_folders_with_media_extensions(self, tmp_path):
+        """Test that folders named like media files (e.g. "Live.mp3/") are walked, not matched."""
+        for folder in ("Live.mp3", "Disc 1.flac"):
+            (tmp_path / folder).mkdir()
+            (tmp_path / folder / "song.mp3").touch()
+        extensions = download.expected_extension_set("mp3")
+
+        assert list(download._iter_media_files(tmp_path, extensions)) == []
+        nested = download._iter_media_files(tmp_path, extensions, recursive=True)
+        assert sorted(p for _, p, _ in nested) == [
+            os.path.join(str(tmp_path), "Disc 1.flac", "song.mp3"),
+            os.path.join(str(tmp_path), "Live.mp3", "song.mp3"),
+        ]
+
+    def test_iter_media_files_parallel_matches_serial(self, tmp_path):
+        """Test that the threaded directory walk finds the same files as the serial one."""
+        for folder in ("a", "a/b", "c"):
+            (tmp_path / folder).mkdir()
+            (tmp_path / folder / "song.mp3").touch()
+        (tmp_path / "c" / "notes.txt").touch()
+        extensions = download.expected_extension_set("mp3")
+
+        serial = sorted(download._iter_media_files(tmp_path, extensions, recursive=True))
+        with download.ThreadPoolExecutor(max_workers=3) as pool:
+            parallel = sorted(download._iter_media_files_parallel(tmp_path, extensions, pool))
+        assert len(serial) == 3
+        assert parallel == serial
+
+        # Hidden and tooling folders are pruned without being listed
+        for folder in (".git", "node_modules"):
+            (tmp_path / folder).mkdir()
+            (tmp_path / folder / "song.mp3").touch()
+        assert sorted(download._iter_media_files(tmp_path, extensions, recursive=True)) == serial
+
+
+    @pytest.mark.skipif(download.xxhash is None, reason="xxhash not installed")
+    def test_build_archive_migrates_legacy_keys(self, tmp_path):
+        """Test that blake2b-keyed local entries are re-keyed instead of duplicated."""
+        song = tmp_path / "song1.mp3"
+        song.touch()
+        abs_path = os.path.abspath(str(song))
+        legacy_key = download._legacy_stable_key_for_path(abs_path, "mp3")
+        
+        mock_archive_mgr = MagicMock()
+        mock_archive_mgr.data = {legacy_key: {"title": "song1", "format": "mp3", "file_path": abs_path}}
+        
+        download.build_archive_from_existing_files_optimized(tmp_path, "mp3", mock_archive_mgr)
+        
+        assert legacy_key not in mock_archive_mgr.data
+        assert download._stable_key_for_path(abs_path, "mp3") in mock_archive_mgr.data
+        assert len(mock_archive_mgr.data) == 1
 
 if __name__ == "__main__":
     pytest.main([__file__])
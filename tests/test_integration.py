@@ -6,51 +6,32 @@ work together correctly in realistic scenarios.
 """
 
 import pytest
-import tempfile
-import shutil
-import json
-from pathlib import Path
-from unittest.mock import patch, MagicMock
-import sys
-import os
-
-# Add the parent directory to the path so we can import download
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import download
 
+# Shared placeholder payload, already bytes so no per-file encoding
+AUDIO_CONTENT = b"audio content"
+
 
 class TestEndToEndIntegration:
     """Test complete end-to-end functionality."""
     
-    def setup_method(self):
-        """Setup for each test method."""
-        self.temp_dir = Path(tempfile.mkdtemp())
-        self.archive_file = self.temp_dir / "test_archive.json"
-    
-    def teardown_method(self):
-        """Cleanup after each test method."""
-        if self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
-    
-    @patch('download.get_appdata_archive_path')
-    def test_complete_archive_workflow(self, mock_path):
+    def test_complete_archive_workflow(self, monkeypatch, make_files, tmp_path, archive_file):
         """Test complete workflow: build archive, find entries, copy files."""
-        mock_path.return_value = self.archive_file
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
         
         # Create test files
         test_files = [
-            self.temp_dir / "Test Song 1.mp3",
-            self.temp_dir / "Test Song 2.mp3",
-            self.temp_dir / "Test Video.mp4"
+            tmp_path / "Test Song 1.mp3",
+            tmp_path / "Test Song 2.mp3",
+            tmp_path / "Test Video.mp4"
         ]
         
-        for file in test_files:
-            file.write_text(f"content of {file.name}")
+        make_files(*test_files, content=b"content")
         
         # Step 1: Build archive from existing files
         archive_mgr = download.ArchiveManager()
-        download.build_archive_from_existing_files_optimized(self.temp_dir, "mp3", archive_mgr)
+        download.build_archive_from_existing_files_optimized(tmp_path, "mp3", archive_mgr)
         
         # Verify archive was built correctly
         assert len(archive_mgr.data) >= 2  # At least the MP3 files
@@ -59,35 +40,34 @@ class TestEndToEndIntegration:
         # Step 2: Save and reload archive
         archive_mgr.save()
         assert not archive_mgr._dirty
-        assert self.archive_file.exists()
+        assert archive_file.exists()
         
         # Reload archive in new manager
         new_archive_mgr = download.ArchiveManager()
         assert len(new_archive_mgr.data) == len(archive_mgr.data)
         
         # Step 3: Test finding and copying
-        target_dir = self.temp_dir / "target"
+        target_dir = tmp_path / "target"
         target_dir.mkdir()
         
-        # Find an entry and copy it
-        for key, entry in new_archive_mgr.data.items():
-            if entry['format'] == 'mp3':
-                result = download.optimized_copy_from_archive(entry, target_dir, "mp3")
-                assert result is True
-                
-                # Verify file was copied correctly
-                title = download.clean_title(entry['title'])
-                target_file = target_dir / f"{title}.mp3"
-                assert target_file.exists()
-                break
+        # Look up the first song by its path-derived key and copy it
+        entry = new_archive_mgr.data[download._stable_key_for_path(str(test_files[0]), "mp3")]
+        assert entry['format'] == 'mp3'
+        result = download.optimized_copy_from_archive(entry, target_dir, "mp3")
+        assert result is True
+        
+        # Verify file was copied correctly
+        title = download.clean_title(entry['title'])
+        target_file = target_dir / f"{title}.mp3"
+        assert target_file.exists()
     
-    def test_helper_functions_integration(self):
+    def test_helper_functions_integration(self, tmp_path):
         """Test that all helper functions work together."""
         # Test resolve_target_dir with different scenarios
         
         # YouTube Music
-        ym_dir = download.resolve_target_dir(self.temp_dir, "https://music.youtube.com/playlist?list=LM", None)
-        assert ym_dir == self.temp_dir / "Liked Music"
+        ym_dir = download.resolve_target_dir(tmp_path, "https://music.youtube.com/playlist?list=LM", None)
+        assert ym_dir == tmp_path / "Liked Music"
         assert ym_dir.exists()
         
         # Regular playlist with info
@@ -95,13 +75,13 @@ class TestEndToEndIntegration:
             "_type": "playlist",
             "playlist_title": "My Test Playlist"
         }
-        playlist_dir = download.resolve_target_dir(self.temp_dir, "https://youtube.com/playlist?list=test", playlist_info)
-        assert playlist_dir == self.temp_dir / "My Test Playlist"
+        playlist_dir = download.resolve_target_dir(tmp_path, "https://youtube.com/playlist?list=test", playlist_info)
+        assert playlist_dir == tmp_path / "My Test Playlist"
         assert playlist_dir.exists()
         
         # Single video
-        single_dir = download.resolve_target_dir(self.temp_dir, "https://youtube.com/watch?v=test", None)
-        assert single_dir == self.temp_dir
+        single_dir = download.resolve_target_dir(tmp_path, "https://youtube.com/watch?v=test", None)
+        assert single_dir == tmp_path
         
         # Test clean_title with various inputs
         assert download.clean_title("Test Video: Part 1") != ""
@@ -113,16 +93,15 @@ class TestEndToEndIntegration:
         assert ".opus" in download.expected_extensions("native")
         assert ".mp4" in download.expected_extensions("mp4")
     
-    @patch('download.get_appdata_archive_path')
-    def test_archive_manager_consistency(self, mock_path):
+    def test_archive_manager_consistency(self, monkeypatch, tmp_path, archive_file):
         """Test that ArchiveManager is consistent across operations."""
-        mock_path.return_value = self.archive_file
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
         
         # Create first archive manager and add entries
         archive_mgr1 = download.ArchiveManager()
         
         # Create test file
-        test_file = self.temp_dir / "test.mp3"
+        test_file = tmp_path / "test.mp3"
         test_file.touch()
         
         # Add entry
@@ -146,94 +125,69 @@ class TestEndToEndIntegration:
         assert found_entry is not None
         assert found_entry["title"] == "Test Video"
     
-    def test_mp3_format_enforcement_integration(self):
+    @pytest.mark.parametrize("source_ext", [".webm", ".m4a", ".opus"])
+    def test_mp3_format_enforcement_integration(self, make_files, source_ext, tmp_path):
         """Test that MP3 format enforcement works in real scenarios."""
-        # Create source files with different extensions
-        source_files = [
-            self.temp_dir / "song.webm",
-            self.temp_dir / "song.m4a", 
-            self.temp_dir / "song.opus"
-        ]
+        source_file = tmp_path / f"song{source_ext}"
+        make_files(source_file, content=AUDIO_CONTENT)
         
-        for file in source_files:
-            file.write_text("audio content")
-        
-        target_dir = self.temp_dir / "target"
+        target_dir = tmp_path / "target"
         target_dir.mkdir()
         
-        # Test copying each format to MP3 mode
-        for source_file in source_files:
-            archive_entry = {
-                "file_path": str(source_file),
-                "title": f"Test Song {source_file.suffix}"
-            }
-            
-            result = download.optimized_copy_from_archive(archive_entry, target_dir, "mp3")
-            assert result is True
-            
-            # Verify all files get .mp3 extension regardless of source
-            title = download.clean_title(archive_entry['title'])
-            target_file = target_dir / f"{title}.mp3"
-            assert target_file.exists()
-            assert target_file.suffix == ".mp3"
+        archive_entry = {
+            "file_path": str(source_file),
+            "title": f"Test Song {source_ext}"
+        }
+        
+        result = download.optimized_copy_from_archive(archive_entry, target_dir, "mp3")
+        assert result is True
+        
+        # Verify the file gets .mp3 extension regardless of source
+        title = download.clean_title(archive_entry['title'])
+        target_file = target_dir / f"{title}.mp3"
+        assert target_file.exists()
+        assert target_file.suffix == ".mp3"
     
-    def test_native_format_preservation_integration(self):
+    @pytest.mark.parametrize("source_ext", [".opus", ".m4a", ".aac"])
+    def test_native_format_preservation_integration(self, make_files, source_ext, tmp_path):
         """Test that native format preservation works correctly."""
-        # Create source files with different extensions
-        source_files = [
-            self.temp_dir / "song.opus",
-            self.temp_dir / "song.m4a",
-            self.temp_dir / "song.aac"
-        ]
+        source_file = tmp_path / f"song{source_ext}"
+        make_files(source_file, content=AUDIO_CONTENT)
         
-        for file in source_files:
-            file.write_text("audio content")
-        
-        target_dir = self.temp_dir / "target"
+        target_dir = tmp_path / "target"
         target_dir.mkdir()
         
-        # Test copying each format in native mode
-        for source_file in source_files:
-            archive_entry = {
-                "file_path": str(source_file),
-                "title": f"Test Song {source_file.suffix}"
-            }
-            
-            result = download.optimized_copy_from_archive(archive_entry, target_dir, "native")
-            assert result is True
-            
-            # Verify original extensions are preserved
-            title = download.clean_title(archive_entry['title'])
-            target_file = target_dir / f"{title}{source_file.suffix}"
-            assert target_file.exists()
-            assert target_file.suffix == source_file.suffix
+        archive_entry = {
+            "file_path": str(source_file),
+            "title": f"Test Song {source_ext}"
+        }
+        
+        result = download.optimized_copy_from_archive(archive_entry, target_dir, "native")
+        assert result is True
+        
+        # Verify the original extension is preserved
+        title = download.clean_title(archive_entry['title'])
+        target_file = target_dir / f"{title}{source_ext}"
+        assert target_file.exists()
+        assert target_file.suffix == source_ext
 
 
 class TestRegressionPrevention:
     """Tests to prevent regression of the bugs we fixed."""
     
-    def setup_method(self):
-        """Setup for each test method."""
-        self.temp_dir = Path(tempfile.mkdtemp())
-    
-    def teardown_method(self):
-        """Cleanup after each test method."""
-        if self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
-    
-    def test_mp3_copy_format_bug_fixed(self):
+    def test_mp3_copy_format_bug_fixed(self, tmp_path):
         """Regression test: MP3 mode should always use .mp3 extension."""
         # This was the original bug - MP3 mode would sometimes preserve non-MP3 extensions
         
-        source_file = self.temp_dir / "audio.webm"
-        source_file.write_text("webm audio content")
+        source_file = tmp_path / "audio.webm"
+        source_file.write_bytes(b"webm audio content")
         
         archive_entry = {
             "file_path": str(source_file),
             "title": "Test Audio"
         }
         
-        target_dir = self.temp_dir / "target"
+        target_dir = tmp_path / "target"
         target_dir.mkdir()
         
         # This should ALWAYS create a .mp3 file, never .webm
@@ -251,17 +205,17 @@ class TestRegressionPrevention:
     def test_no_legacy_functions_remain(self):
         """Regression test: Ensure legacy functions are truly removed."""
         # These functions should no longer exist
-        legacy_functions = [
+        legacy_functions = {
             'load_archive',
             'save_archive', 
             'add_to_archive',
             'find_in_archive',
             'copy_from_archive',
             'build_archive_from_existing_files'
-        ]
+        }
         
-        for func_name in legacy_functions:
-            assert not hasattr(download, func_name), f"Legacy function {func_name} still exists!"
+        remaining = legacy_functions & vars(download).keys()
+        assert not remaining, f"Legacy functions still exist: {sorted(remaining)}"
     
     def test_archive_manager_single_source_of_truth(self):
         """Regression test: All archive operations should go through ArchiveManager."""
@@ -269,20 +223,18 @@ class TestRegressionPrevention:
         
         # These should exist and work
         archive_mgr = download.ArchiveManager()
-        assert hasattr(archive_mgr, 'data')
-        assert hasattr(archive_mgr, 'save')
-        assert hasattr(archive_mgr, 'add')
-        assert hasattr(archive_mgr, 'find')
-        assert hasattr(archive_mgr, 'key')
-        
-        # These optimized functions should exist
-        assert hasattr(download, 'build_archive_from_existing_files_optimized')
-        assert hasattr(download, 'optimized_copy_from_archive')
-        
-        # Helper functions should exist
-        assert hasattr(download, 'resolve_target_dir')
-        assert hasattr(download, 'clean_title')
-        assert hasattr(download, 'expected_extensions')
+        missing = {'data', 'save', 'add', 'find', 'key'} - set(dir(archive_mgr))
+        assert not missing, f"ArchiveManager is missing: {sorted(missing)}"
+        
+        # The optimized archive functions and helpers should exist
+        missing = {
+            'build_archive_from_existing_files_optimized',
+            'optimized_copy_from_archive',
+            'resolve_target_dir',
+            'clean_title',
+            'expected_extensions',
+        } - vars(download).keys()
+        assert not missing, f"download is missing: {sorted(missing)}"
 
 
 if __name__ == "__main__":
@@ -1,74 +1,93 @@
 import pytest
-import tempfile
-import shutil
 import json
 from pathlib import Path
-from unittest.mock import patch, mock_open, MagicMock
-import sys
+from unittest.mock import patch
 import os
+import sys
 from datetime import datetime
 
-# Add the parent directory to the path so we can import download
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 import download
 
+# Paths that differ only slightly, plus awkward characters, for the stable-key tests
+STABLE_KEY_PATHS = (
+    "/test/path/file.mp3",
+    "/test/path/file.mp3 ",
+    "/test/path/File.mp3",
+    "/test/path1/file.mp3",
+    "C:\\Music\\Liked Music\\Song.mp3",
+    "/music/Café – 日本語/曲.opus",
+    "/music/emoji 🎵/track.m4a",
+    "/" + "deep/" * 50 + "song.flac",
+    "relative/song.mp3",
+    "x",
+)
+STABLE_KEY_FORMATS = ("mp3", "native", "mp4", "mkv")
+
+# Relative dates resolve against this instead of the wall clock
+FIXED_NOW = datetime(2024, 1, 15, 15, 30)
+
+
+def _make_library(root):
+    """Create lib/clip.webm, lib/album/track.flac and a non-media cover; return (lib, album)."""
+    lib = root / "lib"
+    nested = lib / "album"
+    nested.mkdir(parents=True)
+    (nested / "track.flac").touch()
+    (lib / "clip.webm").touch()
+    (nested / "cover.jpg").touch()
+    return lib, nested
+
 
 class TestUtilityFunctions:
     """Test various utility functions."""
     
-    def test_banner(self):
+    def test_banner(self, capsys):
         """Test that banner function runs without error."""
-        # Just ensure it doesn't crash
+        # Smoke test; output goes to pytest's in-memory capture, never the terminal
         download.banner()
-    
-    def test_is_youtube_music_liked_variations(self):
-        """Test YouTube Music detection with various URL formats."""
-        positive_cases = [
-            "https://music.youtube.com/playlist?list=LM",
-            "https://music.youtube.com/playlist?list=lm",
-            "https://Music.YouTube.com/playlist?list=LM",
-            "https://music.youtube.com/liked",
-            "https://music.youtube.com/LIKED",
-            "https://music.youtube.com/playlist?list=LM&si=abc"
-        ]
-        
-        negative_cases = [
-            "https://youtube.com/watch?v=abc123",
-            "https://youtube.com/playlist?list=PLrAXtmRdnEQy",
-            "https://music.youtube.com/playlist?list=PLrAXtmRdnEQy",
-            "https://spotify.com/playlist/abc",
-            "not_a_url",
-            ""
-        ]
-        
-        for url in positive_cases:
-            assert download.is_youtube_music_liked(url), f"Failed for URL: {url}"
-        
-        for url in negative_cases:
-            assert not download.is_youtube_music_liked(url), f"False positive for URL: {url}"
-    
-    def test_split_urls_various_formats(self):
-        """Test URL splitting with different input formats."""
+        assert capsys.readouterr().out.count("Interactive yt-dlp wrapper") == 1
+    
+    @pytest.mark.parametrize("url", [
+        "https://music.youtube.com/playlist?list=LM",
+        "https://music.youtube.com/playlist?list=lm",
+        "https://Music.YouTube.com/playlist?list=LM",
+        "https://music.youtube.com/liked",
+        "https://music.youtube.com/LIKED",
+        "https://music.youtube.com/playlist?list=LM&si=abc",
+    ])
+    def test_is_youtube_music_liked_positive(self, url):
+        """Test YouTube Music liked-playlist detection across URL formats."""
+        assert download.is_youtube_music_liked(url)
+    
+    @pytest.mark.parametrize("url", [
+        "https://youtube.com/watch?v=abc123",
+        "https://youtube.com/playlist?list=PLrAXtmRdnEQy",
+        "https://music.youtube.com/playlist?list=PLrAXtmRdnEQy",
+        "https://spotify.com/playlist/abc",
+        "not_a_url",
+        "",
+    ])
+    def test_is_youtube_music_liked_negative(self, url):
+        """Test that other URLs are not detected as YouTube Music liked."""
+        assert not download.is_youtube_music_liked(url)
+    
+    @pytest.mark.parametrize("text,expected", [
         # Single URL
-        result = download.split_urls("https://example.com/1")
-        assert result == ["https://example.com/1"]
-        
+        ("https://example.com/1", ["https://example.com/1"]),
         # Multiple URLs with spaces
-        result = download.split_urls("https://example.com/1 https://example.com/2")
-        assert result == ["https://example.com/1", "https://example.com/2"]
-        
+        ("https://example.com/1 https://example.com/2", ["https://example.com/1", "https://example.com/2"]),
         # Multiple URLs with newlines
-        result = download.split_urls("https://example.com/1\nhttps://example.com/2")
-        assert result == ["https://example.com/1", "https://example.com/2"]
-        
+        ("https://example.com/1\nhttps://example.com/2", ["https://example.com/1", "https://example.com/2"]),
         # Mixed whitespace
-        result = download.split_urls("https://example.com/1\n  https://example.com/2  \nhttps://example.com/3")
-        assert result == ["https://example.com/1", "https://example.com/2", "https://example.com/3"]
-        
+        ("https://example.com/1\n  https://example.com/2  \nhttps://example.com/3",
+         ["https://example.com/1", "https://example.com/2", "https://example.com/3"]),
         # Empty and whitespace-only
-        assert download.split_urls("") == []
-        assert download.split_urls("   \n  \t  ") == []
+        ("", []),
+        ("   \n  \t  ", []),
+    ])
+    def test_split_urls_various_formats(self, text, expected):
+        """Test URL splitting with different input formats."""
+        assert download.split_urls(text) == expected
     
     def test_default_download_dir(self):
         """Test default download directory function."""
@@ -77,63 +96,97 @@ class TestUtilityFunctions:
         # Should return current working directory
         assert result == Path.cwd()
     
-    @patch('download.shutil.which')
-    def test_detect_ffmpeg(self, mock_which):
+    def test_detect_ffmpeg(self, monkeypatch):
         """Test FFmpeg detection."""
         # Test when FFmpeg is found
-        mock_which.return_value = "/usr/bin/ffmpeg"
+        monkeypatch.setattr(download.shutil, "which", lambda name: "/usr/bin/ffmpeg")
         assert download.detect_ffmpeg() is True
         
         # Test when FFmpeg is not found
-        mock_which.return_value = None
+        monkeypatch.setattr(download.shutil, "which", lambda name: None)
         assert download.detect_ffmpeg() is False
     
-    def test_build_outtmpl_creates_directory(self):
-        """Test that build_outtmpl creates the output directory."""
-        temp_dir = Path(tempfile.mkdtemp())
-        try:
-            # Use a subdirectory that doesn't exist yet
-            target_dir = temp_dir / "new_subdir"
-            
-            template = download.build_outtmpl(target_dir, True)
-            
-            # Directory should be created
-            assert target_dir.exists()
-            assert target_dir.is_dir()
+    def test_download_progress_hook_throttles_updates(self, capsys):
+        """Test that rapid 'downloading' updates are throttled but 'finished' is not."""
+        update = {"status": "downloading", "downloaded_bytes": 512, "total_bytes": 1024}
+        
+        with patch('download._last_progress_ts', 0.0):
+            download.download_progress_hook(update, Path("."), "mp3")
+            download.download_progress_hook(update, Path("."), "mp3")
+            download.download_progress_hook({"status": "finished", "filename": "song.mp3"}, Path("."), "mp3")
+        
+        out = capsys.readouterr().out
+        assert out.count("50.0% downloaded") == 1
+        assert "song.mp3" in out
+    
+    def test_buffered_output_single_write(self, capsys):
+        """Test that prints inside buffered_output are held and written together on exit."""
+        with download.buffered_output():
+            download.print("first")
+            download.print("a", "b", sep="-", end="")
+            assert capsys.readouterr().out == ""
+        assert capsys.readouterr().out == "first\na-b"
+
+        # Outside a buffered block output goes straight through
+        download.print("direct")
+        assert capsys.readouterr().out == "direct\n"
+
+    def test_buffered_output_passes_through_stderr_and_flush(self, capsys):
+        """Test that stderr prints and flush=True are not coalesced into the stdout buffer."""
+        with download.buffered_output():
+            download.print("held")
+            download.print("warning", file=sys.stderr)
+            captured = capsys.readouterr()
+            assert (captured.out, captured.err) == ("", "warning\n")
             
-            # Template should include the directory path
-            assert str(target_dir) in template
-            assert "%(title)s.%(ext)s" in template
-        finally:
-            shutil.rmtree(temp_dir)
+            # A flush emits the held lines first, so stdout stays in order
+            download.print("now", flush=True)
+            assert capsys.readouterr().out == "held\nnow\n"
+            download.print("later")
+        assert capsys.readouterr().out == "later\n"
+
+    def test_build_outtmpl_creates_directory(self, tmp_path):
+        """Test that build_outtmpl creates the output directory."""
+        # Use a subdirectory that doesn't exist yet
+        target_dir = tmp_path / "new_subdir"
+        
+        template = download.build_outtmpl(target_dir, True)
+        
+        # Directory should be created
+        assert target_dir.exists()
+        assert target_dir.is_dir()
+        
+        # Template should include the directory path
+        assert str(target_dir) in template
+        assert "%(title)s.%(ext)s" in template
 
 
 class TestArchiveUtilities:
     """Test archive-related utility functions."""
     
-    def setup_method(self):
-        """Setup for each test method."""
-        self.temp_dir = Path(tempfile.mkdtemp())
-    
-    def teardown_method(self):
-        """Cleanup after each test method."""
-        if self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
-    
-    def test_stable_key_for_path_consistency(self):
+    @pytest.mark.parametrize("fmt", STABLE_KEY_FORMATS)
+    @pytest.mark.parametrize("path", STABLE_KEY_PATHS)
+    def test_stable_key_for_path_consistency(self, path, fmt):
         """Test that stable key generation is consistent."""
-        path = "/test/path/file.mp3"
-        
         # Same inputs should produce same output
-        key1 = download._stable_key_for_path(path, "mp3")
-        key2 = download._stable_key_for_path(path, "mp3")
+        key1 = download._stable_key_for_path(path, fmt)
+        key2 = download._stable_key_for_path(path, fmt)
         assert key1 == key2
         
         # Key should start with "local_"
         assert key1.startswith("local_")
         
         # Key should end with format
-        assert key1.endswith("_mp3")
+        assert key1.endswith(f"_{fmt}")
+    
+    def test_stable_key_for_path_blake2b_fallback(self):
+        """Test that keys fall back to the legacy blake2b scheme without xxhash."""
+        path = "/test/path/file.mp3"
+        with patch('download.xxhash', None):
+            key = download._stable_key_for_path(path, "mp3")
+        assert key == download._legacy_stable_key_for_path(path, "mp3")
+        assert key.startswith("local_")
+        assert key.endswith("_mp3")
     
     def test_stable_key_for_path_uniqueness(self):
         """Test that different inputs produce different keys."""
@@ -148,31 +201,26 @@ class TestArchiveUtilities:
         # Different formats should also produce different keys
         key3 = download._stable_key_for_path(path1, "mp4")
         assert key1 != key3
+        
+        # No collisions across the whole path table, under either hash
+        for make_key in (download._stable_key_for_path, download._legacy_stable_key_for_path):
+            keys = {make_key(path, "mp3") for path in STABLE_KEY_PATHS}
+            assert len(keys) == len(STABLE_KEY_PATHS)
 
 
 class TestM3UGeneration:
     """Test M3U playlist generation."""
     
-    def setup_method(self):
-        """Setup for each test method."""
-        self.temp_dir = Path(tempfile.mkdtemp())
-    
-    def teardown_method(self):
-        """Cleanup after each test method."""
-        if self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
-    
-    def test_generate_m3u_for_playlist(self):
+    def test_generate_m3u_for_playlist(self, make_files, tmp_path):
         """Test M3U playlist generation."""
         # Create test files
         files = [
-            self.temp_dir / "Song 1.mp3",
-            self.temp_dir / "Song 2.mp3",
-            self.temp_dir / "Song 3.mp3"
+            tmp_path / "Song 1.mp3",
+            tmp_path / "Song 2.mp3",
+            tmp_path / "Song 3.mp3"
         ]
         
-        for file in files:
-            file.touch()
+        make_files(*files)
         
         # Mock playlist info
         playlist_info = {
@@ -186,53 +234,42 @@ class TestM3UGeneration:
             ]
         }
         
-        download.generate_m3u_for_playlist(playlist_info, self.temp_dir, "mp3")
+        download.generate_m3u_for_playlist(playlist_info, tmp_path, "mp3")
         
         # Check that M3U file was created
-        m3u_file = self.temp_dir / "Test Playlist.m3u"
+        m3u_file = tmp_path / "Test Playlist.m3u"
         assert m3u_file.exists()
         
         # Check M3U content
-        content = m3u_file.read_text(encoding="utf-8")
-        lines = content.strip().split('\n')
+        lines = m3u_file.read_bytes().splitlines()
         
         # Should only include existing files
-        assert "Song 1.mp3" in lines
-        assert "Song 2.mp3" in lines
-        assert "Song 3.mp3" in lines
-        assert "Song 4.mp3" not in lines
+        assert b"Song 1.mp3" in lines
+        assert b"Song 2.mp3" in lines
+        assert b"Song 3.mp3" in lines
+        assert b"Song 4.mp3" not in lines
     
-    def test_generate_m3u_no_entries(self):
+    def test_generate_m3u_no_entries(self, tmp_path):
         """Test M3U generation with no entries."""
         playlist_info = {
             "playlist_title": "Empty Playlist",
             "entries": []
         }
         
-        download.generate_m3u_for_playlist(playlist_info, self.temp_dir, "mp3")
+        download.generate_m3u_for_playlist(playlist_info, tmp_path, "mp3")
         
         # No M3U file should be created
-        m3u_files = list(self.temp_dir.glob("*.m3u"))
-        assert len(m3u_files) == 0
+        assert not (tmp_path / "Empty Playlist.m3u").exists()
 
 
 class TestFileManagement:
     """Test file management functions."""
     
-    def setup_method(self):
-        """Setup for each test method."""
-        self.temp_dir = Path(tempfile.mkdtemp())
-    
-    def teardown_method(self):
-        """Cleanup after each test method."""
-        if self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
-    
-    def test_load_urls_from_file(self):
+    def test_load_urls_from_file(self, tmp_path):
         """Test loading URLs from a text file."""
         # Create test file with URLs
-        url_file = self.temp_dir / "urls.txt"
-        url_content = """# This is a comment
+        url_file = tmp_path / "urls.txt"
+        url_content = b"""# This is a comment
 https://youtube.com/watch?v=abc123
 https://youtube.com/watch?v=def456
 
@@ -241,7 +278,7 @@ https://youtube.com/watch?v=ghi789
 invalid_url_line
 https://youtube.com/watch?v=jkl012"""
         
-        url_file.write_text(url_content, encoding='utf-8')
+        url_file.write_bytes(url_content)
         
         urls = download.load_urls_from_file(str(url_file))
         
@@ -260,35 +297,101 @@ https://youtube.com/watch?v=jkl012"""
         urls = download.load_urls_from_file("nonexistent.txt")
         assert urls == []
     
-    def test_load_directory_to_archive(self):
+    def test_load_directory_to_archive(self, make_files, tmp_path):
         """Test loading directory files into archive."""
         # Create test files
         audio_files = [
-            self.temp_dir / "song1.mp3",
-            self.temp_dir / "song2.m4a",
-            self.temp_dir / "song3.flac"
+            tmp_path / "song1.mp3",
+            tmp_path / "song2.m4a",
+            tmp_path / "song3.flac"
         ]
         
         video_files = [
-            self.temp_dir / "video1.mp4",
-            self.temp_dir / "video2.mkv"
+            tmp_path / "video1.mp4",
+            tmp_path / "video2.mkv"
         ]
         
         other_files = [
-            self.temp_dir / "document.txt",
-            self.temp_dir / "image.jpg"
+            tmp_path / "document.txt",
+            tmp_path / "image.jpg"
         ]
         
-        all_files = audio_files + video_files + other_files
-        for file in all_files:
-            file.touch()
+        make_files(*audio_files, *video_files, *other_files)
         
         # Test the actual function - it now uses ArchiveManager internally
-        result = download.load_directory_to_archive(str(self.temp_dir))
+        result = download.load_directory_to_archive(str(tmp_path))
         
         assert result is True
         # The function should have completed successfully
     
+    def test_load_directory_to_archive_recursive(self, monkeypatch, tmp_path, archive_file):
+        """Test that nested media files are archived with format from their extension."""
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
+        lib, nested = _make_library(tmp_path)
+        
+        assert download.load_directory_to_archive(str(lib)) is True
+        entries = download.ArchiveManager().data.values()
+        assert sorted((e['title'], e['format']) for e in entries) == [("clip", "mkv"), ("track", "mp3")]
+        assert {e['file_path'] for e in entries} == {str(nested / "track.flac"), str(lib / "clip.webm")}
+    
+    def test_load_directory_to_archive_appends_to_log(self, monkeypatch, tmp_path, archive_file):
+        """Test that a merge only appends the new entries to the log; the JSON file is not rewritten."""
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
+        lib, _ = _make_library(tmp_path)
+        
+        assert download.load_directory_to_archive(str(lib)) is True
+        assert not archive_file.exists()
+        assert len(archive_file.with_suffix(".ndjson").read_bytes().splitlines()) == 2
+    
+    def test_load_directory_to_archive_rescan_skips_stat(self, monkeypatch, tmp_path, archive_file):
+        """Test that already-archived files are never stat'ed on a second scan."""
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
+        lib, _ = _make_library(tmp_path)
+        assert download.load_directory_to_archive(str(lib)) is True
+        
+        real_stat = os.stat
+        with patch('download.os.stat', side_effect=real_stat) as mock_stat:
+            assert download.load_directory_to_archive(str(lib)) is True
+        assert len(download.ArchiveManager().data) == 2
+        assert not any(str(c.args[0]).endswith((".flac", ".webm")) for c in mock_stat.call_args_list)
+    
+    def test_load_directory_to_archive_status_lines(self, monkeypatch, tmp_path, archive_file):
+        """Test that every already-archived file gets its own status line when chunks are size 1."""
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
+        lib, _ = _make_library(tmp_path)
+        assert download.load_directory_to_archive(str(lib)) is True
+        
+        with patch('download._LOAD_PRINT_CHUNK', 1), patch('download.print') as mock_print:
+            assert download.load_directory_to_archive(str(lib)) is True
+        status = [c.args[0] for c in mock_print.call_args_list if "Already in archive" in c.args[0]]
+        assert sorted(status) == ["  ⏭️  Already in archive: clip.webm", "  ⏭️  Already in archive: track.flac"]
+    
+    def test_load_directory_to_archive_rebuild(self, monkeypatch, tmp_path, archive_file):
+        """Test that rebuild drops entries for files outside the scanned tree."""
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
+        lib, nested = _make_library(tmp_path)
+        assert download.load_directory_to_archive(str(lib)) is True
+        
+        # Declining the confirmation leaves the archive untouched
+        with patch('download.prompt', return_value="n"):
+            assert download.load_directory_to_archive(str(nested), rebuild=True) is False
+        assert len(download.ArchiveManager().data) == 2
+        
+        with patch('download.prompt', return_value="y") as mock_prompt:
+            assert download.load_directory_to_archive(str(nested), rebuild=True) is True
+        mock_prompt.assert_called_once()
+        assert [e['title'] for e in download.ArchiveManager().data.values()] == ["track"]
+    
+    def test_load_directory_to_archive_jobs(self, monkeypatch, tmp_path, archive_file):
+        """Test that scanning folders on several threads produces the same entries."""
+        monkeypatch.setattr(download, "get_appdata_archive_path", lambda: archive_file)
+        lib, _ = _make_library(tmp_path)
+        
+        assert download.load_directory_to_archive(str(lib), jobs=4) is True
+        entries = download.ArchiveManager().data.values()
+        assert sorted(e['title'] for e in entries) == ["clip", "track"]
+        assert all(e['download_date'] == os.stat(e['file_path']).st_mtime for e in entries)
+    
     def test_load_directory_nonexistent(self):
         """Test loading non-existent directory."""
         result = download.load_directory_to_archive("nonexistent_directory")
@@ -298,60 +401,56 @@ https://youtube.com/watch?v=jkl012"""
 class TestDateParsing:
     """Test date parsing functionality."""
     
-    def test_parse_date_input_formats(self):
+    @pytest.mark.parametrize("date_str", ["2023-12-25", "2023/12/25", "12/25/2023", "25/12/2023"])
+    def test_parse_date_input_formats(self, date_str):
         """Test various date input formats."""
-        # Test standard formats
-        date_formats = [
-            ("2023-12-25", datetime(2023, 12, 25)),
-            ("2023/12/25", datetime(2023, 12, 25)),
-            ("12/25/2023", datetime(2023, 12, 25)),
-            ("25/12/2023", datetime(2023, 12, 25)),  # Note: this might be ambiguous
-        ]
-        
-        for date_str, expected in date_formats:
-            result = download.parse_date_input(date_str)
-            # Just check that we get a datetime object (exact format matching is tricky)
-            assert isinstance(result, datetime), f"Failed to parse: {date_str}"
-    
-    def test_parse_date_input_relative(self):
-        """Test relative date parsing."""
-        # Test relative dates
-        relative_dates = ["today", "yesterday", "last week", "last month"]
-        
-        for date_str in relative_dates:
-            result = download.parse_date_input(date_str)
-            assert isinstance(result, datetime), f"Failed to parse relative date: {date_str}"
-    
-    def test_parse_date_input_invalid(self):
+        # Month/day and day/month order both resolve, since 25 can't be a month
+        assert download.parse_date_input(date_str) == datetime(2023, 12, 25)
+    
+    @pytest.mark.parametrize("date_str,expected", [
+        ("today", datetime(2024, 1, 15)),
+        ("yesterday", datetime(2024, 1, 14)),
+        ("last week", datetime(2024, 1, 8, 15, 30)),
+        ("last month", datetime(2023, 12, 16, 15, 30)),
+    ])
+    def test_parse_date_input_relative(self, date_str, expected):
+        """Test relative date parsing against a fixed 'now'."""
+        assert download.parse_date_input(date_str, FIXED_NOW) == expected
+
+    def test_parse_date_input_shared_now_and_unpadded(self):
+        """Test that a caller-supplied 'now' is used and unpadded dates still parse."""
+        now = datetime(2024, 3, 10, 15, 30)
+        assert download.parse_date_input("today", now) == datetime(2024, 3, 10)
+        assert download.parse_date_input("last week", now) == datetime(2024, 3, 3, 15, 30)
+        # Not one of the zero-padded dispatch shapes - falls back to the full format list
+        assert download.parse_date_input("2024-3-9") == datetime(2024, 3, 9)
+        assert download.parse_date_input("2024-12-25 14:30") == datetime(2024, 12, 25, 14, 30)
+        assert download.parse_date_input("2024-12-25 14:30:45") == datetime(2024, 12, 25, 14, 30, 45)
+        # The "T" separator was never an accepted format (more ISO variants in the invalid table)
+        assert download.parse_date_input("2024-12-25T14:30") is None
+
+    @pytest.mark.parametrize("date_str", [
+        "not_a_date", "2023-13-45", "",
+        # ISO variants fromisoformat would take but the accepted formats never did
+        "2023-W01-1", "2024-12-25 14:30+01",
+    ])
+    def test_parse_date_input_invalid(self, date_str):
         """Test invalid date input."""
-        invalid_dates = ["not_a_date", "2023-13-45", ""]
-        
-        for date_str in invalid_dates:
-            result = download.parse_date_input(date_str)
-            assert result is None, f"Should have failed to parse: {date_str}"
+        assert download.parse_date_input(date_str, FIXED_NOW) is None
 
 
 class TestNewHelperFunctions:
     """Test the new helper functions introduced in the refactor."""
     
-    def setup_method(self):
-        """Setup for each test method."""
-        self.temp_dir = Path(tempfile.mkdtemp())
-    
-    def teardown_method(self):
-        """Cleanup after each test method."""
-        if self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
-    
-    def test_resolve_target_dir_youtube_music(self):
+    def test_resolve_target_dir_youtube_music(self, tmp_path):
         """Test target directory resolution for YouTube Music."""
         url = "https://music.youtube.com/playlist?list=LM"
-        target_dir = download.resolve_target_dir(self.temp_dir, url, None)
+        target_dir = download.resolve_target_dir(tmp_path, url, None)
         
-        assert target_dir == self.temp_dir / "Liked Music"
+        assert target_dir == tmp_path / "Liked Music"
         assert target_dir.exists()
     
-    def test_resolve_target_dir_playlist_with_info(self):
+    def test_resolve_target_dir_playlist_with_info(self, tmp_path):
         """Test target directory resolution for playlists with metadata."""
         url = "https://youtube.com/playlist?list=PLtest"
         info = {
@@ -359,17 +458,17 @@ class TestNewHelperFunctions:
             "playlist_title": "My Test Playlist"
         }
         
-        target_dir = download.resolve_target_dir(self.temp_dir, url, info)
+        target_dir = download.resolve_target_dir(tmp_path, url, info)
         
-        assert target_dir == self.temp_dir / "My Test Playlist"
+        assert target_dir == tmp_path / "My Test Playlist"
         assert target_dir.exists()
     
-    def test_resolve_target_dir_single_video(self):
+    def test_resolve_target_dir_single_video(self, tmp_path):
         """Test target directory resolution for single videos."""
         url = "https://youtube.com/watch?v=abc123"
-        target_dir = download.resolve_target_dir(self.temp_dir, url, None)
+        target_dir = download.resolve_target_dir(tmp_path, url, None)
         
-        assert target_dir == self.temp_dir
+        assert target_dir == tmp_path
         assert target_dir.exists()
     
     def test_clean_title_string(self):
@@ -391,6 +490,28 @@ class TestNewHelperFunctions:
         assert isinstance(clean, str)
         assert "Test Video" in clean
     
+    def test_sanitize_is_memoized(self):
+        """Test that the cached sanitizer matches yt-dlp and reuses results."""
+        title = "Test Video: Special Characters! & More"
+        download._sanitize.cache_clear()
+        first = download._sanitize(title)
+        second = download._sanitize(title)
+        
+        assert first == download.sanitize_filename(title, restricted=False)
+        assert second == first
+        assert download._sanitize.cache_info().hits >= 1
+
+    def test_classify_url_cached_and_shared_logger(self, tmp_path):
+        """Test that URL classification is memoized and option dicts share one logger."""
+        url = "https://youtube.com/playlist?list=PLcache"
+        assert download.classify_url(url) is download.classify_url(url)
+
+        opts_a = download.ydl_opts_common(tmp_path, "mp3", "audio", False, url=url)
+        opts_b = download.ydl_opts_common(tmp_path, "mkv", "video", False)
+        assert opts_a["logger"] is opts_b["logger"] is download._YDL_LOGGER_SINGLETON
+        assert opts_a["extract_flat"] == "in_playlist"
+        assert opts_b["extract_flat"] is False
+
     def test_clean_title_unknown(self):
         """Test title cleaning with None/unknown input."""
         clean = download.clean_title(None)
@@ -402,50 +523,36 @@ class TestNewHelperFunctions:
         clean = download.clean_title({})
         assert clean == "unknown"
     
-    def test_expected_extensions_mp3(self):
-        """Test expected extensions for MP3 format."""
-        extensions = download.expected_extensions("mp3")
-        assert extensions == [".mp3"]
-    
-    def test_expected_extensions_native(self):
-        """Test expected extensions for native audio format."""
-        extensions = download.expected_extensions("native")
-        expected = [".m4a", ".opus", ".webm", ".mp3", ".aac"]
-        assert extensions == expected
-    
-    def test_expected_extensions_video(self):
-        """Test expected extensions for video formats."""
-        mp4_extensions = download.expected_extensions("mp4")
-        mkv_extensions = download.expected_extensions("mkv")
-        
-        # Both should return the same list for video formats
-        expected = [".mp4", ".mkv", ".webm", ".avi"]
-        assert mp4_extensions == expected
-        assert mkv_extensions == expected
-    
-    def test_expected_extensions_custom(self):
-        """Test expected extensions for custom format."""
-        extensions = download.expected_extensions("flac")
-        assert extensions == [".flac"]
+    @pytest.mark.parametrize("container,expected", [
+        ("mp3", [".mp3"]),
+        ("native", [".m4a", ".opus", ".webm", ".mp3", ".aac"]),
+        # Both video formats share the same list
+        ("mp4", [".mp4", ".mkv", ".webm", ".avi"]),
+        ("mkv", [".mp4", ".mkv", ".webm", ".avi"]),
+        # Unknown formats map to their own extension
+        ("flac", [".flac"]),
+    ])
+    def test_expected_extensions(self, container, expected):
+        """Test expected extensions for each container format."""
+        assert download.expected_extensions(container) == expected
+    
+    def test_expected_extension_set(self):
+        """Test frozenset extensions match the ordered list variant."""
+        for container in ("mp3", "native", "mp4", "mkv", "flac"):
+            ext_set = download.expected_extension_set(container)
+            assert isinstance(ext_set, frozenset)
+            assert ext_set == frozenset(download.expected_extensions(container))
 
 
 class TestOptimizedCopyFromArchive:
     """Test the optimized copy from archive functionality."""
     
-    def setup_method(self):
-        """Setup for each test method."""
-        self.temp_dir = Path(tempfile.mkdtemp())
-    
-    def teardown_method(self):
-        """Cleanup after each test method."""
-        if self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
-    
-    def test_optimized_copy_mp3_format_enforcement(self):
+    @pytest.mark.parametrize("source_ext", [".webm", ".m4a", ".opus"])
+    def test_optimized_copy_mp3_format_enforcement(self, source_ext, tmp_path):
         """Test that MP3 format is enforced correctly in optimized copy."""
-        # Create a source file with .webm extension (audio)
-        source_file = self.temp_dir / "source.webm"
-        source_file.write_text("test audio content")
+        # Create an audio source file with a non-mp3 extension
+        source_file = tmp_path / f"source{source_ext}"
+        source_file.write_bytes(b"test audio content")
         
         # Archive entry
         archive_entry = {
@@ -454,7 +561,7 @@ class TestOptimizedCopyFromArchive:
         }
         
         # Target directory
-        target_dir = self.temp_dir / "target"
+        target_dir = tmp_path / "target"
         target_dir.mkdir()
         
         # Copy with MP3 container - should enforce .mp3 extension
@@ -464,13 +571,13 @@ class TestOptimizedCopyFromArchive:
         assert result is True
         target_file = target_dir / "Test Song.mp3"  # Should have .mp3 extension
         assert target_file.exists()
-        assert target_file.read_text() == "test audio content"
+        assert target_file.read_bytes() == b"test audio content"
     
-    def test_optimized_copy_native_format_preservation(self):
+    @pytest.mark.parametrize("source_ext", [".opus", ".m4a", ".aac"])
+    def test_optimized_copy_native_format_preservation(self, source_ext, tmp_path):
         """Test that native format preserves original extension."""
-        # Create a source file with .opus extension
-        source_file = self.temp_dir / "source.opus"
-        source_file.write_text("test audio content")
+        source_file = tmp_path / f"source{source_ext}"
+        source_file.write_bytes(b"test audio content")
         
         # Archive entry
         archive_entry = {
@@ -479,17 +586,17 @@ class TestOptimizedCopyFromArchive:
         }
         
         # Target directory
-        target_dir = self.temp_dir / "target"
+        target_dir = tmp_path / "target"
         target_dir.mkdir()
         
-        # Copy with native container - should preserve .opus extension
+        # Copy with native container - should preserve the source extension
         result = download.optimized_copy_from_archive(archive_entry, target_dir, "native")
         
         # Verify success and preserved extension
         assert result is True
-        target_file = target_dir / "Test Song.opus"  # Should preserve .opus
+        target_file = target_dir / f"Test Song{source_ext}"
         assert target_file.exists()
-        assert target_file.read_text() == "test audio content"
+        assert target_file.read_bytes() == b"test audio content"
 
 
 if __name__ == "__main__":